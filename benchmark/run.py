@@ -0,0 +1,327 @@
+"""
+MCP 도구(FastAPI 엔드포인트) 벤치마크 / 부하 테스트
+
+실제 FastAPI 앱을 로컬 MEDEASY API 스텁, 가짜 LLM(local 매칭 백엔드), fakeredis와 함께 띄우고
+operation_id 별로 지정한 동시성으로 요청을 보내 지연시간(p50/p95/p99), 처리량, 도구 호출당
+업스트림/LLM 호출 수를 JSON으로 출력합니다.
+operation_id 별 호출 예산(service.call_accounting.OPERATION_CALL_BUDGETS)을 넘은 도구 호출이 있으면
+응답 오류와 마찬가지로 종료 코드 1을 반환하므로, 변경 후 왕복 횟수가 늘어난 회귀를 로컬에서 잡을 수 있습니다.
+--blocking-threshold-ms 를 주면 이벤트 루프 블로킹 탐지(디버그 모드)를 켜고, 기준 목록
+(benchmark/blocking_baseline.json)에 없는 새 블로킹 호출 위치가 나오면 종료 코드 1을 반환합니다.
+
+사용 예:
+    pip install -r benchmark/requirements.txt
+    python -m benchmark.run --requests 200 --concurrency 16 --latency-ms 20 --output bench.json
+    python -m benchmark.run --operations search_medicine,drug_routine_completed_check --llm-latency-ms 300
+    python -m benchmark.run --blocking-threshold-ms 50
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import socket
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import uvicorn
+
+from benchmark.scenarios import PATH_PARAMS, SCENARIOS
+from benchmark.stub_backend import StubBackend
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_TOKEN_SECRET_KEY = "medeasy-benchmark-secret-key-0123456789"
+# 이미 알고 있는 이벤트 루프 블로킹 호출 위치 (operation_id + 파일 + 함수), 새로 생기면 벤치마크 실패
+BLOCKING_BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "blocking_baseline.json")
+
+
+class ServerThread:
+    """uvicorn 서버를 별도 스레드(자체 이벤트 루프)에서 실행"""
+
+    def __init__(self, app, port: int):
+        self.port = port
+        self.server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+        self._thread = threading.Thread(target=self.server.run, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def start(self, timeout: float = 10.0) -> None:
+        self._thread.start()
+        deadline = time.monotonic() + timeout
+        while not self.server.started:
+            if time.monotonic() > deadline or not self._thread.is_alive():
+                raise RuntimeError(f"서버 시작 실패 (port {self.port})")
+            time.sleep(0.01)
+
+    def stop(self) -> None:
+        self.server.should_exit = True
+        self._thread.join(timeout=10)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(sorted_values: List[float], percent: float) -> Optional[float]:
+    """nearest-rank 방식 백분위수"""
+    if not sorted_values:
+        return None
+    rank = max(int(round(percent / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+def make_tokens(count: int, secret: str) -> List[str]:
+    import jwt
+
+    expires_at = datetime.now(timezone.utc) + timedelta(hours=6)
+    return [jwt.encode({"userId": f"bench-user-{index}", "exp": expires_at}, secret, algorithm="HS256")
+            for index in range(count)]
+
+
+def list_operations(app) -> List[Dict[str, str]]:
+    """OpenAPI 스키마(= MCP 도구 목록의 원본)에서 operation_id, 메서드, 경로 추출"""
+    operations = []
+    for path, methods in app.openapi()["paths"].items():
+        for method, operation in methods.items():
+            if operation.get("operationId"):
+                operations.append({"operation_id": operation["operationId"], "method": method.upper(), "path": path})
+    return operations
+
+
+def llm_call_count(matching_backend) -> int:
+    return sum(stats.get("requests", 0) for stats in matching_backend.stats().values())
+
+
+async def run_operation(client: httpx.AsyncClient, operation: Dict[str, str], tokens: List[str],
+                        requests: int, concurrency: int, warmup: int, stub: StubBackend,
+                        matching_backend) -> Dict[str, Any]:
+    operation_id = operation["operation_id"]
+    scenario = SCENARIOS[operation_id]
+    path = operation["path"].format(**PATH_PARAMS.get(operation_id, {}))
+
+    async def send(iteration: int) -> Tuple[float, Optional[int]]:
+        token = tokens[iteration % len(tokens)]
+        tool_request = scenario(token, iteration)
+        started = time.perf_counter()
+        try:
+            resp = await client.request(operation["method"], path, params=tool_request.params, json=tool_request.json)
+            status = resp.status_code
+        except httpx.HTTPError as e:
+            logger.warning(f"{operation_id} 요청 실패: {e}")
+            status = None
+        return (time.perf_counter() - started) * 1000, status
+
+    for iteration in range(warmup):
+        await send(iteration)
+
+    stub.reset_calls()
+    llm_calls_before = llm_call_count(matching_backend)
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    counter = iter(range(requests))
+
+    async def worker() -> None:
+        for iteration in counter:
+            latency_ms, status = await send(warmup + iteration)
+            latencies.append(latency_ms)
+            statuses[str(status) if status is not None else "error"] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    upstream_calls = {f"{method} {route}": count for (method, route), count in sorted(stub.snapshot().items())}
+    not_modified = dict(stub.not_modified)
+    latencies.sort()
+    errors = sum(count for status, count in statuses.items() if status == "error" or int(status) >= 400)
+    return {
+        "method": operation["method"],
+        "path": operation["path"],
+        "requests": requests,
+        "errors": errors,
+        "status_codes": dict(statuses),
+        "throughput_rps": round(requests / elapsed, 2) if elapsed > 0 else None,
+        "latency_ms": {
+            "p50": _round(percentile(latencies, 50)),
+            "p95": _round(percentile(latencies, 95)),
+            "p99": _round(percentile(latencies, 99)),
+            "mean": _round(sum(latencies) / len(latencies)) if latencies else None,
+            "max": _round(latencies[-1]) if latencies else None,
+        },
+        "upstream_calls_per_request": round(sum(upstream_calls.values()) / requests, 3),
+        "upstream_calls": upstream_calls,
+        "upstream_not_modified": not_modified,
+        "llm_calls_per_request": round((llm_call_count(matching_backend) - llm_calls_before) / requests, 3),
+    }
+
+
+def _round(value: Optional[float]) -> Optional[float]:
+    return round(value, 2) if value is not None else None
+
+
+async def run_benchmark(args, app_url: str, app, stub: StubBackend, matching_backend, tokens: List[str]) -> Dict[str, Any]:
+    operations = list_operations(app)
+    selected = set(args.operations.split(",")) if args.operations else None
+
+    results: Dict[str, Any] = {}
+    skipped: Dict[str, str] = {}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=app_url, timeout=args.timeout, limits=limits) as client:
+        for operation in operations:
+            operation_id = operation["operation_id"]
+            if selected is not None and operation_id not in selected:
+                continue
+            if operation_id not in SCENARIOS:
+                skipped[operation_id] = "시나리오 없음 (benchmark/scenarios.py 에 추가 필요)"
+                continue
+            logger.warning(f"▶ {operation_id} ({args.requests} requests, concurrency {args.concurrency})")
+            results[operation_id] = await run_operation(
+                client, operation, tokens, args.requests, args.concurrency, args.warmup, stub, matching_backend
+            )
+
+    return {"operations": results, "skipped": skipped}
+
+
+def check_blocking_baseline(offenders: List[Dict[str, Any]], baseline_path: str, update: bool) -> List[str]:
+    """기준 목록에 없는 블로킹 호출 위치 반환 (update 시 기준 목록을 이번 결과로 교체)"""
+    keys = sorted({offender["key"] for offender in offenders})
+    if update:
+        with open(baseline_path, "w", encoding="utf-8") as f:
+            json.dump({"known_offenders": keys}, f, ensure_ascii=False, indent=2)
+            f.write("\n")
+        return []
+    try:
+        with open(baseline_path, encoding="utf-8") as f:
+            known = set(json.load(f).get("known_offenders", []))
+    except FileNotFoundError:
+        known = set()
+    return [key for key in keys if key not in known]
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="MCP 도구 벤치마크 / 부하 테스트")
+    parser.add_argument("--requests", type=int, default=100, help="operation_id 당 측정 요청 수")
+    parser.add_argument("--concurrency", type=int, default=8, help="동시 요청 수")
+    parser.add_argument("--warmup", type=int, default=5, help="측정 전 워밍업 요청 수")
+    parser.add_argument("--users", type=int, default=20, help="요청에 사용할 가상 사용자(JWT) 수")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="스텁 백엔드 응답 지연")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="스텁 백엔드 지연에 더할 무작위 지터 최대값")
+    parser.add_argument("--no-etags", action="store_true", help="스텁 백엔드가 ETag를 보내지 않음 (본문 해시 재검증 경로)")
+    parser.add_argument("--no-compression", action="store_true", help="스텁 백엔드가 응답을 압축하지 않음")
+    parser.add_argument("--llm-latency-ms", type=float, default=0.0, help="가짜 LLM(local 매칭) 응답 지연")
+    parser.add_argument("--operations", default=None, help="측정할 operation_id 목록 (쉼표 구분, 기본값: 전체)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="요청 타임아웃(초)")
+    parser.add_argument("--background", action="store_true", help="캐시 프리워밍/알림 엔진 백그라운드 작업 활성화")
+    parser.add_argument("--output", default=None, help="결과 JSON 파일 경로 (기본값: 표준 출력)")
+    parser.add_argument("--log-level", default="WARNING", help="앱 로그 레벨")
+    parser.add_argument("--blocking-threshold-ms", type=float, default=None,
+                        help="이벤트 루프 블로킹 탐지 기준 (지정 시 탐지기 활성화, 기준 목록에 없는 호출 위치가 있으면 실패)")
+    parser.add_argument("--blocking-baseline", default=BLOCKING_BASELINE_PATH, help="알려진 블로킹 호출 위치 목록 파일")
+    parser.add_argument("--update-blocking-baseline", action="store_true",
+                        help="이번 실행에서 탐지된 블로킹 호출 위치로 기준 목록 파일을 다시 씀")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+
+    stub = StubBackend(latency_ms=args.latency_ms, jitter_ms=args.jitter_ms, etags=not args.no_etags,
+                       compression=not args.no_compression)
+    stub_server = ServerThread(stub.app, free_port())
+    stub_server.start()
+
+    # 앱 모듈은 import 시점에 환경 변수를 읽으므로 import 전에 설정
+    os.environ["MEDEASY_API_URL"] = stub_server.url
+    os.environ["MATCHING_BACKEND"] = "local"
+    os.environ["LOCAL_MATCHING_LATENCY_MS"] = str(args.llm_latency_ms)
+    os.environ.setdefault("TOKEN_SECRET_KEY", DEFAULT_TOKEN_SECRET_KEY)
+    if not args.background:
+        # 백그라운드 업스트림 호출이 도구별 호출 수 집계에 섞이지 않도록 기본 비활성화
+        os.environ["CACHE_WARMING_ENABLED"] = "false"
+        os.environ["REMINDER_ENABLED"] = "false"
+    if args.blocking_threshold_ms is not None:
+        os.environ["BLOCKING_DETECTOR_ENABLED"] = "true"
+        os.environ["BLOCKING_DETECTOR_THRESHOLD_MS"] = str(args.blocking_threshold_ms)
+
+    import fakeredis
+
+    import main as app_main
+    from llm import matching_backend
+    from service.admission import admission_controller
+    from service.blocking_detector import blocking_detector
+    from service.call_accounting import call_accounting
+    from service.idempotency import idempotency_store
+    from service.upstream_cache import upstream_cache
+    from voice import voice_setting_repo
+
+    logging.getLogger().setLevel(args.log_level)
+    fake_redis = fakeredis.FakeRedis(decode_responses=True)
+    voice_setting_repo.redis = fake_redis
+    idempotency_store.redis = fake_redis
+
+    app_server = ServerThread(app_main.app, free_port())
+    app_server.start()
+    try:
+        tokens = make_tokens(args.users, os.environ["TOKEN_SECRET_KEY"])
+        report = asyncio.run(run_benchmark(args, app_server.url, app_main.app, stub, matching_backend, tokens))
+    finally:
+        app_server.stop()
+        stub_server.stop()
+
+    report["upstream_cache"] = upstream_cache.stats()
+    report["call_accounting"] = call_accounting.stats()
+    if admission_controller is not None:
+        # 부하가 높으면 조회성 도구가 503 으로 거절되어 오류로 집계될 수 있음 (shed 항목 확인)
+        report["admission"] = admission_controller.stats()
+    new_offenders = []
+    if blocking_detector is not None:
+        report["blocking"] = blocking_detector.stats()
+        new_offenders = check_blocking_baseline(report["blocking"]["offenders"], args.blocking_baseline,
+                                                args.update_blocking_baseline)
+        report["blocking"]["new_offenders"] = new_offenders
+    if hasattr(matching_backend, "dispatcher_stats"):
+        report["llm_dispatcher"] = matching_backend.dispatcher_stats()
+    report["config"] = {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "warmup": args.warmup,
+        "users": args.users,
+        "stub_latency_ms": args.latency_ms,
+        "stub_jitter_ms": args.jitter_ms,
+        "stub_etags": not args.no_etags,
+        "stub_compression": not args.no_compression,
+        "llm_latency_ms": args.llm_latency_ms,
+        "background": args.background,
+        "python": platform.python_version(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+    }
+
+    output = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(output)
+    else:
+        print(output)
+
+    violations = call_accounting.violations()
+    if violations:
+        print(f"호출 예산 초과: {json.dumps(violations, ensure_ascii=False)}", file=sys.stderr)
+    if new_offenders:
+        print(f"새 블로킹 호출 위치: {json.dumps(new_offenders, ensure_ascii=False)}", file=sys.stderr)
+    failed = violations or new_offenders or any(result["errors"] for result in report["operations"].values())
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
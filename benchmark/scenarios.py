@@ -0,0 +1,82 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional
+
+import pytz
+
+kst = pytz.timezone('Asia/Seoul')
+
+MEDICINE_NAMES = ["혈압약", "비타민", "항생제"]
+SCHEDULE_NAMES = ["아침", "점심", "저녁"]
+
+
+@dataclass
+class ToolRequest:
+    """벤치마크에서 보낼 도구(엔드포인트) 요청 하나"""
+    params: Dict[str, Any] = field(default_factory=dict)
+    json: Optional[Dict[str, Any]] = None
+
+
+# operation_id → (jwt_token, 반복 번호) 로 요청을 만드는 함수
+# 같은 사용자라도 반복마다 입력을 바꿔 캐시/매칭 경로가 한쪽으로 치우치지 않게 합니다.
+Scenario = Callable[[str, int], ToolRequest]
+
+
+def _today() -> str:
+    return datetime.now(kst).date().isoformat()
+
+
+def _pick(values, iteration: int):
+    return values[iteration % len(values)]
+
+
+SCENARIOS: Dict[str, Scenario] = {
+    "get_medicine_routine_list_by_date_detailed": lambda token, i: ToolRequest(params={
+        "jwt_token": token,
+        "start_date": (datetime.now(kst).date() - timedelta(days=i % 7)).isoformat(),
+        "end_date": _today(),
+    }),
+    "get_medication_adherence_summary": lambda token, i: ToolRequest(params={
+        "jwt_token": token,
+        "start_date": (datetime.now(kst).date() - timedelta(days=30 + i % 7)).isoformat(),
+        "end_date": _today(),
+    }),
+    "drug_routine_completed_check": lambda token, i: ToolRequest(params={
+        "jwt_token": token, "medicine_name": _pick(MEDICINE_NAMES, i), "schedule_name": _pick(SCHEDULE_NAMES, i),
+    }),
+    "drug_routines_batch_completed_check": lambda token, i: ToolRequest(params={"jwt_token": token}, json={
+        "items": [{"medicine_name": "혈압약", "schedule_name": "아침"}, {"medicine_name": "비타민", "schedule_name": "아침"}],
+    }),
+    "drug_schedule_all_routines_completed_check": lambda token, i: ToolRequest(params={
+        "jwt_token": token, "is_all_drugs_taken": True, "schedule_name": _pick(SCHEDULE_NAMES, i),
+    }),
+    "create_medicine_routines_batch": lambda token, i: ToolRequest(params={"jwt_token": token}, json={
+        "routines": [
+            {"medicine_name": "타이레놀", "nickname": "진통제", "dose": 1, "total_quantity": 10,
+             "interval_days": 1, "schedule_times": ["아침", "저녁"]},
+            {"medicine_name": _pick(["아모잘탄", "리피토", "글루코파지"], i), "nickname": "혈압약", "dose": 1,
+             "total_quantity": 30, "interval_days": 1, "schedule_times": ["아침"]},
+        ],
+    }),
+    "register_routine_by_prescription": lambda token, i: ToolRequest(params={"jwt_token": token}),
+    "register_routine_by_pills_photo": lambda token, i: ToolRequest(params={"jwt_token": token}),
+    "router_routine_register_node": lambda token, i: ToolRequest(params={"jwt_token": token}),
+    "delete_medication_routine": lambda token, i: ToolRequest(),
+    "search_medicine": lambda token, i: ToolRequest(params={
+        "jwt_token": token, "medicine_name": _pick(["타이레놀", "아스피린", "판콜", "게보린"], i), "size": 3,
+    }),
+    "get_medicine_by_medicine_id": lambda token, i: ToolRequest(params={"jwt_token": token}),
+    "get_current_medications_information": lambda token, i: ToolRequest(params={"jwt_token": token}),
+    "get_daily_briefing": lambda token, i: ToolRequest(params={"jwt_token": token}),
+    "modify_medicine_routine_schedule_time": lambda token, i: ToolRequest(params={
+        "jwt_token": token, "user_schedule_name": _pick(SCHEDULE_NAMES, i), "take_time": f"{7 + i % 3:02d}:30:00",
+    }),
+    "update_user_custom_agent_voice": lambda token, i: ToolRequest(params={
+        "jwt_token": token, "speed": _pick([1, -1], i), "pitch": 0,
+    }),
+}
+
+# 경로 변수 값 (OpenAPI 경로 템플릿 치환용)
+PATH_PARAMS: Dict[str, Dict[str, Any]] = {
+    "get_medicine_by_medicine_id": {"medicine_id": "m1"},
+}
@@ -0,0 +1,149 @@
+import asyncio
+import hashlib
+import json
+import random
+from collections import Counter
+from datetime import date, timedelta
+from typing import Dict, Optional, Tuple
+
+from fastapi import FastAPI, Request, Response
+
+from config.middleware_config import CompressionMiddleware
+
+
+class StubBackend:
+    """
+    벤치마크용 MEDEASY(Spring) API 스텁
+
+    실제 백엔드와 같은 응답 형태({"body": ...})를 돌려주며, 모든 요청에 설정한 지연을 적용하고
+    (메서드, 경로) 별 호출 횟수를 기록합니다.
+    """
+
+    def __init__(self, latency_ms: float = 20.0, jitter_ms: float = 0.0,
+                 path_latency_ms: Optional[Dict[str, float]] = None, etags: bool = True,
+                 compression: bool = True):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.path_latency_ms = path_latency_ms or {}
+        self.etags = etags
+        self.compression = compression
+        self.calls: Counter = Counter()
+        self.not_modified: Counter = Counter()
+        self.app = self._create_app()
+
+    def _conditional(self, request: Request, path: str, payload: dict) -> Response:
+        """ETag를 붙여 응답하고 If-None-Match가 일치하면 304 반환 (etags=False면 검증자 없이 응답)"""
+        body = json.dumps(payload, ensure_ascii=False).encode()
+        if not self.etags:
+            return Response(content=body, media_type="application/json")
+        etag = f'"{hashlib.sha1(body).hexdigest()}"'
+        # 압축 응답은 약한 ETag(W/)로 나가므로 약한 비교
+        if request.headers.get("if-none-match", "").removeprefix("W/") == etag:
+            self.not_modified[path] += 1
+            return Response(status_code=304, headers={"ETag": etag})
+        return Response(content=body, media_type="application/json", headers={"ETag": etag})
+
+    def reset_calls(self) -> None:
+        self.calls.clear()
+        self.not_modified.clear()
+
+    def snapshot(self) -> Dict[Tuple[str, str], int]:
+        return dict(self.calls)
+
+    async def _delay(self, path: str) -> None:
+        latency = self.path_latency_ms.get(path, self.latency_ms)
+        if self.jitter_ms:
+            latency += random.uniform(0, self.jitter_ms)
+        if latency > 0:
+            await asyncio.sleep(latency / 1000)
+
+    def _create_app(self) -> FastAPI:
+        app = FastAPI()
+        if self.compression:
+            # 실제 백엔드처럼 Accept-Encoding에 따라 압축 응답
+            app.add_middleware(CompressionMiddleware)
+
+        @app.middleware("http")
+        async def record_and_delay(request: Request, call_next):
+            # /medicine/medicine_id/{id} 처럼 경로 변수가 있는 요청은 템플릿 경로로 집계
+            route_path = request.url.path
+            if route_path.startswith("/medicine/medicine_id/"):
+                route_path = "/medicine/medicine_id/{medicine_id}"
+            self.calls[(request.method, route_path)] += 1
+            await self._delay(route_path)
+            return await call_next(request)
+
+        @app.get("/routine")
+        async def get_routine(request: Request, start_date: date, end_date: date):
+            days = []
+            current = start_date
+            while current <= end_date:
+                days.append(_routine_day(current))
+                current += timedelta(days=1)
+            return self._conditional(request, "/routine", {"body": days})
+
+        @app.post("/routine")
+        async def create_routine(request: Request):
+            return {"body": await request.json()}
+
+        @app.patch("/routine/check")
+        async def check_routine(routine_id: int, is_taken: bool):
+            return {"body": {"routine_id": routine_id, "is_taken": is_taken}}
+
+        @app.patch("/routine/check/schedule")
+        async def check_schedule(schedule_id: int, start_date: date, end_date: date):
+            return {"body": {"schedule_id": schedule_id}}
+
+        @app.get("/user/schedule")
+        async def get_user_schedule(request: Request):
+            return self._conditional(request, "/user/schedule", {"body": [
+                {"user_schedule_id": 1, "name": "아침", "take_time": "08:00:00"},
+                {"user_schedule_id": 2, "name": "점심", "take_time": "12:30:00"},
+                {"user_schedule_id": 3, "name": "저녁", "take_time": "19:00:00"},
+                {"user_schedule_id": 4, "name": "자기 전", "take_time": "22:00:00"},
+            ]})
+
+        @app.patch("/user/schedule/update")
+        async def update_user_schedule(request: Request):
+            return {"body": await request.json()}
+
+        @app.get("/medicine/search")
+        async def search_medicine(name: str, size: int = 1):
+            return {"body": [
+                {"id": f"{name}-{index}", "item_name": f"{name} {index}정", "entp_name": "메디이지제약"}
+                for index in range(max(size, 1))
+            ]}
+
+        @app.get("/medicine/medicine_id/{medicine_id}")
+        async def get_medicine(medicine_id: str):
+            return {"body": {"id": medicine_id, "item_name": medicine_id, "entp_name": "메디이지제약"}}
+
+        @app.get("/user/medicines/current")
+        async def get_current_medicines():
+            return {"body": [
+                {"medicine_id": "m1", "item_name": "혈압약", "dose": 1},
+                {"medicine_id": "m2", "item_name": "비타민", "dose": 1},
+                {"medicine_id": "m3", "item_name": "항생제", "dose": 2},
+            ]}
+
+        return app
+
+
+def _routine_day(take_date: date) -> dict:
+    """날짜 하나의 루틴 데이터 (아침 2종, 점심 1종, 저녁 1종)"""
+    day = take_date.toordinal()
+    return {
+        "take_date": take_date.isoformat(),
+        "user_schedule_dtos": [
+            {"user_schedule_id": 1, "name": "아침", "take_time": "08:00:00", "routine_dtos": [
+                {"routine_id": day * 10 + 1, "medicine_id": "m1", "nickname": "혈압약", "dose": 1, "is_taken": False},
+                {"routine_id": day * 10 + 2, "medicine_id": "m2", "nickname": "비타민", "dose": 1, "is_taken": False},
+            ]},
+            {"user_schedule_id": 2, "name": "점심", "take_time": "12:30:00", "routine_dtos": [
+                {"routine_id": day * 10 + 3, "medicine_id": "m3", "nickname": "항생제", "dose": 2, "is_taken": False},
+            ]},
+            {"user_schedule_id": 3, "name": "저녁", "take_time": "19:00:00", "routine_dtos": [
+                {"routine_id": day * 10 + 4, "medicine_id": "m1", "nickname": "혈압약", "dose": 1, "is_taken": False},
+            ]},
+        ],
+    }
@@ -0,0 +1 @@
+from cache.ttl_cache import TTLCache
@@ -0,0 +1,189 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import date
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# 크기 제한을 넘었을 때 한 번에 삭제하는 행 비율 (매 저장마다 조금씩 지우지 않도록)
+EVICT_BATCH_RATIO = 0.1
+# 오래 조회되지 않은 행 정리 주기(초)
+PRUNE_INTERVAL_SECONDS = 3600
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS routine_days (
+    user_key TEXT NOT NULL,
+    day INTEGER NOT NULL,      -- date.toordinal()
+    data BLOB,                 -- zlib(압축 JSON), 그날 루틴이 없으면 NULL
+    accessed INTEGER NOT NULL, -- 마지막 조회일 (유닉스 시간 // 86400)
+    PRIMARY KEY (user_key, day)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS routine_days_accessed ON routine_days (accessed);
+"""
+
+
+def encode_day(day_data: Dict[str, Any]) -> bytes:
+    """날짜 하나의 루틴 데이터를 압축 (take_date 는 키에 있으므로 제외)"""
+    payload = {key: value for key, value in day_data.items() if key != "take_date"}
+    return zlib.compress(json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode())
+
+
+def decode_day(day: date, data: bytes) -> Dict[str, Any]:
+    return {"take_date": day.isoformat(), **json.loads(zlib.decompress(data))}
+
+
+def _today_index() -> int:
+    return int(time.time() // 86400)
+
+
+class RoutineHistoryStore:
+    """
+    지난 날짜(더 이상 바뀌지 않는 날)의 /routine 응답을 사용자별로 보관하는 로컬 SQLite(WAL) 저장소
+
+    - 날짜 하나가 한 행이며, 백엔드가 그날 데이터를 주지 않았으면 빈 날(NULL)로 기록하여 다시 조회하지 않습니다.
+    - 사용된 크기가 max_bytes를 넘으면 가장 오래 조회되지 않은 행부터 삭제하고(LRU),
+      idle_days 동안 조회되지 않은 행은 주기적으로 정리합니다.
+    생성 시에는 파일을 열지 않으며 open() 이후 사용할 수 있습니다 (앱 lifespan 에서 열고 닫음).
+    모든 메서드는 동기 I/O 이므로 이벤트 루프 밖(스레드)에서 호출해야 합니다.
+    """
+
+    def __init__(self, path: str, max_bytes: int, idle_days: int = 90):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.idle_days = idle_days
+        self._lock = threading.Lock()
+        self._last_prune = 0.0
+        self._counters = {"days_served": 0, "days_stored": 0, "evicted": 0, "pruned": 0}
+        self._conn: Optional[sqlite3.Connection] = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._conn is not None
+
+    def open(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                return
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+            # auto_vacuum 은 테이블을 만들기 전에 설정해야 적용됨 (삭제 후 파일 크기를 줄이기 위해)
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        logger.info(f"✅ routine history store opened ({self.path}, {self.used_bytes() // 1024}KB)")
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def get_days(self, user_key: str, start: date, end: date) -> Dict[date, Optional[Dict[str, Any]]]:
+        """
+        기간 중 저장된 날짜 반환 (날짜 → 루틴 데이터, 빈 날은 None)
+
+        저장되지 않은 날짜는 결과에 포함되지 않습니다 (저장소가 닫혀 있으면 빈 결과).
+        """
+        today = _today_index()
+        with self._lock:
+            if self._conn is None:
+                return {}
+            rows = self._conn.execute(
+                "SELECT day, data, accessed FROM routine_days WHERE user_key = ? AND day BETWEEN ? AND ?",
+                (user_key, start.toordinal(), end.toordinal()),
+            ).fetchall()
+            if any(accessed < today for _, _, accessed in rows):
+                # 하루 한 번만 조회 시각 갱신 (조회마다 쓰기가 생기지 않도록)
+                self._conn.execute(
+                    "UPDATE routine_days SET accessed = ? WHERE user_key = ? AND day BETWEEN ? AND ? AND accessed < ?",
+                    (today, user_key, start.toordinal(), end.toordinal(), today),
+                )
+            self._counters["days_served"] += len(rows)
+
+        result = {}
+        for ordinal, data, _ in rows:
+            day = date.fromordinal(ordinal)
+            result[day] = decode_day(day, data) if data is not None else None
+        return result
+
+    def put_days(self, user_key: str, start: date, end: date, days: List[Dict[str, Any]]) -> None:
+        """백엔드에서 조회한 기간 전체 저장 (응답에 없는 날짜는 빈 날로 기록, 저장소가 닫혀 있으면 무시)"""
+        by_day: Dict[int, Optional[bytes]] = {ordinal: None for ordinal in range(start.toordinal(), end.toordinal() + 1)}
+        for day_data in days:
+            try:
+                ordinal = date.fromisoformat(day_data["take_date"]).toordinal()
+            except (KeyError, TypeError, ValueError):
+                continue
+            if ordinal in by_day:
+                by_day[ordinal] = encode_day(day_data)
+
+        today = _today_index()
+        with self._lock:
+            if self._conn is None:
+                return
+            self._conn.execute("BEGIN")
+            try:
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO routine_days (user_key, day, data, accessed) VALUES (?, ?, ?, ?)",
+                    [(user_key, ordinal, data, today) for ordinal, data in by_day.items()],
+                )
+                self._conn.execute("COMMIT")
+            except Exception:
+                self._conn.execute("ROLLBACK")
+                raise
+            self._counters["days_stored"] += len(by_day)
+            self._enforce_limits()
+
+    def used_bytes(self) -> int:
+        page_size, = self._conn.execute("PRAGMA page_size").fetchone()
+        page_count, = self._conn.execute("PRAGMA page_count").fetchone()
+        free_pages, = self._conn.execute("PRAGMA freelist_count").fetchone()
+        return (page_count - free_pages) * page_size
+
+    def _enforce_limits(self) -> None:
+        deleted = 0
+        if time.monotonic() - self._last_prune >= PRUNE_INTERVAL_SECONDS:
+            self._last_prune = time.monotonic()
+            pruned = self._conn.execute("DELETE FROM routine_days WHERE accessed < ?",
+                                        (_today_index() - self.idle_days,)).rowcount
+            self._counters["pruned"] += pruned
+            deleted += pruned
+
+        while self.used_bytes() > self.max_bytes:
+            rows, = self._conn.execute("SELECT COUNT(*) FROM routine_days").fetchone()
+            if not rows:
+                break
+            evicted = self._conn.execute(
+                "DELETE FROM routine_days WHERE (user_key, day) IN "
+                "(SELECT user_key, day FROM routine_days ORDER BY accessed, day LIMIT ?)",
+                (max(1, int(rows * EVICT_BATCH_RATIO)),),
+            ).rowcount
+            self._counters["evicted"] += evicted
+            deleted += evicted
+
+        if deleted:
+            self._conn.execute("PRAGMA incremental_vacuum")
+            logger.info(f"복약 기록 저장소 정리: {deleted}행 삭제, 사용 {self.used_bytes() // 1024}KB")
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            if self._conn is None:
+                return {**self._counters, "open": False, "max_bytes": self.max_bytes}
+            rows, users = self._conn.execute("SELECT COUNT(*), COUNT(DISTINCT user_key) FROM routine_days").fetchone()
+            return {
+                **self._counters,
+                "rows": rows,
+                "users": users,
+                "open": True,
+                "used_bytes": self.used_bytes(),
+                "max_bytes": self.max_bytes,
+            }
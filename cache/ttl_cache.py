@@ -0,0 +1,75 @@
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+
+class TTLCache:
+    """
+    만료 시간(TTL)과 최대 크기(LRU)를 가진 인메모리 캐시
+
+    이벤트 루프 단일 스레드에서 사용하는 것을 전제로 하므로 별도 락을 두지 않습니다.
+    """
+
+    def __init__(self, max_size: int = 1024, default_ttl: float = 300):
+        self.max_size = max_size
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """캐시 조회 (없거나 만료된 경우 None)"""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """캐시 저장 (최대 크기 초과 시 가장 오래 사용되지 않은 항목 제거)"""
+        expires_at = time.monotonic() + (self.default_ttl if ttl is None else ttl)
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def delete(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+
+    def delete_matching(self, predicate: Callable[[Hashable], bool]) -> int:
+        """조건에 맞는 키를 모두 삭제하고 삭제된 개수 반환"""
+        keys = [key for key in self._entries if predicate(key)]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+    def items_matching(self, predicate: Callable[[Hashable], bool]) -> List[Tuple[Hashable, Any]]:
+        """조건에 맞는 만료되지 않은 항목 목록 (조회 통계/LRU 순서에는 영향 없음)"""
+        now = time.monotonic()
+        return [(key, value) for key, (expires_at, value) in self._entries.items()
+                if expires_at >= now and predicate(key)]
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
@@ -0,0 +1,241 @@
+import hashlib
+import json
+import logging
+import os
+import time
+import uuid
+from importlib.metadata import PackageNotFoundError, version
+from typing import Any, Dict, List, Optional, Tuple
+
+import mcp.types as types
+from dotenv import load_dotenv
+from fastapi.openapi.utils import get_openapi
+from fastapi_mcp import FastApiMCP
+from fastapi_mcp.openapi.convert import convert_openapi_to_mcp_tools
+from fastapi_mcp.server import LowlevelMCPServer
+from fastapi_mcp.types import HTTPRequestInfo
+
+from config.mcp_manifest import manifest_size, slim_tools
+from config.storage_config import data_path
+from service.idempotency import IDEMPOTENCY_KEY_HEADER
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# 생성한 MCP 도구 정의(매니페스트) 디스크 캐시, 빈 값이면 비활성화
+# 상대 경로는 DATA_DIR 기준 (실행 위치와 무관)
+MCP_MANIFEST_CACHE_DIR = os.getenv("MCP_MANIFEST_CACHE_DIR", "mcp_manifest")
+MCP_MANIFEST_CACHE_DIR = data_path(MCP_MANIFEST_CACHE_DIR) if MCP_MANIFEST_CACHE_DIR else ""
+MCP_MANIFEST_CACHE_KEEP = int(os.getenv("MCP_MANIFEST_CACHE_KEEP", "5"))  # 보관할 최근 매니페스트 파일 수
+# 디버그용: true 면 응답 스키마까지 모두 담은 원본 도구 목록을 그대로 노출 (기본은 축약한 목록)
+MCP_FULL_MANIFEST = os.getenv("MCP_FULL_MANIFEST", "false").lower() == "true"
+MCP_TOOL_DESCRIPTION_MAX_CHARS = int(os.getenv("MCP_TOOL_DESCRIPTION_MAX_CHARS", "300"))  # 축약 시 도구 설명 최대 길이
+MCP_TOKEN_ENCODING = os.getenv("MCP_TOKEN_ENCODING", "o200k_base")  # 매니페스트 토큰 수 계산용 tiktoken 인코딩
+# 캐시 파일 형식이 바뀌면 올려서 기존 캐시를 무효화
+MANIFEST_FORMAT_VERSION = 1
+# 같은 도구를 같은 인자로 이 시간(초) 구간 안에 다시 호출하면 재시도로 보고 이전 결과 반환, 0 이면 자동 멱등성 키 비활성화
+MCP_RETRY_WINDOW_SECONDS = int(os.getenv("MCP_RETRY_WINDOW_SECONDS", "30"))
+
+try:
+    FASTAPI_MCP_VERSION = version("fastapi-mcp")
+except PackageNotFoundError:
+    FASTAPI_MCP_VERSION = "unknown"
+
+
+def mcp_idempotency_key(method: str, path: str, query: Dict[str, Any], body: Optional[Any],
+                        now: Optional[float] = None) -> Optional[str]:
+    """
+    도구 실행 요청(메서드, 경로, 쿼리, 본문 = 도구 이름과 인자)과 시간 구간으로 멱등성 키 생성
+
+    에이전트가 타임아웃 후 재시도하면 JSON-RPC id 는 바뀌지만 도구와 인자는 그대로이므로 같은 키가 만들어집니다.
+    사용자는 쿼리의 JWT 토큰으로 구분됩니다 (멱등성 저장소 키에 사용자 키 포함).
+    시간 구간 경계를 넘긴 재시도는 흡수하지 못하며, 구간 안에서 같은 인자로 일부러 다시 호출해도 이전 결과가 반환됩니다.
+    """
+    if MCP_RETRY_WINDOW_SECONDS <= 0:
+        return None
+    window = int((time.time() if now is None else now) // MCP_RETRY_WINDOW_SECONDS)
+    request = json.dumps([method.upper(), path, query, body, window], sort_keys=True, ensure_ascii=False, default=str)
+    return f"mcp-{hashlib.sha256(request.encode()).hexdigest()[:32]}"
+
+
+class MedeasyFastApiMCP(FastApiMCP):
+    """
+    도구 실행 HTTP 호출에 도구 이름과 인자로 만든 멱등성 키(Idempotency-Key)를 함께 전달하는 FastApiMCP
+
+    OpenAPI 문서에서 만든 도구 정의는 (OpenAPI 문서, fastapi-mcp 버전, 변환 옵션) 해시를 키로 디스크에 캐시해
+    같은 API로 다시 시작할 때는 스키마 변환 없이 바로 불러옵니다.
+
+    에이전트는 매 턴 도구 목록을 다시 읽으므로 기본으로는 응답 스키마를 빼고 입력 스키마를 줄인 목록(self.tools)을
+    노출하고, 원본 목록은 self.full_tools 에 보관합니다 (MCP_FULL_MANIFEST=true 면 원본을 노출).
+    """
+
+    def setup_server(self) -> None:
+        timings: Dict[str, Any] = {}
+        started = time.perf_counter()
+        openapi_schema = get_openapi(
+            title=self.fastapi.title,
+            version=self.fastapi.version,
+            openapi_version=self.fastapi.openapi_version,
+            description=self.fastapi.description,
+            routes=self.fastapi.routes,
+        )
+        timings["openapi_ms"] = _elapsed_ms(started)
+
+        started = time.perf_counter()
+        cache_key = self._manifest_cache_key(openapi_schema)
+        timings["hash_ms"] = _elapsed_ms(started)
+
+        started = time.perf_counter()
+        manifest = self._load_manifest(cache_key)
+        if manifest is not None:
+            self.full_tools, self.operation_map = manifest
+            timings["manifest_cache"] = "hit"
+            timings["load_ms"] = _elapsed_ms(started)
+        else:
+            all_tools, self.operation_map = convert_openapi_to_mcp_tools(
+                openapi_schema,
+                describe_all_responses=self._describe_all_responses,
+                describe_full_response_schema=self._describe_full_response_schema,
+            )
+            self.full_tools = self._filter_tools(all_tools, openapi_schema)
+            timings["manifest_cache"] = "miss" if MCP_MANIFEST_CACHE_DIR else "disabled"
+            timings["convert_ms"] = _elapsed_ms(started)
+
+            started = time.perf_counter()
+            self._save_manifest(cache_key)
+            timings["save_ms"] = _elapsed_ms(started)
+
+        started = time.perf_counter()
+        self.slim_tools = slim_tools(self.full_tools, MCP_TOOL_DESCRIPTION_MAX_CHARS)
+        self.tools = self.full_tools if MCP_FULL_MANIFEST else self.slim_tools
+        timings["slim_ms"] = _elapsed_ms(started)
+        timings["manifest_mode"] = "full" if MCP_FULL_MANIFEST else "slim"
+
+        started = time.perf_counter()
+        self._register_server()
+        timings["server_ms"] = _elapsed_ms(started)
+
+        timings["tools"] = len(self.tools)
+        timings["cache_key"] = cache_key[:16]
+        self.setup_timings = timings
+
+    def manifest_stats(self) -> Dict[str, Any]:
+        """노출 중인 매니페스트와 원본/축약 매니페스트의 크기(바이트, 토큰) 비교"""
+        full = manifest_size(self.full_tools, MCP_TOKEN_ENCODING)
+        slim = manifest_size(self.slim_tools, MCP_TOKEN_ENCODING)
+        saved = None
+        if full["tokens"] and slim["tokens"] is not None:
+            saved = round(1 - slim["tokens"] / full["tokens"], 4)
+        return {
+            "mode": "full" if MCP_FULL_MANIFEST else "slim",
+            "full": full,
+            "slim": slim,
+            "bytes_saved_ratio": round(1 - slim["bytes"] / full["bytes"], 4) if full["bytes"] else None,
+            "tokens_saved_ratio": saved,
+        }
+
+    def _register_server(self) -> None:
+        """FastApiMCP.setup_server 와 같은 방식으로 도구 목록/실행 핸들러 등록"""
+        mcp_server = LowlevelMCPServer(self.name, self.description)
+
+        @mcp_server.list_tools()
+        async def handle_list_tools() -> List[types.Tool]:
+            return self.tools
+
+        @mcp_server.call_tool()
+        async def handle_call_tool(name: str, arguments: Dict[str, Any],
+                                   http_request_info: Optional[HTTPRequestInfo] = None):
+            return await self._execute_api_tool(
+                client=self._http_client,
+                tool_name=name,
+                arguments=arguments,
+                operation_map=self.operation_map,
+                http_request_info=http_request_info,
+            )
+
+        self.server = mcp_server
+
+    def _manifest_cache_key(self, openapi_schema: Dict[str, Any]) -> str:
+        # 도구 정의에 영향을 주는 입력을 모두 해시에 포함
+        options = {
+            "format": MANIFEST_FORMAT_VERSION,
+            "fastapi_mcp": FASTAPI_MCP_VERSION,
+            "describe_all_responses": self._describe_all_responses,
+            "describe_full_response_schema": self._describe_full_response_schema,
+            "include_operations": self._include_operations,
+            "exclude_operations": self._exclude_operations,
+            "include_tags": self._include_tags,
+            "exclude_tags": self._exclude_tags,
+        }
+        digest = hashlib.sha256()
+        digest.update(json.dumps(options, sort_keys=True).encode())
+        digest.update(json.dumps(openapi_schema, sort_keys=True, ensure_ascii=False, default=str).encode())
+        return digest.hexdigest()
+
+    @staticmethod
+    def _manifest_path(cache_key: str) -> str:
+        return os.path.join(MCP_MANIFEST_CACHE_DIR, f"{cache_key}.json")
+
+    def _load_manifest(self, cache_key: str) -> Optional[Tuple[List[types.Tool], Dict[str, Dict[str, Any]]]]:
+        if not MCP_MANIFEST_CACHE_DIR:
+            return None
+        path = self._manifest_path(cache_key)
+        try:
+            with open(path, "rb") as f:
+                manifest = json.load(f)
+            if manifest.get("key") != cache_key:
+                return None
+            tools = [types.Tool.model_validate(tool) for tool in manifest["tools"]]
+            return tools, manifest["operation_map"]
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            # 손상된 캐시는 무시하고 새로 생성
+            logger.warning(f"MCP 매니페스트 캐시 읽기 실패, 다시 생성합니다 ({path}): {e}")
+            return None
+
+    def _save_manifest(self, cache_key: str) -> None:
+        if not MCP_MANIFEST_CACHE_DIR:
+            return
+        path = self._manifest_path(cache_key)
+        manifest = {
+            "key": cache_key,
+            "fastapi_mcp": FASTAPI_MCP_VERSION,
+            "tools": [tool.model_dump(mode="json", exclude_none=True) for tool in self.full_tools],
+            "operation_map": self.operation_map,
+        }
+        try:
+            os.makedirs(MCP_MANIFEST_CACHE_DIR, exist_ok=True)
+            # 여러 파드가 같은 볼륨을 공유해도 반쯤 쓰인 파일을 읽지 않도록 임시 파일에 쓴 뒤 교체
+            tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(manifest, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+            self._prune_manifests()
+        except OSError as e:
+            # 읽기 전용 파일시스템 등: 캐시 없이 계속 진행
+            logger.warning(f"MCP 매니페스트 캐시 저장 실패 ({path}): {e}")
+
+    @staticmethod
+    def _prune_manifests() -> None:
+        """최근에 쓴 MCP_MANIFEST_CACHE_KEEP 개만 남기고 이전 API 버전의 매니페스트 삭제"""
+        entries = [entry for entry in os.scandir(MCP_MANIFEST_CACHE_DIR)
+                   if entry.is_file() and entry.name.endswith(".json")]
+        entries.sort(key=lambda entry: entry.stat().st_mtime, reverse=True)
+        for entry in entries[MCP_MANIFEST_CACHE_KEEP:]:
+            try:
+                os.remove(entry.path)
+            except OSError:
+                pass
+
+    async def _request(self, client, method: str, path: str, query: Dict[str, Any], headers: Dict[str, str],
+                       body: Optional[Any]) -> Any:
+        if IDEMPOTENCY_KEY_HEADER not in headers:
+            idempotency_key = mcp_idempotency_key(method, path, query, body)
+            if idempotency_key:
+                headers = {**headers, IDEMPOTENCY_KEY_HEADER: idempotency_key}
+        return await super()._request(client, method, path, query, headers, body)
+
+
+def _elapsed_ms(started: float) -> float:
+    return round((time.perf_counter() - started) * 1000, 1)
@@ -0,0 +1,162 @@
+import copy
+import json
+import logging
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+
+import mcp.types as types
+import tiktoken
+
+logger = logging.getLogger(__name__)
+
+# fastapi-mcp가 설명 뒤에 붙이는 응답 스키마 섹션 시작
+RESPONSES_MARKER = "### Responses"
+# 도구 입력 스키마에서 제거하는 키 (모델의 인자 선택에 쓰이지 않는 메타데이터)
+DROPPED_SCHEMA_KEYS = ("title", "example", "examples")
+# 여러 번 등장하는 객체 스키마를 $defs 로 옮길 최소 크기(직렬화 길이), 작은 스키마는 참조가 더 길어짐
+DEDUPE_MIN_CHARS = 120
+
+_SENTENCE_END = re.compile(r"(?<=[.!?다요])\s")
+
+
+def slim_description(description: Optional[str], max_chars: int) -> str:
+    """
+    도구 설명 축약
+
+    - 응답 스키마 섹션(### Responses 이후) 제거
+    - 함수 이름에서 자동 생성된 영문 요약 줄은 한국어 설명이 따로 있으면 제거
+    - 공백을 정리하고 max_chars 를 넘으면 문장 단위로 자름
+    """
+    text = (description or "").split(RESPONSES_MARKER, 1)[0]
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if len(lines) > 1 and lines[0].isascii():
+        lines = lines[1:]
+    text = " ".join(lines)
+    if max_chars <= 0 or len(text) <= max_chars:
+        return text
+
+    cut = text[:max_chars]
+    boundary = max((match.start() for match in _SENTENCE_END.finditer(cut)), default=-1)
+    if boundary >= max_chars // 2:
+        return cut[:boundary].rstrip()
+    return cut.rstrip() + "…"
+
+
+def slim_schema(schema: Any) -> Any:
+    """
+    입력 스키마 축약 (원본은 변경하지 않음)
+
+    - title/example(s) 및 속성 안의 비표준 "required": true 제거
+    - anyOf [X, null] 은 X 로 합침 (필수 여부는 상위 required 목록으로 표현됨)
+    - 값이 null 인 default 제거
+    """
+    if isinstance(schema, list):
+        return [slim_schema(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+
+    result = {}
+    for key, value in schema.items():
+        if key in DROPPED_SCHEMA_KEYS or (key == "default" and value is None):
+            continue
+        if key == "required" and isinstance(value, bool):
+            continue
+        if key in ("properties", "$defs") and isinstance(value, dict):
+            # 속성/정의 이름이 "title" 등이어도 지워지지 않도록 이름 맵은 값만 축약
+            result[key] = {name: slim_schema(prop) for name, prop in value.items()}
+            continue
+        result[key] = slim_schema(value)
+
+    branches = result.get("anyOf")
+    if isinstance(branches, list):
+        non_null = [branch for branch in branches if branch != {"type": "null"}]
+        if len(non_null) == 1 and len(non_null) < len(branches) and isinstance(non_null[0], dict):
+            del result["anyOf"]
+            result = {**result, **non_null[0]}
+    return result
+
+
+def dedupe_definitions(schema: Dict[str, Any]) -> Dict[str, Any]:
+    """같은 객체 스키마가 여러 번 나오면 $defs 로 옮기고 $ref 로 참조"""
+    counts: Dict[str, int] = {}
+
+    def collect(node: Any, is_root: bool) -> None:
+        if isinstance(node, dict):
+            if not is_root and node.get("type") == "object":
+                key = json.dumps(node, sort_keys=True, ensure_ascii=False)
+                if len(key) >= DEDUPE_MIN_CHARS:
+                    counts[key] = counts.get(key, 0) + 1
+            for value in node.values():
+                collect(value, False)
+        elif isinstance(node, list):
+            for item in node:
+                collect(item, False)
+
+    collect(schema, True)
+    repeated = [key for key, count in counts.items() if count > 1]
+    if not repeated:
+        return schema
+
+    names: Dict[str, str] = {}
+    for key in repeated:
+        base = re.sub(r"\W", "", str(json.loads(key).get("title") or "")) or "Def"
+        name, suffix = base, 2
+        while name in names.values():
+            name, suffix = f"{base}{suffix}", suffix + 1
+        names[key] = name
+
+    def replace(node: Any, is_root: bool) -> Any:
+        if isinstance(node, dict):
+            if not is_root and node.get("type") == "object":
+                name = names.get(json.dumps(node, sort_keys=True, ensure_ascii=False))
+                if name:
+                    return {"$ref": f"#/$defs/{name}"}
+            return {key: replace(value, False) for key, value in node.items()}
+        if isinstance(node, list):
+            return [replace(item, False) for item in node]
+        return node
+
+    result = replace(schema, True)
+    result["$defs"] = {name: json.loads(key) for key, name in names.items()}
+    return result
+
+
+def slim_tool(tool: types.Tool, max_description_chars: int) -> types.Tool:
+    slim = tool.model_copy(deep=True)
+    slim.description = slim_description(tool.description, max_description_chars)
+    # 중복 제거를 먼저 해야 title 로 $defs 이름을 붙일 수 있음
+    slim.inputSchema = slim_schema(dedupe_definitions(copy.deepcopy(tool.inputSchema)))
+    return slim
+
+
+def slim_tools(tools: List[types.Tool], max_description_chars: int) -> List[types.Tool]:
+    """에이전트가 매 턴 읽는 도구 목록을 토큰을 적게 쓰는 형태로 변환"""
+    return [slim_tool(tool, max_description_chars) for tool in tools]
+
+
+def manifest_json(tools: List[types.Tool]) -> str:
+    """tools/list 응답에 실리는 형태와 같은 직렬화"""
+    return json.dumps([tool.model_dump(mode="json", exclude_none=True) for tool in tools],
+                      ensure_ascii=False, separators=(",", ":"))
+
+
+@lru_cache(maxsize=4)
+def _encoding(name: str):
+    return tiktoken.get_encoding(name)
+
+
+def manifest_size(tools: List[types.Tool], encoding_name: str) -> Dict[str, Any]:
+    """
+    매니페스트 크기 (바이트, tiktoken 토큰 수)
+
+    인코딩 파일을 내려받을 수 없는 환경에서는 tokens 가 None 입니다.
+    """
+    serialized = manifest_json(tools)
+    size: Dict[str, Any] = {"tools": len(tools), "bytes": len(serialized.encode()), "tokens": None,
+                            "encoding": encoding_name}
+    try:
+        size["tokens"] = len(_encoding(encoding_name).encode(serialized))
+    except Exception as e:
+        logger.warning(f"tiktoken 인코딩({encoding_name})을 불러오지 못해 토큰 수를 계산하지 않습니다: {e}")
+    return size
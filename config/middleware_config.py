@@ -1,8 +1,26 @@
 # middleware/logging.py
+import asyncio
 import logging
+import os
+import random
+import secrets
+import time
+import zlib
+from collections import Counter
+from typing import Optional, Tuple
+
+import zstandard
+from dotenv import load_dotenv
+from starlette.datastructures import Headers, MutableHeaders
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.requests import Request
-from starlette.responses import Response
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Match
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from service.call_accounting import CALL_ACCOUNTING_ENABLED, call_accounting, track_calls
+
+load_dotenv()
 
 logger = logging.getLogger("api")  # setup_logging() 에 "api" 로거도 미리 설정해 두세요.
 
@@ -18,3 +36,382 @@ class LoggingMiddleware(BaseHTTPMiddleware):
         logger.info(f"✅ RESPONSE ← {request.method} {request.url.path}  Status: {response.status_code}")
 
         return response
+
+
+# ---- 요청 단위 CPU 프로파일링 (옵트인) ----
+
+PROFILING_ADMIN_TOKEN = os.getenv("PROFILING_ADMIN_TOKEN")  # X-Profile 헤더 값과 일치하면 해당 요청 프로파일링
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))  # 0~1, 무작위 샘플링 비율
+PROFILING_DIR = os.getenv("PROFILING_DIR", "profiles")
+PROFILING_FORMAT = os.getenv("PROFILING_FORMAT", "speedscope")  # speedscope / html
+PROFILING_INTERVAL = float(os.getenv("PROFILING_INTERVAL", "0.001"))  # 샘플링 간격(초)
+
+# 비활성화 시 미들웨어 자체를 등록하지 않으므로 요청 경로에 추가 비용이 없음
+PROFILING_ENABLED = bool(PROFILING_ADMIN_TOKEN) or PROFILING_SAMPLE_RATE > 0
+
+profiling_logger = logging.getLogger("api.profiling")
+
+
+class ProfilingMiddleware(BaseHTTPMiddleware):
+    """
+    선택된 요청을 샘플링 프로파일러(pyinstrument)로 감싸고 결과를 operation_id 태그가 붙은 파일로 저장
+
+    - 관리자 헤더: X-Profile: <PROFILING_ADMIN_TOKEN>
+    - 샘플링: PROFILING_SAMPLE_RATE 비율의 요청 (MCP 도구 호출처럼 헤더를 붙일 수 없는 경우)
+    """
+
+    def __init__(self, app, admin_token: str = PROFILING_ADMIN_TOKEN, sample_rate: float = PROFILING_SAMPLE_RATE,
+                 output_dir: str = PROFILING_DIR, output_format: str = PROFILING_FORMAT,
+                 interval: float = PROFILING_INTERVAL):
+        super().__init__(app)
+        if output_format not in ("speedscope", "html"):
+            raise ValueError(f"지원하지 않는 프로파일 형식입니다: {output_format}")
+        self.admin_token = admin_token
+        self.sample_rate = sample_rate
+        self.output_dir = output_dir
+        self.output_format = output_format
+        self.interval = interval
+
+    def _should_profile(self, request: Request) -> bool:
+        header = request.headers.get("x-profile")
+        if header and self.admin_token and secrets.compare_digest(header, self.admin_token):
+            return True
+        return self.sample_rate > 0 and random.random() < self.sample_rate
+
+    def _write(self, session, operation_id: str) -> str:
+        if self.output_format == "speedscope":
+            from pyinstrument.renderers import SpeedscopeRenderer
+            renderer, extension = SpeedscopeRenderer(), "speedscope.json"
+        else:
+            from pyinstrument.renderers import HTMLRenderer
+            renderer, extension = HTMLRenderer(), "html"
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        timestamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(session.start_time))
+        filename = f"{operation_id}_{timestamp}_{int(session.duration * 1000)}ms_{secrets.token_hex(3)}.{extension}"
+        path = os.path.join(self.output_dir, filename)
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(renderer.render(session))
+        return path
+
+    async def dispatch(self, request: Request, call_next):
+        if not self._should_profile(request):
+            return await call_next(request)
+
+        from pyinstrument import Profiler
+
+        # async_mode="enabled": await 중인 시간도 호출 지점에 귀속 (대기 vs CPU 구분)
+        profiler = Profiler(interval=self.interval, async_mode="enabled")
+        profiler.start()
+        try:
+            response: Response = await call_next(request)
+        finally:
+            session = profiler.stop()
+
+        # 라우팅 후 FastAPI가 scope에 기록한 라우트로 operation_id 확인
+        route = request.scope.get("route")
+        operation_id = getattr(route, "operation_id", None) or request.url.path.strip("/").replace("/", "_") or "root"
+        try:
+            # 렌더링/파일 쓰기는 이벤트 루프 밖에서 수행
+            path = await asyncio.to_thread(self._write, session, operation_id)
+            response.headers["X-Profile-File"] = os.path.basename(path)
+            profiling_logger.info(f"🔬 프로파일 저장: {path} ({session.duration * 1000:.1f}ms)")
+        except Exception as e:
+            profiling_logger.error(f"프로파일 저장 실패 ({operation_id}): {e}")
+        return response
+
+
+# ---- 도구 호출당 외부 호출 수 집계 ----
+
+class CallAccountingMiddleware:
+    """
+    요청마다 업스트림 HTTP / LLM / Redis 호출 수를 집계해 operation_id 별 통계와 호출 예산 초과를 기록
+
+    MCP 도구 호출은 도구마다 별도 HTTP 요청으로 들어오므로 요청 단위 집계가 곧 도구 호출 단위 집계입니다.
+    OpenAPI 스키마에 포함된 라우트(= MCP 도구)만 기록합니다.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with track_calls() as counts:
+            try:
+                await self.app(scope, receive, send)
+            finally:
+                # 라우팅 후 FastAPI가 scope에 기록한 라우트로 operation_id 확인
+                route = scope.get("route")
+                operation_id = getattr(route, "operation_id", None)
+                if operation_id and getattr(route, "include_in_schema", False):
+                    call_accounting.record(operation_id, counts)
+
+
+# ---- 이벤트 루프 지연 기반 수락 제어 (부하 분산) ----
+
+class AdmissionControlMiddleware:
+    """
+    과부하 시 우선순위가 낮은 도구 호출을 라우팅 전에 503 + Retry-After 로 거절
+
+    OpenAPI 스키마에 포함된 라우트(= MCP 도구)만 판단하고, 헬스 체크/내부 엔드포인트/MCP 전송 경로는 항상 통과합니다.
+    """
+
+    def __init__(self, app: ASGIApp, controller):
+        self.app = app
+        self.controller = controller  # service.admission.AdmissionController
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        operation_id = self._operation_id(scope) if scope["type"] == "http" else None
+        if operation_id is None:
+            await self.app(scope, receive, send)
+            return
+
+        admitted, retry_after = self.controller.admit(operation_id)
+        if not admitted:
+            response = JSONResponse(
+                {"detail": "서버가 혼잡하여 요청을 처리할 수 없습니다. 잠시 후 다시 시도해주세요."},
+                status_code=503,
+                headers={"Retry-After": str(retry_after)},
+            )
+            await response(scope, receive, send)
+            return
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.controller.release()
+
+    @staticmethod
+    def _operation_id(scope: Scope) -> Optional[str]:
+        # 라우팅 전이므로 FastAPI 라우트 목록에서 직접 찾음 (scope["app"] 은 Starlette가 설정)
+        app = scope.get("app")
+        for route in getattr(getattr(app, "router", None), "routes", ()):
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                if getattr(route, "include_in_schema", False):
+                    return getattr(route, "operation_id", None)
+                return None
+        return None
+
+
+# ---- 응답 압축 (zstd / gzip) ----
+
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))  # 이보다 작은 단일 응답은 압축하지 않음(바이트)
+# 지연시간 우선: zstd 3 / gzip 5 (압축률 차이는 작고 CPU 시간은 크게 줄어듦)
+COMPRESSION_ZSTD_LEVEL = int(os.getenv("COMPRESSION_ZSTD_LEVEL", "3"))
+COMPRESSION_GZIP_LEVEL = int(os.getenv("COMPRESSION_GZIP_LEVEL", "5"))
+
+# SSE(MCP 스트림)는 이벤트 단위 전송이 중요하고, 오디오/이미지는 이미 압축된 형식이라 제외
+COMPRESSION_EXCLUDED_MEDIA_TYPES = ("text/event-stream", "audio/", "image/", "video/")
+
+# 서버 선호 순서 (클라이언트 q 값이 같으면 앞쪽 우선)
+SUPPORTED_ENCODINGS = ("zstd", "gzip")
+
+compression_stats = Counter()
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Accept-Encoding 헤더에서 사용할 인코딩 선택 (q 값이 가장 높은 것, q=0은 거부, 없으면 None)"""
+    accepted = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.partition(";")
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        quality = 1.0
+        params = params.strip().lower()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding] = quality
+
+    best, best_quality = None, 0.0
+    for coding in SUPPORTED_ENCODINGS:
+        quality = accepted.get(coding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = coding, quality
+    return best
+
+
+class _StreamEncoder:
+    """zstd/gzip 스트리밍 압축기 (청크마다 flush하여 스트리밍 응답도 바로 전달)"""
+
+    def __init__(self, encoding: str, zstd_level: int, gzip_level: int):
+        if encoding == "zstd":
+            self._compressor = zstandard.ZstdCompressor(level=zstd_level).compressobj()
+            self._flush_mode = zstandard.COMPRESSOBJ_FLUSH_BLOCK
+            self._finish_mode = zstandard.COMPRESSOBJ_FLUSH_FINISH
+        else:
+            # wbits=31: gzip 헤더/트레일러 포함
+            self._compressor = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+            self._flush_mode = zlib.Z_SYNC_FLUSH
+            self._finish_mode = zlib.Z_FINISH
+
+    def encode(self, data: bytes, final: bool) -> bytes:
+        out = self._compressor.compress(data) if data else b""
+        return out + self._compressor.flush(self._finish_mode if final else self._flush_mode)
+
+
+def _compress_body(encoding: str, body: bytes, zstd_level: int, gzip_level: int) -> bytes:
+    if encoding == "zstd":
+        # 단일 응답은 프레임 헤더에 원본 크기를 기록하는 one-shot 압축 사용
+        return zstandard.ZstdCompressor(level=zstd_level).compress(body)
+    return _StreamEncoder(encoding, zstd_level, gzip_level).encode(body, final=True)
+
+
+class CompressionMiddleware:
+    """
+    Accept-Encoding 협상에 따라 응답을 zstd 또는 gzip으로 압축하는 ASGI 미들웨어
+
+    - 단일 응답: minimum_size 이상이고 압축 결과가 더 작을 때만 압축 (Content-Length 재계산)
+    - 스트리밍 응답: 크기를 미리 알 수 없으므로 청크마다 압축 후 flush하여 그대로 흘려보냄
+    - 이미 Content-Encoding이 있거나, Cache-Control: no-transform 이거나, 제외 미디어 타입이면 그대로 전달
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE,
+                 zstd_level: int = COMPRESSION_ZSTD_LEVEL, gzip_level: int = COMPRESSION_GZIP_LEVEL,
+                 excluded_media_types: Tuple[str, ...] = COMPRESSION_EXCLUDED_MEDIA_TYPES):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.zstd_level = zstd_level
+        self.gzip_level = gzip_level
+        self.excluded_media_types = excluded_media_types
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = negotiate_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        responder = _CompressionResponder(self, encoding, send)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressionResponder:
+    """
+    요청 하나의 응답 메시지를 가로채 압축 여부를 결정하고 변환
+
+    BaseHTTPMiddleware를 거친 응답은 항상 여러 청크로 오므로, minimum_size에 도달하거나 본문이 끝날 때까지
+    모아 본 뒤 단일 압축 / 스트리밍 압축 / 원본 전달을 결정합니다.
+    """
+
+    def __init__(self, middleware: CompressionMiddleware, encoding: str, send: Send):
+        self.middleware = middleware
+        self.encoding = encoding
+        self._send = send
+        self._start: Optional[Message] = None
+        self._buffer = []
+        self._buffered = 0
+        self._encoder: Optional[_StreamEncoder] = None
+        self._passthrough = False
+
+    def _compressible(self, headers: Headers) -> bool:
+        if "content-encoding" in headers:
+            return False
+        if "no-transform" in headers.get("cache-control", "").lower():
+            return False
+        return not headers.get("content-type", "").startswith(self.middleware.excluded_media_types)
+
+    def _set_encoding_headers(self, headers: MutableHeaders) -> None:
+        headers["Content-Encoding"] = self.encoding
+        headers.add_vary_header("Accept-Encoding")
+        # 표현(바이트)이 달라지므로 강한 ETag는 약한 ETag로 변경
+        etag = headers.get("etag")
+        if etag and not etag.startswith("W/"):
+            headers["ETag"] = f"W/{etag}"
+
+    async def send(self, message: Message) -> None:
+        message_type = message["type"]
+        if message_type == "http.response.start":
+            # 본문을 보고 헤더를 결정해야 하므로 보류
+            self._start = message
+            return
+
+        if message_type != "http.response.body" or self._passthrough:
+            await self._flush_start()
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self._encoder is not None:
+            await self._send_stream_chunk(body, more_body)
+            return
+
+        if not self._buffer and not self._compressible(Headers(raw=self._start["headers"])):
+            self._passthrough = True
+            compression_stats["identity"] += 1
+            await self._flush_start()
+            await self._send(message)
+            return
+
+        self._buffer.append(body)
+        self._buffered += len(body)
+        if more_body and self._buffered < self.middleware.minimum_size:
+            return
+
+        body = b"".join(self._buffer)
+        self._buffer = []
+        if more_body:
+            await self._start_stream(body)
+        else:
+            await self._send_whole(body)
+
+    async def _send_whole(self, body: bytes) -> None:
+        """본문 전체를 한 번에 압축 (작거나 압축 효과가 없으면 원본 그대로)"""
+        middleware = self.middleware
+        start, self._start = self._start, None
+        compressed = None
+        if len(body) >= middleware.minimum_size:
+            compressed = _compress_body(self.encoding, body, middleware.zstd_level, middleware.gzip_level)
+
+        if compressed is None or len(compressed) >= len(body):
+            compression_stats["identity"] += 1
+            await self._send(start)
+            await self._send({"type": "http.response.body", "body": body})
+            return
+
+        headers = MutableHeaders(raw=start["headers"])
+        self._set_encoding_headers(headers)
+        headers["Content-Length"] = str(len(compressed))
+        compression_stats[self.encoding] += 1
+        compression_stats["bytes_in"] += len(body)
+        compression_stats["bytes_out"] += len(compressed)
+        await self._send(start)
+        await self._send({"type": "http.response.body", "body": compressed})
+
+    async def _start_stream(self, head: bytes) -> None:
+        """크기를 알 수 없는 스트리밍 응답: 청크마다 압축 후 flush"""
+        start, self._start = self._start, None
+        headers = MutableHeaders(raw=start["headers"])
+        self._set_encoding_headers(headers)
+        if "content-length" in headers:
+            del headers["Content-Length"]
+        self._encoder = _StreamEncoder(self.encoding, self.middleware.zstd_level, self.middleware.gzip_level)
+        compression_stats[self.encoding] += 1
+        compression_stats["streamed"] += 1
+        await self._send(start)
+        await self._send_stream_chunk(head, more_body=True)
+
+    async def _send_stream_chunk(self, body: bytes, more_body: bool) -> None:
+        chunk = self._encoder.encode(body, final=not more_body)
+        compression_stats["bytes_in"] += len(body)
+        compression_stats["bytes_out"] += len(chunk)
+        if chunk or not more_body:
+            await self._send({"type": "http.response.body", "body": chunk, "more_body": more_body})
+
+    async def _flush_start(self) -> None:
+        if self._start is not None:
+            start, self._start = self._start, None
+            await self._send(start)
@@ -0,0 +1,39 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """
+    서버 시작 단계별 소요 시간 기록 (모듈 import, MCP 도구 생성, 마운트, lifespan 등)
+
+    스케일 아웃 시 파드가 준비되기까지 어느 단계가 오래 걸리는지 확인하기 위한 용도입니다.
+    """
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}  # 단계 이름 → 소요 시간(ms), 기록 순서 유지
+        self.details: Dict[str, Any] = {}
+
+    def record(self, name: str, elapsed_ms: float) -> None:
+        self.phases[name] = round(elapsed_ms, 1)
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, (time.perf_counter() - started) * 1000)
+
+    def log_summary(self, title: str) -> None:
+        phases = ", ".join(f"{name}={elapsed:.1f}ms" for name, elapsed in self.phases.items())
+        logger.info(f"{title}: 합계 {sum(self.phases.values()):.1f}ms ({phases})")
+
+    def stats(self) -> Dict[str, Any]:
+        return {"phases_ms": dict(self.phases), "total_ms": round(sum(self.phases.values()), 1), **self.details}
+
+
+startup_timer = StartupTimer()
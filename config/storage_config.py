@@ -0,0 +1,14 @@
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 로컬 디스크 캐시/저장소 기본 디렉터리 (상대 경로는 실행 위치가 아닌 프로젝트 루트 기준)
+DATA_DIR = os.path.join(PROJECT_ROOT, os.getenv("DATA_DIR", "cache_data"))
+
+
+def data_path(path: str) -> str:
+    """설정된 경로를 절대 경로로 변환 (상대 경로는 DATA_DIR 기준, 절대 경로는 그대로)"""
+    return os.path.join(DATA_DIR, path)
@@ -0,0 +1,71 @@
+import os
+
+from dotenv import load_dotenv
+
+from llm.dispatcher import (PRIORITY_CHECK, PRIORITY_INFO, PRIORITY_WRITE, DispatchedMatchingBackend,
+                            LLMDispatcher)
+from llm.matching import LLMMatchingBackend, LocalMatchingBackend, MatchingBackend
+from llm.tiered_router import ModelTier, TieredLLMRouter
+
+load_dotenv()
+
+# openai: 티어드 LLM 매칭 / local: 네트워크 없이 동작하는 규칙 기반 매칭 (벤치마크/테스트용)
+MATCHING_BACKEND = os.getenv("MATCHING_BACKEND", "openai")
+LLM_CONFIDENCE_THRESHOLD = float(os.getenv("LLM_CONFIDENCE_THRESHOLD", "0.8"))
+LLM_MAX_REPAIRS = int(os.getenv("LLM_MAX_REPAIRS", "1"))
+LOCAL_MATCHING_LATENCY_MS = float(os.getenv("LOCAL_MATCHING_LATENCY_MS", "0"))  # local 백엔드의 가짜 LLM 지연
+
+# LLM 호출 전역 동시 실행 수 (0이면 디스패처 없이 바로 호출)
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "8"))
+# 우선순위 클래스별 마감 시간(ms): 이 안에 시작/완료하지 못하면 규칙 기반 매칭으로 대체
+LLM_CHECK_DEADLINE_MS = float(os.getenv("LLM_CHECK_DEADLINE_MS", "8000"))
+LLM_WRITE_DEADLINE_MS = float(os.getenv("LLM_WRITE_DEADLINE_MS", "10000"))
+LLM_INFO_DEADLINE_MS = float(os.getenv("LLM_INFO_DEADLINE_MS", "5000"))
+
+
+def create_matching_backend(backend: str) -> MatchingBackend:
+    primary = _create_primary_backend(backend)
+    if LLM_MAX_CONCURRENCY <= 0:
+        return primary
+
+    dispatcher = LLMDispatcher(LLM_MAX_CONCURRENCY, deadlines={
+        PRIORITY_CHECK: LLM_CHECK_DEADLINE_MS / 1000,
+        PRIORITY_WRITE: LLM_WRITE_DEADLINE_MS / 1000,
+        PRIORITY_INFO: LLM_INFO_DEADLINE_MS / 1000,
+    })
+    # 대체 매칭은 "약" 글자/공백을 무시한 이름 비교 (지연 없는 규칙 기반 백엔드)
+    return DispatchedMatchingBackend(primary, LocalMatchingBackend(simulates_llm=False), dispatcher)
+
+
+def _create_primary_backend(backend: str) -> MatchingBackend:
+    if backend == "local":
+        return LocalMatchingBackend(latency=LOCAL_MATCHING_LATENCY_MS / 1000)
+
+    if backend != "openai":
+        raise ValueError(f"지원하지 않는 매칭 백엔드입니다: {backend}")
+
+    from langchain_openai import ChatOpenAI
+
+    # 저렴한 모델부터 순서대로 시도 (비용: 100만 토큰당 USD)
+    tiered_llm = TieredLLMRouter(
+        tiers=[
+            ModelTier(
+                name="gpt-4.1-nano",
+                model=ChatOpenAI(model_name="gpt-4.1-nano", temperature=0),
+                input_cost_per_1m=0.10,
+                output_cost_per_1m=0.40,
+            ),
+            ModelTier(
+                name="gpt-4.1-mini",
+                model=ChatOpenAI(model_name="gpt-4.1-mini", temperature=0),
+                input_cost_per_1m=0.40,
+                output_cost_per_1m=1.60,
+            ),
+        ],
+        confidence_threshold=LLM_CONFIDENCE_THRESHOLD,
+        max_repairs=LLM_MAX_REPAIRS,
+    )
+    return LLMMatchingBackend(tiered_llm)
+
+
+matching_backend = create_matching_backend(MATCHING_BACKEND)
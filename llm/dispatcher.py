@@ -0,0 +1,211 @@
+import asyncio
+import heapq
+import itertools
+import logging
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional, TypeVar
+
+from llm.matching import MatchingBackend
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 우선순위 클래스 (숫자가 작을수록 먼저 실행)
+PRIORITY_CHECK = 0  # 복약 체크: 사용자가 방금 약을 먹었다고 말한 실시간 쓰기
+PRIORITY_WRITE = 1  # 일정 등록/수정 등 나머지 쓰기
+PRIORITY_INFO = 2  # 조회성 요청
+
+PRIORITY_NAMES = {PRIORITY_CHECK: "check", PRIORITY_WRITE: "write", PRIORITY_INFO: "info"}
+
+OPERATION_PRIORITIES = {
+    "drug_routine_completed_check": PRIORITY_CHECK,
+    "drug_routines_batch_completed_check": PRIORITY_CHECK,
+    "drug_schedule_all_routines_completed_check": PRIORITY_CHECK,
+    "create_medicine_routines_batch": PRIORITY_WRITE,
+    "modify_medicine_routine_schedule_time": PRIORITY_WRITE,
+}
+
+
+def operation_priority(operation_id: str) -> int:
+    return OPERATION_PRIORITIES.get(operation_id, PRIORITY_INFO)
+
+
+class DeadlineExceeded(Exception):
+    """마감 시각 전에 LLM 호출을 시작하거나 끝내지 못함"""
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: int
+    deadline: float
+    sequence: int
+    future: asyncio.Future = field(compare=False)
+
+
+@dataclass
+class _ClassStats:
+    dispatched: int = 0
+    queued: int = 0
+    queue_wait_ms: float = 0.0
+    max_queue_wait_ms: float = 0.0
+    start_deadline_misses: int = 0  # 대기열에서 마감 시각이 지남
+    finish_deadline_misses: int = 0  # 실행 중 마감 시각이 지남
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "dispatched": self.dispatched,
+            "queued": self.queued,
+            "avg_queue_wait_ms": round(self.queue_wait_ms / self.queued, 1) if self.queued else 0.0,
+            "max_queue_wait_ms": round(self.max_queue_wait_ms, 1),
+            "start_deadline_misses": self.start_deadline_misses,
+            "finish_deadline_misses": self.finish_deadline_misses,
+        }
+
+
+class LLMDispatcher:
+    """
+    LLM 호출의 전역 동시 실행 수를 제한하고 우선순위/마감 시각 순으로 실행 슬롯을 배정하는 디스패처
+
+    슬롯이 없으면 (우선순위, 마감 시각, 도착 순) 최소 힙에서 기다리며,
+    마감 시각 전에 시작하지 못하거나 실행이 마감 시각을 넘기면 DeadlineExceeded를 발생시킵니다.
+    """
+
+    def __init__(self, max_concurrency: int, deadlines: Dict[int, float]):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency는 1 이상이어야 합니다")
+        self.max_concurrency = max_concurrency
+        self.deadlines = deadlines  # 우선순위 클래스 → 허용 시간(초)
+        self._active = 0
+        self._waiters: List[_Waiter] = []
+        self._sequence = itertools.count()
+        self._stats: Dict[int, _ClassStats] = {}
+
+    async def run(self, priority: int, factory: Callable[[], Awaitable[T]], deadline: Optional[float] = None) -> T:
+        """
+        슬롯을 배정받아 factory() 실행
+
+        Args:
+            priority: 우선순위 클래스
+            factory: LLM 호출 코루틴을 만드는 함수
+            deadline: 마감 시각 (loop.time() 기준), None이면 우선순위 클래스 기본값
+
+        Raises:
+            DeadlineExceeded: 마감 시각 전에 시작하지 못했거나 끝내지 못한 경우
+        """
+        loop = asyncio.get_running_loop()
+        if deadline is None:
+            deadline = loop.time() + self.deadlines[priority]
+        stats = self._stats.setdefault(priority, _ClassStats())
+
+        await self._acquire(priority, deadline, stats)
+        stats.dispatched += 1
+        try:
+            async with asyncio.timeout_at(deadline) as timeout:
+                return await factory()
+        except TimeoutError:
+            if timeout.expired():
+                stats.finish_deadline_misses += 1
+                raise DeadlineExceeded("LLM 호출이 마감 시각 안에 끝나지 않았습니다") from None
+            raise
+        finally:
+            self._release()
+
+    async def _acquire(self, priority: int, deadline: float, stats: _ClassStats) -> None:
+        if self._active < self.max_concurrency and not self._waiters:
+            self._active += 1
+            return
+
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        heapq.heappush(self._waiters, _Waiter(priority, deadline, next(self._sequence), future))
+        queued_at = loop.time()
+        stats.queued += 1
+        try:
+            async with asyncio.timeout_at(deadline):
+                await future
+        except TimeoutError:
+            self._abandon(future)
+            stats.start_deadline_misses += 1
+            raise DeadlineExceeded("LLM 호출 대기 중 마감 시각이 지났습니다") from None
+        except asyncio.CancelledError:
+            self._abandon(future)
+            raise
+        finally:
+            waited_ms = (loop.time() - queued_at) * 1000
+            stats.queue_wait_ms += waited_ms
+            stats.max_queue_wait_ms = max(stats.max_queue_wait_ms, waited_ms)
+
+    def _abandon(self, future: asyncio.Future) -> None:
+        # 슬롯을 넘겨받은 직후 취소/시간 초과된 경우 슬롯 반환 (대기열 항목은 release 시 건너뜀)
+        if future.done() and not future.cancelled():
+            self._release()
+        else:
+            future.cancel()
+
+    def _release(self) -> None:
+        """슬롯을 다음 대기자에게 넘기거나 반환"""
+        now = asyncio.get_running_loop().time()
+        while self._waiters:
+            waiter = heapq.heappop(self._waiters)
+            if waiter.future.done() or waiter.deadline <= now:
+                continue  # 이미 포기했거나 마감이 지나 곧 포기할 대기자
+            waiter.future.set_result(None)
+            return
+        self._active -= 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active": self._active,
+            "waiting": sum(1 for waiter in self._waiters if not waiter.future.done()),
+            "deadlines_seconds": {PRIORITY_NAMES.get(p, str(p)): seconds for p, seconds in self.deadlines.items()},
+            "classes": {PRIORITY_NAMES.get(p, str(p)): stats.to_dict() for p, stats in sorted(self._stats.items())},
+        }
+
+
+class DispatchedMatchingBackend(MatchingBackend):
+    """
+    매칭 요청을 LLMDispatcher를 거쳐 실행하고, 마감 시각을 넘기면 결정적 규칙 기반 매칭으로 대체하는 백엔드
+
+    우선순위는 operation_id로 정합니다 (복약 체크 > 일정 등록/수정 > 조회).
+    """
+
+    def __init__(self, primary: MatchingBackend, fallback: MatchingBackend, dispatcher: LLMDispatcher):
+        self.primary = primary
+        self.fallback = fallback
+        self.dispatcher = dispatcher
+        self._fallbacks: Counter = Counter()
+
+    async def _dispatch(self, method: str, operation_id: str, *args):
+        try:
+            return await self.dispatcher.run(
+                operation_priority(operation_id),
+                lambda: getattr(self.primary, method)(operation_id, *args)
+            )
+        except DeadlineExceeded as e:
+            self._fallbacks[operation_id] += 1
+            logger.warning(f"[{operation_id}] {e}, 규칙 기반 매칭으로 대체")
+            return await getattr(self.fallback, method)(operation_id, *args)
+
+    async def match_schedule_ids(self, operation_id, schedules, user_schedule_names):
+        return await self._dispatch("match_schedule_ids", operation_id, schedules, user_schedule_names)
+
+    async def map_schedule_names(self, operation_id, schedules, user_schedule_names):
+        return await self._dispatch("map_schedule_names", operation_id, schedules, user_schedule_names)
+
+    async def match_routine(self, operation_id, schedules, medicine_name, schedule_name):
+        return await self._dispatch("match_routine", operation_id, schedules, medicine_name, schedule_name)
+
+    async def match_routines(self, operation_id, schedules, items):
+        return await self._dispatch("match_routines", operation_id, schedules, items)
+
+    async def match_schedule(self, operation_id, schedules, schedule_name):
+        return await self._dispatch("match_schedule", operation_id, schedules, schedule_name)
+
+    def stats(self):
+        return self.primary.stats()
+
+    def dispatcher_stats(self) -> Dict[str, Any]:
+        return {**self.dispatcher.stats(), "fallbacks": dict(self._fallbacks)}
@@ -0,0 +1,324 @@
+import asyncio
+import json
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+
+from llm.schemas import (RoutineBatchItemMatch, RoutineBatchMatch, RoutineMatch, ScheduleIdsMatch, ScheduleMatch,
+                         ScheduleNameMapping, ScheduleNameMatch)
+from llm.tiered_router import TieredLLMRouter
+from service.call_accounting import record_llm
+
+logger = logging.getLogger(__name__)
+
+
+class MatchingBackend(ABC):
+    """사용자 입력(약물명/스케줄명)을 복약 일정 데이터와 매칭하는 백엔드 인터페이스"""
+
+    @abstractmethod
+    async def match_schedule_ids(self, operation_id: str, schedules: List[Dict[str, Any]],
+                                 user_schedule_names: List[str]) -> ScheduleIdsMatch:
+        """스케줄 이름 목록과 매칭되는 user_schedule_id 목록"""
+
+    @abstractmethod
+    async def map_schedule_names(self, operation_id: str, schedules: List[Dict[str, Any]],
+                                 user_schedule_names: List[str]) -> ScheduleNameMapping:
+        """스케줄 이름별로 매칭되는 user_schedule_id (이름 → id 매핑)"""
+
+    @abstractmethod
+    async def match_routine(self, operation_id: str, schedules: List[Dict[str, Any]],
+                            medicine_name: str, schedule_name: str) -> RoutineMatch:
+        """오늘 복약 일정(user_schedule_dtos)에서 약물명/시간대와 매칭되는 루틴"""
+
+    @abstractmethod
+    async def match_routines(self, operation_id: str, schedules: List[Dict[str, Any]],
+                             items: List[Tuple[str, str]]) -> RoutineBatchMatch:
+        """여러 (약물명, 시간대) 쌍을 한 번의 매칭으로 처리"""
+
+    @abstractmethod
+    async def match_schedule(self, operation_id: str, schedules: List[Dict[str, Any]],
+                             schedule_name: str) -> ScheduleMatch:
+        """사용자 스케줄 목록에서 스케줄명과 매칭되는 스케줄"""
+
+    def stats(self) -> Dict[str, Any]:
+        """operation_id 별 매칭 통계"""
+        return {}
+
+
+class LLMMatchingBackend(MatchingBackend):
+    """티어드 LLM(structured output)을 이용한 매칭 백엔드"""
+
+    def __init__(self, router: TieredLLMRouter):
+        self.router = router
+
+    async def match_schedule_ids(self, operation_id, schedules, user_schedule_names):
+        prompt = f"""
+        Available schedules:
+        {json.dumps(schedules, ensure_ascii=False, indent=2)}
+
+        Requested names: {user_schedule_names}
+
+        Return the user_schedule_id values whose 'name' best match the requested names.
+        Lower the confidence when a requested name is ambiguous or matches several schedules.
+        """
+        messages = [
+            {"role": "system", "content": "Match user-requested schedule names to available schedules."},
+            {"role": "user", "content": prompt}
+        ]
+        return await self.router.ainvoke_structured(operation_id, messages, ScheduleIdsMatch)
+
+    async def map_schedule_names(self, operation_id, schedules, user_schedule_names):
+        prompt = f"""
+        Available schedules:
+        {json.dumps(schedules, ensure_ascii=False, indent=2)}
+
+        Requested names: {user_schedule_names}
+
+        For each requested name, return the user_schedule_id of the schedule whose 'name' best matches it,
+        or null if none matches. Keep requested_name exactly as given.
+        Lower the confidence when a requested name is ambiguous or matches several schedules.
+        """
+        messages = [
+            {"role": "system", "content": "Match user-requested schedule names to available schedules."},
+            {"role": "user", "content": prompt}
+        ]
+        return await self.router.ainvoke_structured(operation_id, messages, ScheduleNameMapping)
+
+    async def match_routine(self, operation_id, schedules, medicine_name, schedule_name):
+        matching_prompt = f"""
+다음은 사용자의 오늘 복약 일정 데이터입니다:
+{json.dumps(schedules, ensure_ascii=False, indent=2)}
+
+사용자가 체크하려는 정보:
+- 약물명: {medicine_name}
+- 시간대: {schedule_name}
+
+다음 작업을 수행해주세요:
+1. schedule_name과 가장 유사한 "name" 필드를 찾기 (예: "아침약" -> "아침")
+2. 해당 시간대에서 medicine_name과 가장 유사한 "nickname" 필드를 찾기
+3. 매칭 결과를 반환
+
+매칭 규칙:
+- 완전히 일치하지 않아도 유사한 것으로 판단
+- "약" 글자는 무시 (아침약 = 아침)
+- 약물명은 nickname에서 주요 성분명이나 상품명으로 매칭
+- 매칭되지 않으면 found: false로 설정
+- analysis_reason에는 왜 이 매칭을 선택했는지 상세한 근거를 포함
+- confidence는 매칭이 애매하거나 후보가 여러 개일수록 낮게 설정
+"""
+        messages = [
+            {"role": "system", "content": "당신은 약물 이름과 복용 시간을 정확히 매칭하는 전문가입니다. 사용자의 입력을 분석하여 가장 적합한 매칭을 찾아주세요."},
+            {"role": "user", "content": matching_prompt}
+        ]
+        return await self.router.ainvoke_structured(operation_id, messages, RoutineMatch)
+
+    async def match_routines(self, operation_id, schedules, items):
+        requested_items = "\n".join(
+            f"{index}. 약물명: {medicine_name} / 시간대: {schedule_name}"
+            for index, (medicine_name, schedule_name) in enumerate(items)
+        )
+        matching_prompt = f"""
+다음은 사용자의 오늘 복약 일정 데이터입니다:
+{json.dumps(schedules, ensure_ascii=False, indent=2)}
+
+사용자가 체크하려는 항목 목록 (번호는 request_index):
+{requested_items}
+
+각 항목마다 다음 작업을 수행해주세요:
+1. 시간대와 가장 유사한 "name" 필드를 찾기 (예: "아침약" -> "아침")
+2. 해당 시간대에서 약물명과 가장 유사한 "nickname" 필드를 찾기
+3. 항목별 매칭 결과를 request_index 순서대로 matches에 담아 반환
+
+매칭 규칙:
+- 완전히 일치하지 않아도 유사한 것으로 판단
+- "약" 글자는 무시 (아침약 = 아침)
+- 약물명은 nickname에서 주요 성분명이나 상품명으로 매칭
+- 매칭되지 않는 항목은 found: false로 설정
+- 항목별 confidence는 매칭이 애매하거나 후보가 여러 개일수록 낮게 설정
+- 전체 confidence는 가장 낮은 항목의 confidence로 설정
+"""
+        messages = [
+            {"role": "system", "content": "당신은 약물 이름과 복용 시간을 정확히 매칭하는 전문가입니다. 사용자의 입력을 분석하여 가장 적합한 매칭을 찾아주세요."},
+            {"role": "user", "content": matching_prompt}
+        ]
+        return await self.router.ainvoke_structured(operation_id, messages, RoutineBatchMatch)
+
+    async def match_schedule(self, operation_id, schedules, schedule_name):
+        matching_prompt = f"""
+다음은 사용자의 복약 스케줄 목록입니다:
+{json.dumps(schedules, ensure_ascii=False, indent=2)}
+
+사용자가 입력한 스케줄명: "{schedule_name}"
+
+다음 작업을 수행해주세요:
+1. 입력한 스케줄명과 가장 유사한 스케줄을 찾기
+2. "약" 글자는 무시하고 매칭 (예: "아침약" -> "아침")
+3. 유사성 판단 (완전 일치가 아니어도 의미상 같으면 매칭)
+
+매칭되지 않으면 found: false로 설정해주세요.
+매칭이 애매하거나 후보가 여러 개일수록 confidence를 낮게 설정해주세요.
+"""
+        messages = [
+            {"role": "system", "content": "당신은 사용자의 복약 스케줄을 정확히 매칭하는 전문가입니다. 입력된 스케줄명을 분석하여 가장 적합한 스케줄을 찾아주세요."},
+            {"role": "user", "content": matching_prompt}
+        ]
+        return await self.router.ainvoke_structured(operation_id, messages, ScheduleMatch)
+
+    def stats(self):
+        return self.router.stats()
+
+
+def normalize_name(name: Optional[str]) -> str:
+    """비교용 이름 정규화 (공백, "약" 글자 제거, 소문자 변환)"""
+    return "".join((name or "").split()).replace("약", "").lower()
+
+
+def find_best_match(query: str, candidates: List[Dict[str, Any]], key: str) -> Tuple[Optional[Dict[str, Any]], float]:
+    """
+    정규화된 이름 기준으로 가장 잘 맞는 후보 탐색
+
+    Returns:
+        (매칭된 후보, confidence) - 완전 일치 1.0, 부분 일치 0.7, 실패 시 (None, 0.0)
+    """
+    normalized_query = normalize_name(query)
+    if not normalized_query:
+        return None, 0.0
+
+    partial_match = None
+    for candidate in candidates:
+        normalized_candidate = normalize_name(candidate.get(key))
+        if not normalized_candidate:
+            continue
+        if normalized_candidate == normalized_query:
+            return candidate, 1.0
+        if partial_match is None and (normalized_query in normalized_candidate or normalized_candidate in normalized_query):
+            partial_match = candidate
+
+    if partial_match is not None:
+        return partial_match, 0.7
+    return None, 0.0
+
+
+class LocalMatchingBackend(MatchingBackend):
+    """
+    네트워크 없이 동작하는 결정적(deterministic) 규칙 기반 매칭 백엔드
+
+    벤치마크/테스트용으로, canned_responses에 operation_id 별 고정 응답을 지정할 수 있습니다.
+    latency(초)를 지정하면 호출마다 LLM 응답 지연을 흉내냅니다.
+    """
+
+    def __init__(self, canned_responses: Optional[Dict[str, Dict[str, Any]]] = None, latency: float = 0.0,
+                 simulates_llm: bool = True):
+        self.canned_responses = canned_responses or {}
+        self.latency = latency
+        # 가짜 LLM 으로 쓰일 때만 호출 수 집계에 LLM 호출로 기록 (마감 초과 시 대체 매칭은 제외)
+        self.simulates_llm = simulates_llm
+        self._calls: Dict[str, int] = {}
+
+    async def _count(self, operation_id: str) -> Optional[Dict[str, Any]]:
+        self._calls[operation_id] = self._calls.get(operation_id, 0) + 1
+        if self.simulates_llm:
+            record_llm()
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+        return self.canned_responses.get(operation_id)
+
+    async def match_schedule_ids(self, operation_id, schedules, user_schedule_names):
+        canned = await self._count(operation_id)
+        if canned is not None:
+            return ScheduleIdsMatch.model_validate(canned)
+
+        matched_ids = []
+        confidences = []
+        for name in user_schedule_names:
+            schedule, confidence = find_best_match(name, schedules, "name")
+            confidences.append(confidence)
+            if schedule is not None and schedule.get("user_schedule_id") not in matched_ids:
+                matched_ids.append(schedule.get("user_schedule_id"))
+
+        return ScheduleIdsMatch(user_schedule_ids=matched_ids, confidence=min(confidences, default=0.0))
+
+    async def map_schedule_names(self, operation_id, schedules, user_schedule_names):
+        canned = await self._count(operation_id)
+        if canned is not None:
+            return ScheduleNameMapping.model_validate(canned)
+
+        mappings = []
+        confidences = []
+        for name in user_schedule_names:
+            schedule, confidence = find_best_match(name, schedules, "name")
+            confidences.append(confidence)
+            mappings.append(ScheduleNameMatch(
+                requested_name=name,
+                user_schedule_id=schedule.get("user_schedule_id") if schedule else None
+            ))
+
+        return ScheduleNameMapping(mappings=mappings, confidence=min(confidences, default=1.0))
+
+    async def match_routine(self, operation_id, schedules, medicine_name, schedule_name):
+        canned = await self._count(operation_id)
+        if canned is not None:
+            return RoutineMatch.model_validate(canned)
+
+        return self._match_routine(schedules, medicine_name, schedule_name)
+
+    async def match_routines(self, operation_id, schedules, items):
+        canned = await self._count(operation_id)
+        if canned is not None:
+            return RoutineBatchMatch.model_validate(canned)
+
+        matches = [
+            RoutineBatchItemMatch(request_index=index, **self._match_routine(schedules, medicine_name, schedule_name).model_dump())
+            for index, (medicine_name, schedule_name) in enumerate(items)
+        ]
+        return RoutineBatchMatch(matches=matches, confidence=min((m.confidence for m in matches), default=1.0))
+
+    @staticmethod
+    def _match_routine(schedules, medicine_name, schedule_name) -> RoutineMatch:
+        schedule, schedule_confidence = find_best_match(schedule_name, schedules, "name")
+        routine, routine_confidence = (None, 0.0)
+        if schedule is not None:
+            routines = [r for r in schedule.get("routine_dtos", []) if isinstance(r, dict)]
+            routine, routine_confidence = find_best_match(medicine_name, routines, "nickname")
+
+        if routine is None:
+            return RoutineMatch(
+                found=False, schedule_name=schedule.get("name") if schedule else None, routine_id=None,
+                nickname=None, is_taken=False, analysis_reason="규칙 기반 매칭 실패",
+                message="매칭되는 약물을 찾을 수 없습니다.", confidence=1.0
+            )
+
+        return RoutineMatch(
+            found=True,
+            schedule_name=schedule.get("name"),
+            routine_id=routine.get("routine_id"),
+            nickname=routine.get("nickname"),
+            is_taken=routine.get("is_taken", False),
+            analysis_reason="규칙 기반 매칭 (공백/\"약\" 글자 제거 후 이름 비교)",
+            message="매칭 성공",
+            confidence=min(schedule_confidence, routine_confidence)
+        )
+
+    async def match_schedule(self, operation_id, schedules, schedule_name):
+        canned = await self._count(operation_id)
+        if canned is not None:
+            return ScheduleMatch.model_validate(canned)
+
+        schedule, confidence = find_best_match(schedule_name, schedules, "name")
+        if schedule is None:
+            return ScheduleMatch(
+                found=False, schedule_id=None, schedule_name=None, take_time=None,
+                analysis_reason="규칙 기반 매칭 실패", confidence=1.0
+            )
+
+        return ScheduleMatch(
+            found=True,
+            schedule_id=schedule.get("user_schedule_id"),
+            schedule_name=schedule.get("name"),
+            take_time=schedule.get("take_time"),
+            analysis_reason="규칙 기반 매칭 (공백/\"약\" 글자 제거 후 이름 비교)",
+            confidence=confidence
+        )
+
+    def stats(self):
+        return {operation_id: {"requests": calls} for operation_id, calls in self._calls.items()}
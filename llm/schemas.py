@@ -0,0 +1,61 @@
+from typing import List, Optional
+
+from pydantic import BaseModel, Field, field_validator
+
+
+class MatchingResult(BaseModel):
+    """모든 매칭 결과가 공통으로 포함하는 confidence 필드"""
+    confidence: float = Field(description="0.0~1.0 사이의 매칭 확신도. 애매하거나 후보가 여러 개일수록 낮게 설정")
+
+    @field_validator("confidence")
+    @classmethod
+    def check_confidence_range(cls, value: float) -> float:
+        if not 0.0 <= value <= 1.0:
+            raise ValueError("confidence는 0.0~1.0 사이여야 합니다")
+        return value
+
+
+class ScheduleIdsMatch(MatchingResult):
+    """요청한 스케줄 이름들과 매칭된 user_schedule_id 목록"""
+    user_schedule_ids: List[int] = Field(description="요청한 이름과 가장 잘 맞는 user_schedule_id 목록")
+
+
+class ScheduleNameMatch(BaseModel):
+    """요청한 스케줄 이름 하나에 대한 매칭 결과"""
+    requested_name: str = Field(description="요청한 스케줄 이름 (입력 그대로)")
+    user_schedule_id: Optional[int] = Field(description="매칭된 user_schedule_id, 없으면 null")
+
+
+class ScheduleNameMapping(MatchingResult):
+    """요청한 스케줄 이름별 user_schedule_id 매핑"""
+    mappings: List[ScheduleNameMatch] = Field(description="요청한 이름별 매칭 결과")
+
+
+class RoutineMatch(MatchingResult):
+    """오늘 복약 일정 중 약물명/시간대와 매칭된 루틴"""
+    found: bool = Field(description="매칭 성공 여부")
+    schedule_name: Optional[str] = Field(description="매칭된 스케줄 이름")
+    routine_id: Optional[int] = Field(description="매칭된 routine_id")
+    nickname: Optional[str] = Field(description="매칭된 약물 이름")
+    is_taken: bool = Field(description="이미 복용했는지 여부")
+    analysis_reason: str = Field(description="매칭 근거와 분석 과정 설명")
+    message: str = Field(description="결과 메시지")
+
+
+class RoutineBatchItemMatch(RoutineMatch):
+    """일괄 매칭 요청 항목별 매칭 결과"""
+    request_index: int = Field(description="요청 목록에서의 항목 순서 (0부터 시작)")
+
+
+class RoutineBatchMatch(MatchingResult):
+    """여러 (약물명, 시간대) 쌍을 한 번에 매칭한 결과"""
+    matches: List[RoutineBatchItemMatch] = Field(description="요청 항목별 매칭 결과 (요청 순서대로)")
+
+
+class ScheduleMatch(MatchingResult):
+    """사용자 스케줄 목록 중 스케줄명과 매칭된 스케줄"""
+    found: bool = Field(description="매칭 성공 여부")
+    schedule_id: Optional[int] = Field(description="매칭된 user_schedule_id")
+    schedule_name: Optional[str] = Field(description="매칭된 스케줄 이름")
+    take_time: Optional[str] = Field(description="복용 시간")
+    analysis_reason: str = Field(description="매칭 근거 설명")
@@ -0,0 +1,45 @@
+import re
+from typing import Type, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T", bound=BaseModel)
+
+_CODE_FENCE_PATTERN = re.compile(r"```(?:json)?\s*(.*?)```", re.DOTALL)
+
+
+def extract_json_text(text: str) -> str:
+    """
+    모델 응답에서 마크다운 코드 블록과 앞뒤 설명문을 제거하고 JSON 본문만 추출
+
+    Args:
+        text: 모델 응답 원문
+
+    Returns:
+        str: JSON 객체/배열 부분 문자열
+
+    Raises:
+        ValueError: JSON 객체/배열을 찾을 수 없는 경우
+    """
+    text = (text or "").strip()
+
+    fence = _CODE_FENCE_PATTERN.search(text)
+    if fence:
+        text = fence.group(1).strip()
+
+    starts = [index for index in (text.find("{"), text.find("[")) if index >= 0]
+    end = max(text.rfind("}"), text.rfind("]"))
+    if not starts or end < min(starts):
+        raise ValueError(f"응답에서 JSON을 찾을 수 없습니다: {text!r}")
+
+    return text[min(starts):end + 1]
+
+
+def parse_structured_output(text: str, schema: Type[T]) -> T:
+    """
+    모델 응답 원문을 스키마에 맞게 복구 후 검증
+
+    Raises:
+        ValueError: JSON 추출 실패 또는 스키마 검증 실패 (pydantic.ValidationError 포함)
+    """
+    return schema.model_validate_json(extract_json_text(text))
@@ -0,0 +1,214 @@
+import logging
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple, Type, TypeVar
+
+from langchain_core.runnables import Runnable
+from langchain_openai import ChatOpenAI
+from pydantic import BaseModel
+
+from llm.schemas import MatchingResult
+from llm.structured_output import parse_structured_output
+from service.call_accounting import record_llm
+
+T = TypeVar("T", bound=MatchingResult)
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ModelTier:
+    """LLM 티어 정의 (저렴한 모델부터 순서대로 사용)"""
+    name: str
+    model: ChatOpenAI
+    input_cost_per_1m: float   # 입력 토큰 100만개당 비용 (USD)
+    output_cost_per_1m: float  # 출력 토큰 100만개당 비용 (USD)
+
+    def cost(self, input_tokens: int, output_tokens: int) -> float:
+        return (input_tokens * self.input_cost_per_1m + output_tokens * self.output_cost_per_1m) / 1_000_000
+
+
+@dataclass
+class TierStats:
+    """티어별 호출 통계"""
+    calls: int = 0
+    accepted: int = 0
+    invalid: int = 0
+    repairs: int = 0
+    low_confidence: int = 0
+    total_latency_ms: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost_usd: float = 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "accepted": self.accepted,
+            "invalid": self.invalid,
+            "repairs": self.repairs,
+            "low_confidence": self.low_confidence,
+            "avg_latency_ms": round(self.total_latency_ms / self.calls, 2) if self.calls else 0.0,
+            "input_tokens": self.input_tokens,
+            "output_tokens": self.output_tokens,
+            "cost_usd": round(self.cost_usd, 6),
+        }
+
+
+@dataclass
+class OperationStats:
+    """operation_id 별 호출 통계"""
+    requests: int = 0
+    escalations: int = 0
+    failures: int = 0
+    tiers: Dict[str, TierStats] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        total_cost = sum(t.cost_usd for t in self.tiers.values())
+        return {
+            "requests": self.requests,
+            "escalations": self.escalations,
+            "escalation_rate": round(self.escalations / self.requests, 4) if self.requests else 0.0,
+            "failures": self.failures,
+            "total_cost_usd": round(total_cost, 6),
+            "avg_cost_usd": round(total_cost / self.requests, 6) if self.requests else 0.0,
+            "tiers": {name: stats.to_dict() for name, stats in self.tiers.items()},
+        }
+
+
+class TieredLLMRouter:
+    """
+    가장 저렴한 모델부터 호출하고, 응답이 유효하지 않거나 confidence가 낮을 때만 상위 모델로 승격하는 라우터
+
+    각 티어는 JSON-schema structured output(strict) 모드로 호출되며,
+    스키마 검증에 실패하면 같은 티어에서 최대 max_repairs 번까지 복구를 시도합니다.
+    """
+
+    def __init__(self, tiers: List[ModelTier], confidence_threshold: float = 0.8, max_repairs: int = 1):
+        if not tiers:
+            raise ValueError("최소 하나 이상의 모델 티어가 필요합니다")
+        self.tiers = tiers
+        self.confidence_threshold = confidence_threshold
+        self.max_repairs = max_repairs
+        self._stats: Dict[str, OperationStats] = {}
+        self._structured_models: Dict[Tuple[str, Type[BaseModel]], Runnable] = {}
+
+    def _operation_stats(self, operation_id: str) -> OperationStats:
+        if operation_id not in self._stats:
+            self._stats[operation_id] = OperationStats()
+        return self._stats[operation_id]
+
+    def _structured_model(self, tier: ModelTier, schema: Type[BaseModel]) -> Runnable:
+        """티어 모델을 스키마 기반 structured output 모드로 감싼 Runnable (스키마별 캐싱)"""
+        key = (tier.name, schema)
+        if key not in self._structured_models:
+            self._structured_models[key] = tier.model.with_structured_output(
+                schema, method="json_schema", strict=True, include_raw=True
+            )
+        return self._structured_models[key]
+
+    async def _invoke_tier(self, operation_id: str, tier: ModelTier, tier_stats: TierStats,
+                           messages: List[Any], schema: Type[T]) -> Optional[T]:
+        """
+        단일 티어 호출 (스키마 검증 실패 시 제한된 횟수만큼 복구 요청)
+
+        Returns:
+            검증된 결과, 복구에 실패한 경우 None
+        """
+        attempt_messages = list(messages)
+        for attempt in range(self.max_repairs + 1):
+            started = time.perf_counter()
+            try:
+                response = await self._structured_model(tier, schema).ainvoke(attempt_messages)
+            finally:
+                tier_stats.calls += 1
+                record_llm()
+                tier_stats.total_latency_ms += (time.perf_counter() - started) * 1000
+
+            raw = response["raw"]
+            usage = getattr(raw, "usage_metadata", None) or {}
+            input_tokens = usage.get("input_tokens", 0)
+            output_tokens = usage.get("output_tokens", 0)
+            tier_stats.input_tokens += input_tokens
+            tier_stats.output_tokens += output_tokens
+            tier_stats.cost_usd += tier.cost(input_tokens, output_tokens)
+
+            parsed = response.get("parsed")
+            if parsed is not None:
+                return parsed
+
+            # structured output 파싱 실패 시 코드 블록/설명문 제거 후 재검증
+            raw_content = raw.content if isinstance(raw.content, str) else ""
+            try:
+                return parse_structured_output(raw_content, schema)
+            except ValueError as e:
+                validation_error = e
+
+            if attempt == self.max_repairs:
+                break
+
+            tier_stats.repairs += 1
+            logger.warning(f"[{operation_id}] {tier.name} 응답 스키마 검증 실패, 복구 요청 ({attempt + 1}/{self.max_repairs}): {validation_error}")
+            attempt_messages = list(messages) + [
+                {"role": "assistant", "content": raw_content},
+                {"role": "user", "content": f"이전 응답이 스키마 검증에 실패했습니다: {validation_error}\n"
+                                            f"스키마에 맞는 JSON 객체만 다시 반환해주세요."},
+            ]
+
+        return None
+
+    async def ainvoke_structured(self, operation_id: str, messages: List[Any], schema: Type[T]) -> T:
+        """
+        티어 순서대로 모델을 호출하여 스키마 검증된 매칭 결과를 반환
+
+        Args:
+            operation_id: 통계 집계용 도구 operation_id
+            messages: 모델에 전달할 메시지 리스트
+            schema: 응답 스키마 (confidence 필드를 포함한 MatchingResult 하위 클래스)
+
+        Returns:
+            스키마 검증된 매칭 결과
+
+        Raises:
+            ValueError: 모든 티어에서 유효한 응답을 얻지 못한 경우
+        """
+        op_stats = self._operation_stats(operation_id)
+        op_stats.requests += 1
+
+        fallback_result = None
+        for index, tier in enumerate(self.tiers):
+            tier_stats = op_stats.tiers.setdefault(tier.name, TierStats())
+            is_last_tier = index == len(self.tiers) - 1
+
+            try:
+                result = await self._invoke_tier(operation_id, tier, tier_stats, messages, schema)
+            except Exception as e:
+                logger.error(f"[{operation_id}] {tier.name} 호출 오류: {e}")
+                result = None
+
+            if result is None:
+                tier_stats.invalid += 1
+                logger.warning(f"[{operation_id}] {tier.name} 유효한 응답을 얻지 못함, 상위 모델로 승격")
+            elif result.confidence < self.confidence_threshold and not is_last_tier:
+                tier_stats.low_confidence += 1
+                fallback_result = result
+                logger.info(f"[{operation_id}] {tier.name} confidence {result.confidence} 미달, 상위 모델로 승격")
+            else:
+                tier_stats.accepted += 1
+                logger.info(f"[{operation_id}] {tier.name} 매칭 결과 채택 (confidence: {result.confidence})")
+                return result
+
+            if not is_last_tier:
+                op_stats.escalations += 1
+
+        if fallback_result is not None:
+            # 상위 모델이 모두 실패한 경우 낮은 confidence라도 하위 모델 결과 사용
+            logger.warning(f"[{operation_id}] 상위 모델 실패, 낮은 confidence 결과 사용")
+            return fallback_result
+
+        op_stats.failures += 1
+        raise ValueError(f"{operation_id}: 모든 모델 티어에서 유효한 응답을 얻지 못했습니다")
+
+    def stats(self) -> Dict[str, Any]:
+        """operation_id 별 티어 지연시간, 승격 비율, 비용 통계 반환"""
+        return {operation_id: stats.to_dict() for operation_id, stats in self._stats.items()}
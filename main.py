@@ -1,40 +1,119 @@
+import time
+_started = time.perf_counter()
+
+import asyncio
 import httpx
 import os
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
-from fastapi_mcp import FastApiMCP
 from dotenv import load_dotenv
 import logging
 logging.basicConfig(level=logging.INFO)
 from config.logging_config import setup_logging
-from config.middleware_config import LoggingMiddleware
+from config.mcp_config import MedeasyFastApiMCP
+from config.startup_config import startup_timer
+from config.middleware_config import (
+    CALL_ACCOUNTING_ENABLED, COMPRESSION_ENABLED, PROFILING_ENABLED, AdmissionControlMiddleware,
+    CallAccountingMiddleware, CompressionMiddleware, LoggingMiddleware, ProfilingMiddleware
+)
+from reminder import reminder_engine
 from router import api_router
+from service.admission import admission_controller, loop_lag_monitor
+from service.blocking_detector import blocking_detector
+from service.cache_warmer import cache_warmer
+from service.call_accounting import upstream_ssl_context
+from service.medicine_catalog import medicine_catalog
+from service.routine_service import routine_history
+from service.tts_service import tts_service
 
 logger = logging.getLogger(__name__)
 load_dotenv()
+startup_timer.record("imports", (time.perf_counter() - _started) * 1000)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    lifespan_started = time.perf_counter()
+    # 업스트림 클라이언트 공용 SSL 컨텍스트를 이벤트 루프 밖에서 미리 생성 (CA 번들 로드)
+    await asyncio.to_thread(upstream_ssl_context)
+    # 이벤트 루프 지연 측정 (수락 제어 및 /internal/health 지표)
+    await loop_lag_monitor.start()
+    # 디버그 모드: 이벤트 루프를 막는 동기 호출 탐지 (BLOCKING_DETECTOR_ENABLED)
+    if blocking_detector is not None:
+        await blocking_detector.start(app)
+    # 복용 시간 직전 캐시 프리워밍 스케줄러 실행
+    if cache_warmer is not None:
+        await cache_warmer.start()
+    # 지난 날짜 복약 기록 로컬 저장소 (SQLite 파일 열기/생성)
+    if routine_history is not None:
+        await asyncio.to_thread(routine_history.open)
+    # TTS 오디오 디스크 캐시 디렉터리 준비 및 인덱스 복원
+    if tts_service is not None:
+        await asyncio.to_thread(tts_service.cache.load)
+    # 의약품 카탈로그 스냅샷 로드 및 주기적 갱신
+    if medicine_catalog is not None:
+        await medicine_catalog.start()
+    # 복용 예정/미복용 알림 엔진 실행
+    if reminder_engine is not None:
+        await reminder_engine.start()
+    startup_timer.record("lifespan_start", (time.perf_counter() - lifespan_started) * 1000)
+    startup_timer.log_summary("서버 시작 준비 완료")
+    yield
+    if reminder_engine is not None:
+        await reminder_engine.stop()
+    if medicine_catalog is not None:
+        await medicine_catalog.stop()
+    if cache_warmer is not None:
+        await cache_warmer.stop()
+    if routine_history is not None:
+        await asyncio.to_thread(routine_history.close)
+    await loop_lag_monitor.stop()
+    if blocking_detector is not None:
+        await blocking_detector.stop()
 
-app = FastAPI()
+
+app_started = time.perf_counter()
+app = FastAPI(lifespan=lifespan)
 app.include_router(api_router)
 setup_logging()
 app.add_middleware(LoggingMiddleware)
+# 도구 호출당 업스트림/LLM/Redis 호출 수 집계 및 호출 예산 확인
+if CALL_ACCOUNTING_ENABLED:
+    app.add_middleware(CallAccountingMiddleware)
+# 이벤트 루프 지연/처리 중 호출 수가 기준을 넘으면 우선순위 낮은 도구 호출 거절 (503 + Retry-After)
+if admission_controller is not None:
+    app.add_middleware(AdmissionControlMiddleware, controller=admission_controller)
+# 요청 단위 CPU 프로파일링 (PROFILING_ADMIN_TOKEN 또는 PROFILING_SAMPLE_RATE 설정 시에만 등록)
+if PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
+# 응답 압축 (zstd/gzip 협상, 가장 바깥에서 최종 응답만 압축)
+if COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+startup_timer.record("app_setup", (time.perf_counter() - app_started) * 1000)
 
 
 # Add MCP server to the FastAPI app
-mcp = FastApiMCP(
-    app,
-    name="medeasy fastapi mcp",
-    description="convert fastapi to mcp server",
-    describe_full_response_schema=True,  # Describe the full response JSON-schema instead of just a response example
-    describe_all_responses=True,  # Describe all the possible responses instead of just the success (2XX) response
-    http_client=httpx.AsyncClient(timeout=20, base_url="http://localhost:30003"),  # base_url 추가
-    exclude_operations=["get_medicine_by_medicine_id"]
-)
-
-# mcp 서버 초기화 (새로 반영된 api도 추가)
-mcp.setup_server()
+# 생성자에서 도구 정의를 만들며(setup_server), 매니페스트 캐시가 맞으면 스키마 변환 없이 불러옴
+with startup_timer.phase("mcp_setup"):
+    mcp = MedeasyFastApiMCP(
+        app,
+        name="medeasy fastapi mcp",
+        description="convert fastapi to mcp server",
+        describe_full_response_schema=True,  # Describe the full response JSON-schema instead of just a response example
+        describe_all_responses=True,  # Describe all the possible responses instead of just the success (2XX) response
+        # base_url 추가, 같은 프로세스로의 루프백 호출이므로 압축하지 않도록 identity 요청
+        http_client=httpx.AsyncClient(timeout=20, base_url="http://localhost:30003",
+                                      headers={"Accept-Encoding": "identity"}),
+        exclude_operations=["get_medicine_by_medicine_id", "synthesize_user_voice"]
+    )
+startup_timer.details["mcp_manifest"] = mcp.setup_timings
+# 내부 진단 엔드포인트(/internal/mcp/manifest)에서 도구 목록을 조회할 수 있도록 보관
+app.state.mcp = mcp
 
 # Mount the MCP server to the FastAPI app
-mcp.mount()
+with startup_timer.phase("mcp_mount"):
+    mcp.mount()
 
 if __name__ == "__main__":
     import uvicorn
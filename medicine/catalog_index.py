@@ -0,0 +1,203 @@
+import csv
+import gzip
+import heapq
+import io
+import json
+import sys
+import unicodedata
+from array import array
+from bisect import bisect_left
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+# 한글 음절 → 초성 (유니코드 호환 자모)
+_CHOSUNG = "ㄱㄲㄴㄷㄸㄹㅁㅂㅃㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ"
+_HANGUL_START, _HANGUL_END = 0xAC00, 0xD7A3
+_JAMO_CONSONANTS = set("ㄱㄲㄳㄴㄵㄶㄷㄸㄹㄺㄻㄼㄽㄾㄿㅀㅁㅂㅃㅄㅅㅆㅇㅈㅉㅊㅋㅌㅍㅎ")
+
+# 카탈로그 원본(JSON/CSV)의 열 이름 후보 (백엔드 응답 형식 / 식약처 공공데이터 형식)
+ID_FIELDS = ("id", "medicine_id", "item_seq", "ITEM_SEQ")
+NAME_FIELDS = ("item_name", "name", "ITEM_NAME")
+
+NGRAM = 2
+
+
+def normalize_name(name: str) -> str:
+    """검색용 정규화 (NFC, 소문자, 공백 제거)"""
+    # NFKC는 초성 입력(호환 자모)을 조합용 자모로 바꿔 버리므로 NFC만 적용
+    return "".join(unicodedata.normalize("NFC", name).lower().split())
+
+
+def to_chosung(text: str) -> str:
+    """한글 음절은 초성으로, 나머지 문자는 그대로 변환 (예: 타이레놀500 → ㅌㅇㄹㄴ500)"""
+    return "".join(
+        _CHOSUNG[(ord(char) - _HANGUL_START) // 588] if _HANGUL_START <= ord(char) <= _HANGUL_END else char
+        for char in text
+    )
+
+
+def is_chosung_query(text: str) -> bool:
+    """초성만으로 입력된 검색어인지 (예: ㅌㅇㄹㄴ)"""
+    return bool(text) and any(char in _JAMO_CONSONANTS for char in text) \
+        and all(char in _JAMO_CONSONANTS or not ("가" <= char <= "힣") for char in text)
+
+
+class MedicineCatalogIndex:
+    """
+    의약품 카탈로그 스냅샷의 읽기 전용 인메모리 검색 인덱스
+
+    - 정규화한 이름의 정렬 배열: 정확 일치 / 접두어 검색 (이진 탐색)
+    - 초성 문자열의 정렬 배열: 초성 접두어 검색 (예: ㅌㅇㄹ → 타이레놀)
+    - 2-gram 포스팅 리스트: 이름 중간에 포함된 검색어 (예: 레놀 → 타이레놀)
+
+    레코드는 공통 필드 이름 튜플 + 값 튜플로 보관해 dict 대비 메모리를 줄입니다.
+    생성 후에는 변경하지 않으므로 갱신 시에는 새 인덱스를 만들어 통째로 교체합니다.
+    """
+
+    def __init__(self, records: Iterable[Dict[str, Any]]):
+        fields: Dict[str, None] = {}  # 처음 등장한 순서를 유지하는 필드 이름 집합
+        rows: List[Tuple[Any, ...]] = []
+        names: List[str] = []
+        for record in records:
+            medicine_id = _first(record, ID_FIELDS)
+            name = _first(record, NAME_FIELDS)
+            if medicine_id in (None, "") or not name:
+                continue
+            for key in record:
+                fields.setdefault(key)
+            rows.append(record)
+            names.append(normalize_name(str(name)))
+
+        self.fields: Tuple[str, ...] = tuple(fields)
+        # 백엔드 응답과 같은 id / item_name 키로 반환하기 위한 위치
+        self._id_field = next((f for f in ID_FIELDS if f in self.fields), None)
+        self._name_field = next((f for f in NAME_FIELDS if f in self.fields), None)
+        self.rows: List[Tuple[Any, ...]] = [tuple(record.get(field) for field in self.fields) for record in rows]
+        self.names = names
+
+        order = sorted(range(len(names)), key=names.__getitem__)
+        self._sorted_names = [names[i] for i in order]
+        self._sorted_name_ids = array("I", order)
+
+        chosungs = [to_chosung(name) for name in names]
+        chosung_order = sorted(range(len(chosungs)), key=chosungs.__getitem__)
+        self._sorted_chosungs = [chosungs[i] for i in chosung_order]
+        self._sorted_chosung_ids = array("I", chosung_order)
+
+        postings: Dict[str, array] = {}
+        for record_id, name in enumerate(names):
+            for gram in {name[i:i + NGRAM] for i in range(len(name) - NGRAM + 1)}:
+                postings.setdefault(gram, array("I")).append(record_id)
+        self._postings = postings
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def record(self, record_id: int) -> Dict[str, Any]:
+        """레코드를 백엔드 검색 응답과 같은 dict 형태로 반환 (id / item_name 키 보장)"""
+        # 원본 레코드에 없던 필드(None)는 제외
+        result = {field: value for field, value in zip(self.fields, self.rows[record_id]) if value is not None}
+        if self._id_field and self._id_field != "id":
+            result.setdefault("id", result[self._id_field])
+        if self._name_field and self._name_field != "item_name":
+            result.setdefault("item_name", result[self._name_field])
+        return result
+
+    @staticmethod
+    def _prefix_range(keys: List[str], ids: array, prefix: str) -> Iterable[int]:
+        index = bisect_left(keys, prefix)
+        while index < len(keys) and keys[index].startswith(prefix):
+            yield ids[index]
+            index += 1
+
+    def _contains(self, query: str) -> List[int]:
+        """2-gram 포스팅 리스트 교집합 후 실제 포함 여부 확인"""
+        grams = {query[i:i + NGRAM] for i in range(len(query) - NGRAM + 1)}
+        lists = sorted((self._postings.get(gram) for gram in grams), key=lambda p: len(p) if p is not None else 0)
+        if not lists or lists[0] is None:
+            return []
+        candidates = set(lists[0])
+        for posting in lists[1:]:
+            candidates.intersection_update(posting)
+            if not candidates:
+                return []
+        return [record_id for record_id in candidates if query in self.names[record_id]]
+
+    def search_ids(self, query: str, limit: int = 10) -> List[int]:
+        """
+        검색어와 관련된 레코드 번호 목록 (정확 일치 → 접두어 → 포함 순, 같은 순위는 짧은 이름 우선)
+
+        초성만 입력된 경우에는 초성 접두어 검색만 수행합니다.
+        """
+        normalized = normalize_name(query)
+        if not normalized or limit <= 0:
+            return []
+
+        def rank(record_id: int) -> Tuple[int, str]:
+            return len(self.names[record_id]), self.names[record_id]
+
+        if is_chosung_query(normalized):
+            return heapq.nsmallest(limit, self._prefix_range(self._sorted_chosungs, self._sorted_chosung_ids,
+                                                             normalized), key=rank)
+
+        results = heapq.nsmallest(limit, self._prefix_range(self._sorted_names, self._sorted_name_ids, normalized),
+                                  key=rank)
+        if len(results) < limit and len(normalized) >= NGRAM:
+            # 접두어 결과가 모자라면 이름 중간에 포함된 항목으로 채움
+            seen = set(results)
+            infix = (record_id for record_id in self._contains(normalized) if record_id not in seen)
+            results.extend(heapq.nsmallest(limit - len(results), infix, key=rank))
+        return results
+
+    def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+        return [self.record(record_id) for record_id in self.search_ids(query, limit)]
+
+    def memory_bytes(self) -> int:
+        """인덱스가 차지하는 대략적인 메모리 (컨테이너 + 문자열 + 값 객체, 공유 객체는 한 번만 계산)"""
+        seen = set()
+
+        def size(obj) -> int:
+            if id(obj) in seen:
+                return 0
+            seen.add(id(obj))
+            total = sys.getsizeof(obj)
+            if isinstance(obj, (list, tuple)):
+                total += sum(size(item) for item in obj)
+            elif isinstance(obj, dict):
+                total += sum(size(key) + size(value) for key, value in obj.items())
+            return total
+
+        return sum(size(part) for part in (
+            self.fields, self.rows, self.names, self._sorted_names, self._sorted_name_ids,
+            self._sorted_chosungs, self._sorted_chosung_ids, self._postings,
+        ))
+
+
+def _first(record: Dict[str, Any], fields: Tuple[str, ...]) -> Optional[Any]:
+    for field in fields:
+        value = record.get(field)
+        if value not in (None, ""):
+            return value
+    return None
+
+
+def load_catalog_records(path: str) -> List[Dict[str, Any]]:
+    """
+    카탈로그 스냅샷 파일 읽기 (.json / .csv, 뒤에 .gz 압축 가능)
+
+    JSON은 레코드 배열 또는 백엔드 응답 형식({"body": [...]})을 지원합니다.
+    """
+    raw_path = path[:-3] if path.endswith(".gz") else path
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rb") as f:
+        data = f.read()
+
+    if raw_path.endswith(".csv"):
+        return list(csv.DictReader(io.StringIO(data.decode("utf-8-sig"))))
+    if raw_path.endswith(".json"):
+        payload = json.loads(data)
+        if isinstance(payload, dict):
+            payload = payload.get("body", [])
+        if not isinstance(payload, list):
+            raise ValueError(f"카탈로그 JSON 형식 오류: 레코드 배열이 아닙니다 ({path})")
+        return [record for record in payload if isinstance(record, dict)]
+    raise ValueError(f"지원하지 않는 카탈로그 형식입니다: {path}")
@@ -0,0 +1,34 @@
+import os
+from dotenv import load_dotenv
+
+from reminder.engine import ReminderEngine
+from reminder.sink import create_reminder_sink
+from service.cache_warmer import cache_warmer
+from service.upstream_cache import upstream_cache, user_cache_key
+
+load_dotenv()
+
+REMINDER_ENABLED = os.getenv("REMINDER_ENABLED", "true").lower() == "true"
+REMINDER_SINK = os.getenv("REMINDER_SINK", "log")  # log / file / webhook
+REMINDER_SINK_TARGET = os.getenv("REMINDER_SINK_TARGET")  # file 경로 또는 webhook URL
+REMINDER_UPCOMING_MINUTES = int(os.getenv("REMINDER_UPCOMING_MINUTES", "30"))
+REMINDER_MISSED_GRACE_MINUTES = int(os.getenv("REMINDER_MISSED_GRACE_MINUTES", "30"))
+
+reminder_engine = ReminderEngine(
+    sink=create_reminder_sink(REMINDER_SINK, REMINDER_SINK_TARGET),
+    upcoming_minutes=REMINDER_UPCOMING_MINUTES,
+    missed_grace_minutes=REMINDER_MISSED_GRACE_MINUTES,
+    # 미복용 판단 전 복용 정보 재조회 (워머가 보관 중인 토큰 사용, 워머가 꺼져 있으면 관측된 사용자만 알림)
+    revalidator=cache_warmer.refresh_routine if cache_warmer is not None else None,
+) if REMINDER_ENABLED else None
+
+if reminder_engine is not None:
+    # 업스트림에서 새로 조회된 스케줄/루틴 응답으로 알림 대상 학습
+    upstream_cache.add_listener(
+        "/user/schedule",
+        lambda jwt_token, data: reminder_engine.observe_schedules(user_cache_key(jwt_token), data.get("body", []))
+    )
+    upstream_cache.add_listener(
+        "/routine",
+        lambda jwt_token, data: reminder_engine.observe_routines(user_cache_key(jwt_token), data.get("body", []))
+    )
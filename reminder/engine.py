@@ -0,0 +1,330 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from dataclasses import dataclass, field
+from datetime import date, timedelta
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+from reminder.sink import ReminderEvent, ReminderSink
+
+logger = logging.getLogger(__name__)
+
+UPCOMING = "upcoming"
+MISSED = "missed"
+
+# 한국 시간(KST)은 서머타임이 없으므로 고정 오프셋 정수 연산으로 발생 시각을 계산 (pytz localize 대비 수십 배 빠름)
+KST_OFFSET_SECONDS = 9 * 3600
+DAY_SECONDS = 86400
+EPOCH_DATE = date(1970, 1, 1)
+
+
+def kst_day(timestamp: float) -> int:
+    """epoch 시각 → KST 기준 epoch 일(day) 번호"""
+    return int((timestamp + KST_OFFSET_SECONDS) // DAY_SECONDS)
+
+
+def day_to_date(day: int) -> date:
+    return EPOCH_DATE + timedelta(days=day)
+
+
+def parse_take_time(take_time: str) -> int:
+    """HH:MM:SS → 자정 이후 초"""
+    hours, minutes, seconds = (int(part) for part in take_time.split(":"))
+    if not (0 <= hours < 24 and 0 <= minutes < 60 and 0 <= seconds < 60):
+        raise ValueError(f"잘못된 복용 시간: {take_time}")
+    return hours * 3600 + minutes * 60 + seconds
+
+
+@dataclass(frozen=True)
+class ScheduleSlot:
+    """사용자 복용 시간대"""
+    user_schedule_id: Any
+    name: str
+    take_time: str  # HH:MM:SS
+    seconds: int    # 자정 이후 초
+
+
+@dataclass
+class UserReminderState:
+    slots: Dict[Any, ScheduleSlot]
+    version: int = 0
+    last_seen: float = field(default_factory=time.time)
+    # (복용 날짜, user_schedule_id) → {routine_id: [nickname, is_taken]}
+    doses: Dict[Tuple[str, Any], Dict[Any, List[Any]]] = field(default_factory=dict)
+    # (복용 날짜, user_schedule_id) → 복용 정보를 관측한 시각(epoch)
+    observed_at: Dict[Tuple[str, Any], float] = field(default_factory=dict)
+
+
+def _kst_today() -> date:
+    return day_to_date(kst_day(time.time()))
+
+
+class ReminderEngine:
+    """
+    복용 예정(30분 전) / 미복용 알림 이벤트를 최소 힙으로 관리하는 인프로세스 알림 엔진
+
+    사용자별 (스케줄, 이벤트 종류)마다 다음 발생 시각 하나만 힙에 유지하므로
+    이벤트당 O(log n)으로 동작하며, 전체 사용자를 주기적으로 훑는 폴링 루프가 없습니다.
+    스케줄이 바뀌면 version을 올려 기존 힙 항목을 지연 무효화합니다.
+
+    미복용 알림은 복용 시각 이후에 관측한 복용 정보로만 판단합니다. 엔진은 토큰을 보관하지 않으므로
+    revalidator(user_key, 날짜)가 있으면 그것으로 /routine 을 다시 조회하게 하고(조회 결과는 observe_routines 로 반영),
+    없거나 다시 조회하지 못하면 복용 시각 이후 조회한 적이 있는 사용자만 알림 대상이 됩니다 (나머지는 unverified_missed).
+    """
+
+    def __init__(self, sink: ReminderSink, upcoming_minutes: int = 30, missed_grace_minutes: int = 30,
+                 user_ttl_days: int = 7, sink_concurrency: int = 4, max_queue_size: int = 10000,
+                 revalidator: Optional[Callable[[str, str], Awaitable[bool]]] = None):
+        self.sink = sink
+        self.upcoming_offset = -upcoming_minutes * 60
+        self.missed_offset = missed_grace_minutes * 60
+        self.user_ttl_seconds = user_ttl_days * 86400
+        self.sink_concurrency = sink_concurrency
+        self.revalidator = revalidator
+        self._users: Dict[str, UserReminderState] = {}
+        self._heap: List[Tuple[float, int, str, int, Any, str, int]] = []
+        self._sequence = itertools.count()
+        self._queue: "asyncio.Queue[ReminderEvent]" = asyncio.Queue(maxsize=max_queue_size)
+        # 미복용 판단 전에 복용 정보를 다시 조회할 (user_key, version, user_schedule_id, day)
+        self._revalidate_queue: "asyncio.Queue[Tuple[str, int, Any, int]]" = asyncio.Queue(maxsize=max_queue_size)
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._counters = {"upcoming": 0, "missed": 0, "suppressed": 0, "unverified_missed": 0, "revalidated": 0,
+                          "dropped": 0, "sink_errors": 0, "expired_users": 0}
+
+    # ---- 관측 (업스트림 응답으로 상태 학습) ----
+
+    def observe_schedules(self, user_key: str, schedules: Iterable[Dict[str, Any]]) -> None:
+        """/user/schedule 응답으로 사용자 복용 시간대 등록/갱신"""
+        slots = {}
+        for schedule in schedules:
+            if not isinstance(schedule, dict) or not schedule.get("take_time"):
+                continue
+            try:
+                seconds = parse_take_time(schedule["take_time"])
+            except ValueError:
+                continue
+            slot = ScheduleSlot(schedule.get("user_schedule_id"), schedule.get("name", ""), schedule["take_time"], seconds)
+            slots[slot.user_schedule_id] = slot
+
+        state = self._users.get(user_key)
+        if state is not None:
+            state.last_seen = time.time()
+            if state.slots == slots:
+                return
+            state.slots = slots
+            state.version += 1
+        else:
+            state = UserReminderState(slots=slots)
+            self._users[user_key] = state
+
+        now = time.time()
+        for slot in slots.values():
+            for kind in (UPCOMING, MISSED):
+                self._schedule_next(user_key, state.version, slot, kind, now)
+        self._wakeup.set()
+
+    def observe_routines(self, user_key: str, days: Iterable[Dict[str, Any]]) -> None:
+        """/routine 응답으로 날짜별 복용 여부 갱신 (처음 보는 사용자는 시간대도 등록)"""
+        today = _kst_today()
+        schedules_seen = {}
+        doses = {}
+        for day in days:
+            if not isinstance(day, dict) or "take_date" not in day:
+                continue
+            try:
+                take_date = date.fromisoformat(day["take_date"])
+            except ValueError:
+                continue
+            for schedule in day.get("user_schedule_dtos", []):
+                if not isinstance(schedule, dict):
+                    continue
+                schedules_seen[schedule.get("user_schedule_id")] = schedule
+                # 어제~내일 데이터만 보관 (알림 판단에 필요한 범위)
+                if abs((take_date - today).days) <= 1:
+                    doses[(take_date.isoformat(), schedule.get("user_schedule_id"))] = {
+                        r.get("routine_id"): [r.get("nickname", "알 수 없는 약"), r.get("is_taken", False)]
+                        for r in schedule.get("routine_dtos", []) if isinstance(r, dict)
+                    }
+
+        if user_key not in self._users:
+            self.observe_schedules(user_key, schedules_seen.values())
+
+        state = self._users[user_key]
+        state.last_seen = time.time()
+        state.doses.update(doses)
+        state.observed_at.update(dict.fromkeys(doses, state.last_seen))
+        min_date = (today - timedelta(days=1)).isoformat()
+        for key in [k for k in state.doses if k[0] < min_date]:
+            del state.doses[key]
+            state.observed_at.pop(key, None)
+
+    def mark_taken(self, user_key: str, routine_ids: Iterable[Any] = (), user_schedule_id: Any = None,
+                   take_date: Optional[date] = None) -> None:
+        """복용 체크 성공 시 관측 상태에 즉시 반영 (다음 조회 전 잘못된 미복용 알림 방지)"""
+        state = self._users.get(user_key)
+        if state is None:
+            return
+        take_date = (take_date or _kst_today()).isoformat()
+        routine_ids = set(routine_ids)
+        for (dose_date, schedule_id), routines in state.doses.items():
+            if dose_date != take_date:
+                continue
+            for routine_id, dose in routines.items():
+                if routine_id in routine_ids or (user_schedule_id is not None and schedule_id == user_schedule_id):
+                    dose[1] = True
+
+    # ---- 스케줄링 ----
+
+    def _fire_at(self, slot: ScheduleSlot, kind: str, day: int) -> float:
+        offset = self.upcoming_offset if kind == UPCOMING else self.missed_offset
+        return day * DAY_SECONDS - KST_OFFSET_SECONDS + slot.seconds + offset
+
+    def _schedule_next(self, user_key: str, version: int, slot: ScheduleSlot, kind: str, after: float,
+                       day: Optional[int] = None) -> None:
+        """after(epoch) 이후 처음 발생하는 이벤트 하나를 힙에 추가"""
+        day = kst_day(after) - 1 if day is None else day
+        fire_at = self._fire_at(slot, kind, day)
+        while fire_at <= after:
+            day += 1
+            fire_at += DAY_SECONDS
+        heapq.heappush(self._heap, (fire_at, next(self._sequence), user_key, version, slot.user_schedule_id, kind, day))
+
+    @staticmethod
+    def _slot_at(slot: ScheduleSlot, day: int) -> float:
+        return day * DAY_SECONDS - KST_OFFSET_SECONDS + slot.seconds
+
+    def _needs_revalidation(self, state: UserReminderState, slot: ScheduleSlot, day: int) -> bool:
+        """복용 시각 이후 관측한 복용 정보가 없고, 알려진 정보로는 모두 복용했다고 볼 수 없는 경우"""
+        key = (day_to_date(day).isoformat(), slot.user_schedule_id)
+        if state.observed_at.get(key, 0.0) >= self._slot_at(slot, day):
+            return False
+        doses = state.doses.get(key)
+        return doses is None or any(not dose[1] for dose in doses.values())
+
+    def _build_event(self, user_key: str, state: UserReminderState, slot: ScheduleSlot, kind: str,
+                     day: int) -> Optional[ReminderEvent]:
+        slot_date = day_to_date(day).isoformat()
+        doses = state.doses.get((slot_date, slot.user_schedule_id))
+        not_taken = [dose[0] for dose in doses.values() if not dose[1]] if doses is not None else []
+        hhmm = slot.take_time[:5]
+
+        if kind == UPCOMING:
+            # 해당 시간대에 약이 없거나 이미 모두 복용한 것이 확인되면 알리지 않음
+            if doses is not None and not not_taken:
+                return None
+            message = f"잠시 후 {hhmm.replace(':', '시 ')}분에 {slot.name} 복용 시간이 다가옵니다. 꼭 복용해 주세요!"
+        else:
+            # 미복용은 관측된 복용 정보에서 안 먹은 약이 확인될 때만 알림
+            if not not_taken:
+                return None
+            # 복용 시각 이전에 조회한 정보라면 그 사이 앱 등 다른 경로로 복용 체크했을 수 있으므로 알리지 않음
+            if state.observed_at.get((slot_date, slot.user_schedule_id), 0.0) < self._slot_at(slot, day):
+                self._counters["unverified_missed"] += 1
+                return None
+            message = f"아직 {slot.name} ({hhmm})에 {', '.join(not_taken)}을(를) 복용하지 않으셨습니다."
+
+        return ReminderEvent(type=kind, user_key=user_key, date=slot_date, user_schedule_id=slot.user_schedule_id,
+                             schedule_name=slot.name, take_time=slot.take_time, message=message, medicines=not_taken)
+
+    async def _dispatch_loop(self) -> None:
+        while True:
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                _, _, user_key, version, schedule_id, kind, day = heapq.heappop(self._heap)
+                state = self._users.get(user_key)
+                if state is None or state.version != version or schedule_id not in state.slots:
+                    continue  # 무효화된 항목
+
+                if now - state.last_seen > self.user_ttl_seconds:
+                    # 오랫동안 활동이 없는 사용자는 알림 대상에서 제외
+                    del self._users[user_key]
+                    self._counters["expired_users"] += 1
+                    continue
+
+                slot = state.slots[schedule_id]
+                self._schedule_next(user_key, version, slot, kind, now, day + 1)
+
+                if kind == MISSED and self.revalidator is not None and self._needs_revalidation(state, slot, day):
+                    try:
+                        # 다시 조회한 뒤 판단 (디스패치 루프가 조회를 기다리지 않도록 별도 워커에서)
+                        self._revalidate_queue.put_nowait((user_key, version, schedule_id, day))
+                        continue
+                    except asyncio.QueueFull:
+                        pass
+                self._enqueue(self._build_event(user_key, state, slot, kind, day), kind)
+
+            timeout = min(self._heap[0][0] - now, 60) if self._heap else 60
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(timeout, 0))
+            except asyncio.TimeoutError:
+                pass
+
+    def _enqueue(self, event: Optional[ReminderEvent], kind: str) -> None:
+        if event is None:
+            self._counters["suppressed"] += 1
+            return
+        try:
+            self._queue.put_nowait(event)
+            self._counters[kind] += 1
+        except asyncio.QueueFull:
+            self._counters["dropped"] += 1
+
+    async def _revalidate_worker(self) -> None:
+        while True:
+            user_key, version, schedule_id, day = await self._revalidate_queue.get()
+            try:
+                try:
+                    if await self.revalidator(user_key, day_to_date(day).isoformat()):
+                        self._counters["revalidated"] += 1
+                except Exception as e:
+                    logger.warning(f"미복용 판단용 복용 정보 재조회 실패 ({user_key}): {e}")
+
+                state = self._users.get(user_key)
+                if state is None or state.version != version or schedule_id not in state.slots:
+                    continue
+                self._enqueue(self._build_event(user_key, state, state.slots[schedule_id], MISSED, day), MISSED)
+            finally:
+                self._revalidate_queue.task_done()
+
+    async def _sink_worker(self) -> None:
+        while True:
+            event = await self._queue.get()
+            try:
+                await self.sink.emit(event)
+            except Exception as e:
+                self._counters["sink_errors"] += 1
+                logger.error(f"복약 알림 전달 실패 ({event.type}, {event.user_key}): {e}")
+            finally:
+                self._queue.task_done()
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._dispatch_loop())]
+        if self.revalidator is not None:
+            # 재조회는 revalidator 쪽 속도 제한을 따르므로 워커 하나로 충분
+            self._tasks.append(asyncio.create_task(self._revalidate_worker()))
+        self._tasks += [asyncio.create_task(self._sink_worker()) for _ in range(self.sink_concurrency)]
+        logger.info(f"✅ reminder engine started (sink: {type(self.sink).__name__})")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await self.sink.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._counters,
+            "users": len(self._users),
+            "scheduled": len(self._heap),
+            "queued": self._queue.qsize(),
+            "revalidation_queued": self._revalidate_queue.qsize(),
+            # False 면 미복용 알림은 복용 시각 이후 /routine 을 조회한 사용자만 대상
+            "missed_revalidation": self.revalidator is not None,
+        }
@@ -0,0 +1,95 @@
+import asyncio
+import json
+import logging
+import os
+from abc import ABC, abstractmethod
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class ReminderEvent:
+    """복약 알림 이벤트"""
+    type: str                  # "upcoming" (복용 30분 전) / "missed" (복용 시간 경과 후 미복용)
+    user_key: str
+    date: str                  # 복용 날짜 (YYYY-MM-DD)
+    user_schedule_id: Any
+    schedule_name: str
+    take_time: str             # HH:MM:SS
+    message: str
+    medicines: List[str] = field(default_factory=list)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class ReminderSink(ABC):
+    """알림 이벤트 전달 대상 인터페이스"""
+
+    @abstractmethod
+    async def emit(self, event: ReminderEvent) -> None:
+        """이벤트 전달 (실패 시 예외 발생)"""
+
+    async def close(self) -> None:
+        pass
+
+
+class LogReminderSink(ReminderSink):
+    """로그로 이벤트를 남기는 싱크 (로컬 기본값)"""
+
+    async def emit(self, event: ReminderEvent) -> None:
+        logger.info(f"🔔 복약 알림 [{event.type}] {event.user_key}: {event.message}")
+
+
+class FileReminderSink(ReminderSink):
+    """이벤트를 JSON Lines 파일에 추가하는 싱크"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory and not os.path.exists(directory):
+            os.makedirs(directory)
+
+    def _append(self, line: str) -> None:
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+    async def emit(self, event: ReminderEvent) -> None:
+        # 파일 I/O가 이벤트 루프를 막지 않도록 스레드에서 실행
+        await asyncio.to_thread(self._append, json.dumps(event.to_dict(), ensure_ascii=False))
+
+
+class WebhookReminderSink(ReminderSink):
+    """이벤트를 웹훅 URL로 POST 하는 싱크"""
+
+    def __init__(self, url: str, timeout: float = 5.0):
+        self.url = url
+        self._client: Optional[httpx.AsyncClient] = None
+        self._timeout = timeout
+
+    async def emit(self, event: ReminderEvent) -> None:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self._timeout)
+        resp = await self._client.post(self.url, json=event.to_dict())
+        resp.raise_for_status()
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+def create_reminder_sink(sink_type: str, target: Optional[str] = None) -> ReminderSink:
+    if sink_type == "log":
+        return LogReminderSink()
+    if sink_type == "file":
+        return FileReminderSink(target or os.path.join("logs", "reminders.jsonl"))
+    if sink_type == "webhook":
+        if not target:
+            raise ValueError("webhook 싱크에는 REMINDER_SINK_TARGET(URL)이 필요합니다")
+        return WebhookReminderSink(target)
+    raise ValueError(f"지원하지 않는 알림 싱크입니다: {sink_type}")
@@ -3,6 +3,8 @@ from router.routine_router import router as router_router
 from router.medicine_router import router as medicine_router
 from router.schedule_router import router as schedule_router
 from router.voice_router import router as voice_router
+from router.briefing_router import router as briefing_router
+from router.internal_router import router as internal_router
 
 api_router = APIRouter()
 
@@ -10,3 +12,5 @@ api_router.include_router(router_router)
 api_router.include_router(medicine_router)
 api_router.include_router(schedule_router)
 api_router.include_router(voice_router)
+api_router.include_router(briefing_router)
+api_router.include_router(internal_router)
@@ -0,0 +1,33 @@
+import logging
+from datetime import datetime
+
+import pytz
+from fastapi import APIRouter, HTTPException, Query
+
+from auth.jwt_token_helper import get_user_id_from_token
+from service.briefing_service import build_daily_briefing
+
+logger = logging.getLogger(__name__)
+router = APIRouter(
+    prefix="/briefing",
+    tags=["Briefing Router"]
+)
+
+kst = pytz.timezone('Asia/Seoul')
+
+
+@router.get(
+    path="/daily",
+    operation_id="get_daily_briefing",
+    description="대화를 시작할 때 사용하는 도구, 오늘 복약 일정(놓친 복용/다음 복용), 현재 복용 중인 약, 음성 설정을 한 번에 요약하여 조회한다"
+)
+async def get_daily_briefing(
+        jwt_token: str = Query(description="Users JWT Token", required=True),
+):
+    try:
+        get_user_id_from_token(jwt_token)
+    except ValueError as e:
+        raise HTTPException(status_code=401, detail=f"유효하지 않은 JWT 토큰: {e}")
+
+    logger.info("일일 브리핑 도구 호출")
+    return await build_daily_briefing(jwt_token, datetime.now(kst).replace(tzinfo=None))
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import os
+import secrets
+from dataclasses import asdict
+from typing import List, Optional
+
+from dotenv import load_dotenv
+from fastapi import APIRouter, Body, Depends, Header, HTTPException, Query, Request
+
+from config.middleware_config import compression_stats
+from config.startup_config import startup_timer
+from llm import matching_backend
+from llm.dispatcher import DispatchedMatchingBackend
+from reminder import reminder_engine
+from service.admission import admission_controller, loop_lag_monitor
+from service.blocking_detector import blocking_detector
+from service.call_accounting import call_accounting
+from service.cache_warmer import cache_warmer
+from service.idempotency import idempotency_store
+from service.medicine_catalog import medicine_catalog
+from service.medicine_service import medicine_search_cache
+from service.routine_service import routine_history
+from service.tts_service import tts_service
+from service.upstream_cache import upstream_cache
+from voice import voice_setting_repo
+from voice.voice_setting import VoiceSettings
+
+load_dotenv()
+
+# 일괄 음성 설정 조회 한 번에 허용하는 최대 사용자 수
+VOICE_BULK_MAX_USERS = 5000
+# 사용자별 데이터를 반환하는 내부 엔드포인트 호출 시 X-Internal-Token 헤더로 전달해야 하는 값 (미설정 시 호출 불가)
+INTERNAL_API_TOKEN = os.getenv("INTERNAL_API_TOKEN")
+
+logger = logging.getLogger(__name__)
+
+# 운영/진단용 엔드포인트 (OpenAPI 스키마에서 제외되므로 MCP 도구로 노출되지 않음)
+router = APIRouter(
+    prefix="/internal",
+    tags=["Internal Router"],
+    include_in_schema=False
+)
+
+
+def require_internal_token(x_internal_token: Optional[str] = Header(None)) -> None:
+    """
+    사용자별 데이터를 반환하는 엔드포인트용 인증 (통계 엔드포인트는 집계값만 반환하므로 적용하지 않음)
+
+    /internal 경로는 네트워크에서도 외부 접근을 막아야 하며, 이 토큰은 그와 별개의 추가 확인입니다.
+    """
+    if not INTERNAL_API_TOKEN:
+        raise HTTPException(status_code=403, detail="INTERNAL_API_TOKEN 이 설정되지 않아 사용할 수 없습니다")
+    if not x_internal_token or not secrets.compare_digest(x_internal_token, INTERNAL_API_TOKEN):
+        raise HTTPException(status_code=401, detail="내부 API 토큰이 올바르지 않습니다")
+
+
+@router.get("/health", operation_id="get_health", description="헬스 체크 (과부하로 도구 호출을 거절하는 중에도 항상 응답)")
+async def get_health():
+    return {
+        "status": "ok",
+        "loop_lag_ms": round(loop_lag_monitor.current_ms(), 1),
+        "shedding": admission_controller.shedding if admission_controller is not None else False,
+    }
+
+
+@router.get("/admission/stats", operation_id="get_admission_stats",
+            description="이벤트 루프 지연(p50/p99/최대), 처리 중 도구 호출 수, 우선순위 별 수락/거절 건수")
+async def get_admission_stats():
+    return admission_controller.stats() if admission_controller is not None else {"loop_lag": loop_lag_monitor.stats()}
+
+
+@router.get("/blocking/stats", operation_id="get_blocking_stats",
+            description="이벤트 루프를 막은 동기 호출의 호출 위치/operation_id 별 횟수와 시간 (BLOCKING_DETECTOR_ENABLED 시)")
+async def get_blocking_stats():
+    return blocking_detector.stats() if blocking_detector is not None else None
+
+
+@router.get("/llm/stats", operation_id="get_llm_tier_stats", description="operation_id 별 LLM 티어 지연시간, 승격 비율, 비용 통계")
+async def get_llm_tier_stats():
+    return matching_backend.stats()
+
+
+@router.get("/llm/dispatcher/stats", operation_id="get_llm_dispatcher_stats",
+            description="LLM 동시 실행 제한/우선순위 대기열 및 마감 시각 초과로 인한 규칙 기반 대체 통계")
+async def get_llm_dispatcher_stats():
+    return matching_backend.dispatcher_stats() if isinstance(matching_backend, DispatchedMatchingBackend) else None
+
+
+@router.get("/cache/stats", operation_id="get_cache_stats", description="업스트림/검색/TTS 캐시, 복약 기록 저장소, 의약품 카탈로그 인덱스 및 캐시 프리워밍 통계")
+async def get_cache_stats():
+    return {
+        "upstream": upstream_cache.stats(),
+        "medicine_search": medicine_search_cache.stats(),
+        "medicine_catalog": medicine_catalog.stats() if medicine_catalog is not None else None,
+        "warmer": cache_warmer.stats() if cache_warmer is not None else None,
+        "tts": tts_service.cache.stats() if tts_service is not None else None,
+        "routine_history": await asyncio.to_thread(routine_history.stats) if routine_history is not None else None,
+    }
+
+
+@router.get("/reminder/stats", operation_id="get_reminder_stats", description="복약 알림 엔진 통계")
+async def get_reminder_stats():
+    return reminder_engine.stats() if reminder_engine is not None else None
+
+
+@router.get("/startup/stats", operation_id="get_startup_stats",
+            description="서버 시작 단계별 소요 시간 및 MCP 매니페스트 캐시 적중 여부")
+async def get_startup_stats():
+    return startup_timer.stats()
+
+
+@router.get("/mcp/manifest", operation_id="get_mcp_manifest",
+            description="MCP 도구 목록 (기본은 에이전트에 노출 중인 목록, full=true 면 응답 스키마까지 담은 원본)")
+async def get_mcp_manifest(request: Request, full: bool = Query(False, description="원본(전체) 매니페스트 조회")):
+    mcp = request.app.state.mcp
+    tools = mcp.full_tools if full else mcp.tools
+    return [tool.model_dump(mode="json", exclude_none=True) for tool in tools]
+
+
+@router.get("/mcp/manifest/stats", operation_id="get_mcp_manifest_stats",
+            description="원본/축약 MCP 매니페스트 크기(바이트, tiktoken 토큰 수) 비교")
+async def get_mcp_manifest_stats(request: Request):
+    # tiktoken 인코딩 첫 로드 시 파일을 내려받을 수 있으므로 스레드에서 계산
+    return await asyncio.to_thread(request.app.state.mcp.manifest_stats)
+
+
+@router.get("/compression/stats", operation_id="get_compression_stats", description="응답 압축 인코딩 별 건수 및 압축 전후 바이트")
+async def get_compression_stats():
+    return dict(compression_stats)
+
+
+@router.get("/calls/stats", operation_id="get_call_stats",
+            description="operation_id 별 도구 호출당 업스트림/LLM/Redis 호출 수와 호출 예산 초과 횟수")
+async def get_call_stats():
+    return call_accounting.stats()
+
+
+@router.get("/idempotency/stats", operation_id="get_idempotency_stats", description="멱등성 키 실행/재사용/충돌 통계")
+async def get_idempotency_stats():
+    return idempotency_store.stats()
+
+
+@router.post("/voice/settings/bulk", operation_id="get_voice_settings_bulk",
+             description="여러 사용자의 음성 설정 일괄 조회 (TTS 사전 렌더링용, 없는 사용자는 기본값)",
+             dependencies=[Depends(require_internal_token)])
+async def get_voice_settings_bulk(
+        user_ids: List[str] = Body(description="조회할 사용자 ID 목록", embed=True, max_length=VOICE_BULK_MAX_USERS)
+):
+    try:
+        # 최대 VOICE_BULK_MAX_USERS 명의 동기 Redis 조회이므로 스레드에서 실행 (이벤트 루프가 멈추지 않도록)
+        found = await asyncio.to_thread(voice_setting_repo.get_many, user_ids)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail=f"음성 설정 조회 실패: {e}")
+
+    default = asdict(VoiceSettings())
+    return {
+        "settings": {user_id: asdict(settings) if settings else default for user_id, settings in found.items()},
+        "defaulted": [user_id for user_id, settings in found.items() if settings is None],
+    }
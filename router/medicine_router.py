@@ -1,11 +1,16 @@
 import json
 import logging
 import os
+from typing import Optional
 
 import httpx
 from fastapi import APIRouter, FastAPI, Query, HTTPException, Path
 from dotenv import load_dotenv
 
+from service.call_accounting import upstream_client
+from service.medicine_catalog import medicine_catalog
+from service.upstream_cache import CURRENT_MEDICATIONS_MAX_STALE, MEDICINE_SEARCH_MAX_STALE, upstream_cache
+
 load_dotenv()
 logger = logging.getLogger(__name__)
 router = APIRouter(
@@ -20,7 +25,6 @@ async def search_medicine(
         size: int= Query(1, description="result size")
 ):
     logger.info("search_medicine 도구 execute")
-    api_url = f"{os.getenv("MEDEASY_API_URL")}/medicine/search"
 
     if not jwt_token:
         return {"error": "authorization token is required"}
@@ -28,10 +32,11 @@ async def search_medicine(
     if not medicine_name:
         return {"error": "medicine name is required"}
 
-    # JWT 토큰 설정 (실제 토큰으로 대체 필요)
-    headers = {
-        "Authorization": f"Bearer {jwt_token}"
-    }
+    # 오프라인 카탈로그 인덱스에서 먼저 검색, 결과가 없을 때만 백엔드 호출
+    if medicine_catalog is not None:
+        catalog_results = medicine_catalog.search(medicine_name, size)
+        if catalog_results is not None:
+            return {"body": catalog_results}
 
     # 쿼리 파라미터 설정
     params = {
@@ -39,19 +44,21 @@ async def search_medicine(
         "size": size
     }
 
-    # 비동기 HTTP 클라이언트를 사용하여 API 요청 보내기
-    async with httpx.AsyncClient() as client:
-        try:
-            logger.info(f"jwt_token: {headers}")
-            response = await client.get(api_url, headers=headers, params=params)
-            response.raise_for_status()  # 4XX, 5XX 에러 발생 시 예외 발생
-            return response.json()  # API 응답을 JSON으로 변환하여 반환
-        except httpx.HTTPStatusError as e:
-            # HTTP 상태 코드 에러 처리
-            return {"error": f"API 요청 실패: {e.response.status_code}", "detail": e.response.text}
-        except httpx.RequestError as e:
-            # 네트워크 관련 에러 처리 (타임아웃, 연결 오류 등)
-            return {"error": f"API 요청 중 오류 발생: {str(e)}"}
+    # 매번 백엔드에서 조회하되, 백엔드 장애 시에는 마지막으로 성공한 검색 결과를 stale 표시와 함께 반환
+    return await _get_with_stale_fallback("/medicine/search", jwt_token, params, MEDICINE_SEARCH_MAX_STALE)
+
+
+async def _get_with_stale_fallback(path: str, jwt_token: str, params: Optional[dict], max_stale: float):
+    """조회 도구용 백엔드 GET (캐시하지 않고, 장애 시에만 max_stale 이내의 마지막 응답 사용)"""
+    try:
+        data = await upstream_cache.get_json(path, jwt_token, params, ttl=0, max_stale=max_stale)
+    except HTTPException as e:
+        # HTTP 상태 코드 에러 처리
+        return {"error": f"API 요청 실패: {e.status_code}", "detail": e.detail}
+    except httpx.RequestError as e:
+        # 네트워크 관련 에러 처리 (타임아웃, 연결 오류 등)
+        return {"error": f"API 요청 중 오류 발생: {str(e)}"}
+    return upstream_cache.mark_stale(data)
 
 
 @router.get("/{medicine_id}", operation_id="get_medicine_by_medicine_id", description="medicine_id를 통한 단일 의약품 조회")
@@ -71,7 +78,7 @@ async def search_medicine(
     }
 
     # 비동기 HTTP 클라이언트를 사용하여 API 요청 보내기
-    async with httpx.AsyncClient() as client:
+    async with upstream_client() as client:
         try:
             logger.info(f"jwt_token: {headers}")
             response = await client.get(api_url, headers=headers)
@@ -88,26 +95,7 @@ async def search_medicine(
 async def get_current_medications(
         jwt_token: str = Query(None, description="Users JWT Token")
 ):
-    api_url = f"{os.getenv("MEDEASY_API_URL")}/user/medicines/current"
-
     if not jwt_token:
         return {"error": "authorization token is required"}
 
-    # JWT 토큰 설정 (실제 토큰으로 대체 필요)
-    headers = {
-        "Authorization": f"Bearer {jwt_token}"
-    }
-
-    # 비동기 HTTP 클라이언트를 사용하여 API 요청 보내기
-    async with httpx.AsyncClient() as client:
-        try:
-            logger.info(f"jwt_token: {headers}")
-            response = await client.get(api_url, headers=headers)
-            response.raise_for_status()  # 4XX, 5XX 에러 발생 시 예외 발생
-            return response.json()  # API 응답을 JSON으로 변환하여 반환
-        except httpx.HTTPStatusError as e:
-            # HTTP 상태 코드 에러 처리
-            return {"error": f"API 요청 실패: {e.response.status_code}", "detail": e.response.text}
-        except httpx.RequestError as e:
-            # 네트워크 관련 에러 처리 (타임아웃, 연결 오류 등)
-            return {"error": f"API 요청 중 오류 발생: {str(e)}"}
\ No newline at end of file
+    return await _get_with_stale_fallback("/user/medicines/current", jwt_token, None, CURRENT_MEDICATIONS_MAX_STALE)
\ No newline at end of file
@@ -1,15 +1,26 @@
-import json
+import asyncio
 import logging
 import os
+from contextlib import aclosing
 from datetime import date, datetime, timedelta
+from typing import AsyncIterator, List, Literal, Optional, Tuple
 
 import httpx
 import pytz
-from fastapi import APIRouter, FastAPI, Query, HTTPException
+from fastapi import APIRouter, FastAPI, Query, HTTPException, Body, Header
 from dotenv import load_dotenv
-from langchain_openai import ChatOpenAI
 
+from llm import matching_backend
+from reminder import reminder_engine
+from routine.model import RoutineCheckItem, RoutineCreationRequest
+from routine.pagination import ROUTINE_MAX_PAGE_SIZE, RoutineCursor
+from service.adherence import adherence_message, summarize_adherence, to_columns
+from service.call_accounting import upstream_client
+from service.idempotency import (IDEMPOTENCY_KEY_DESCRIPTION, IDEMPOTENCY_KEY_HEADER, retryable_failure,
+                                  idempotency_store)
 from service.medicine_service import search_medicine_id_by_name
+from service.routine_service import fetch_routine_days
+from service.upstream_cache import ROUTINE_CACHE_TTL, ROUTINE_MAX_STALE, upstream_cache, user_cache_key
 from service.user_schedule_service import get_user_schedule, mapping_user_schedule_ids
 
 load_dotenv()
@@ -20,96 +31,177 @@ router = APIRouter(
 )
 
 medeasy_api_url = os.getenv("MEDEASY_API_URL")
-gpt_mini = ChatOpenAI(model_name="gpt-4.1-mini")
-gpt_nano = ChatOpenAI(model_name="gpt-4.1-nano")
+
+# 복약 일정 상세 조회 페이지네이션
+ROUTINE_AUTO_PAGE_DAYS = int(os.getenv("ROUTINE_AUTO_PAGE_DAYS", "14"))  # 이보다 긴 기간은 자동 분할 (0이면 비활성화)
+ROUTINE_PAGE_FETCH_DAYS = int(os.getenv("ROUTINE_PAGE_FETCH_DAYS", "7"))  # entries 단위 페이지에서 한 번에 조회할 날짜 수
+# 복약 순응도 분석에서 한 번에 허용하는 최대 기간(일)
+ADHERENCE_MAX_DAYS = 366
 
 # 한국 시간대 객체 생성 - 전역 범위에 정의
 kst = pytz.timezone('Asia/Seoul')
 
-# @router.post(
-#     path="/register",
-#     operation_id="create_new_medicine_routine",
-#     description="새로운 복약 일정을 등록할 때 사용하는 도구"
-# )
-# async def create_medicine_routine(
-#         medicine_id: str = Query(description="medicine identifier code number", example='1', required=True),
-#         nickname: str = Query(default=None, description="medicine nickname", required=False),
-#         dose: int = Query(default=1, description="dose", ge=1, le=10, required=False),
-#         total_quantity: int = Query(description="medicine's total quantity", ge=1, le=200, required=True),
-#         interval_days: int = Query(default=1, description="medicine's interval days", ge=1, le=30, required=False),
-#         user_schedule_names: list[str] = Query(description="Schedule names for when the user takes medicine", required=True),
-#         jwt_token: str = Query(description="Users JWT Token", required=True),
-# ):
-#     # medicine_id=await search_medicine_id_by_name(jwt_token, medicine_name)
-#
-#     # medicine_id 검색
-#     if medicine_id is None:
-#         raise HTTPException(status_code=400, detail=f"존재하지 않는 약입니다.")
-#
-#     # user_schedules 조회
-#     schedules = await get_user_schedule(jwt_token)
-#
-#     # OpenAI로 입력받은 user_schedule_names와 어울리는 user_schedule_id 추출
-#     matched_ids=await mapping_user_schedule_ids(schedules, user_schedule_names)
-#
-#     if not matched_ids:
-#         return {"복약 일정을 등록하실 시간대가 없습니다. 먼저 시간대를 설정해주세요."}
-#
-#     # 루틴 생성 API 호출
-#     routine_url = f"{medeasy_api_url}/routine"
-#     body = {
-#         "medicine_id": medicine_id,
-#         "nickname": nickname,
-#         "dose": dose,
-#         "total_quantity": total_quantity,
-#         "interval_days": interval_days,
-#         "user_schedule_ids": matched_ids,
-#     }
-#
-#     headers = {"Authorization": f"Bearer {jwt_token}", "Content-Type": "application/json"}
-#
-#     async with httpx.AsyncClient() as client:
-#         resp = await client.post(routine_url, headers=headers, json=body)
-#         if resp.status_code >= 400:
-#             raise HTTPException(status_code=502, detail=f"루틴 생성 실패: {resp.text}")
-#         return resp.json()
+@router.post(
+    path="/register/batch",
+    operation_id="create_medicine_routines_batch",
+    description="새로운 복약 일정을 등록할 때 사용하는 도구, 처방전의 여러 약을 한 번에 등록할 수 있다"
+)
+async def create_medicine_routines_batch(
+        jwt_token: str = Query(description="Users JWT Token", required=True),
+        routines: List[RoutineCreationRequest] = Body(
+            description="등록할 복약 일정 목록",
+            embed=True,
+            example=[{"medicine_name": "타이레놀", "nickname": "진통제", "dose": 1, "total_quantity": 10,
+                      "interval_days": 1, "schedule_times": ["아침", "저녁"]}]
+        )
+):
+    logger.info(f"일괄 복약 일정 등록 도구 호출, {len(routines)}개 항목")
+
+    if not routines:
+        return {"message": "등록할 복약 일정이 없습니다.", "results": []}
+
+    # 1. 의약품 ID 동시 조회 (검색 캐시 사용, 중복 약 이름은 한 번만 조회)
+    medicine_names = list(dict.fromkeys(routine.medicine_name for routine in routines))
+    search_results = await asyncio.gather(
+        *(search_medicine_id_by_name(jwt_token, name) for name in medicine_names),
+        return_exceptions=True
+    )
+    medicine_ids = dict(zip(medicine_names, search_results))
+
+    # 2. 사용자 스케줄 조회 및 전체 시간대 이름을 한 번에 매칭
+    schedules = await get_user_schedule(jwt_token)
+    schedule_names = list(dict.fromkeys(name for routine in routines for name in routine.schedule_times))
+    try:
+        schedule_mapping = await matching_backend.map_schedule_names(
+            "create_medicine_routines_batch", schedules, schedule_names
+        )
+        schedule_ids = {m.requested_name: m.user_schedule_id for m in schedule_mapping.mappings}
+    except Exception as e:
+        logger.error(f"스케줄 매칭 오류: {e}")
+        return {"message": "복약 시간대 매칭 중 오류가 발생했습니다.", "results": []}
+
+    # 3. 루틴 생성 API 동시 호출
+    routine_url = f"{medeasy_api_url}/routine"
+    headers = {"Authorization": f"Bearer {jwt_token}", "Content-Type": "application/json"}
+
+    async def register_routine(client: httpx.AsyncClient, routine: RoutineCreationRequest) -> dict:
+        result = {"medicine_name": routine.medicine_name, "nickname": routine.nickname}
+
+        medicine_id = medicine_ids.get(routine.medicine_name)
+        if isinstance(medicine_id, Exception):
+            logger.error(f"약 검색 오류 ({routine.medicine_name}): {medicine_id}")
+            return {**result, "success": False, "message": "약 검색 중 오류가 발생했습니다."}
+        if medicine_id is None:
+            return {**result, "success": False, "message": f"'{routine.medicine_name}'와 일치하는 약을 찾을 수 없습니다."}
+
+        user_schedule_ids = list(dict.fromkeys(
+            schedule_ids[name] for name in routine.schedule_times if schedule_ids.get(name) is not None
+        ))
+        if not user_schedule_ids:
+            return {**result, "success": False,
+                    "message": "복약 일정을 등록하실 시간대가 없습니다. 먼저 시간대를 설정해주세요."}
+
+        body = {
+            "medicine_id": medicine_id,
+            "nickname": routine.nickname,
+            "dose": routine.dose,
+            "total_quantity": routine.total_quantity,
+            "interval_days": routine.interval_days,
+            "user_schedule_ids": user_schedule_ids,
+        }
+        try:
+            resp = await client.post(routine_url, headers=headers, json=body)
+            if resp.status_code >= 400:
+                logger.error(f"루틴 생성 API 오류 ({routine.medicine_name}): {resp.text}")
+                return {**result, "success": False, "message": f"루틴 생성 실패: {resp.text}"}
+        except httpx.RequestError as e:
+            logger.error(f"루틴 생성 요청 오류 ({routine.medicine_name}): {e}")
+            return {**result, "success": False, "message": "루틴 생성 중 네트워크 오류가 발생했습니다."}
+
+        return {**result, "success": True, "medicine_id": medicine_id, "user_schedule_ids": user_schedule_ids,
+                "message": f"'{routine.nickname}' 복약 일정이 등록되었습니다."}
+
+    async with upstream_client() as client:
+        results = await asyncio.gather(*(register_routine(client, routine) for routine in routines))
+    if any(r["success"] for r in results):
+        upstream_cache.invalidate(jwt_token, "/routine")
+
+    success_count = sum(1 for r in results if r["success"])
+    return {
+        "message": f"{len(routines)}개 중 {success_count}개 복약 일정이 등록되었습니다.",
+        "results": results
+    }
+
 
 @router.get("", operation_id="get_medicine_routine_list_by_date_detailed")  # operation_id 변경 고려
 async def get_medicine_routine_list_by_date(
         jwt_token: str = Query(description="사용자 JWT 토큰", required=True),
-        start_date: date = Query(default=datetime.now(kst).date(), description="조회 시작 날짜 (기본값: 오늘)"),
-        end_date: date = Query(default=datetime.now(kst).date(), description="조회 종료 날짜 (기본값: 오늘)")
+        start_date: Optional[date] = Query(None, description="조회 시작 날짜 (기본값: 오늘)"),
+        end_date: Optional[date] = Query(None, description="조회 종료 날짜 (기본값: 오늘)"),
+        page_size: Optional[int] = Query(
+            None, ge=1, le=ROUTINE_MAX_PAGE_SIZE,
+            description="한 번에 조회할 페이지 크기 (page_unit 단위, 미지정 시 기간이 길면 자동으로 나누어 조회)"
+        ),
+        page_unit: Literal["days", "entries"] = Query(
+            "days", description="페이지 크기 단위: days(날짜 수) / entries(복용 시간대 항목 수)"
+        ),
+        cursor: Optional[str] = Query(
+            None, description="이전 응답의 next_cursor 값 (지정하면 날짜/페이지 조건은 커서 값을 사용)"
+        )
 ):
-    url = f"{medeasy_api_url}/routine"
-    logger.info(f"사용자 복약 일정 상세 조회 시작: {start_date} ~ {end_date}")
-    params = {
-        "start_date": start_date.isoformat(),
-        "end_date": end_date.isoformat()
-    }
-    headers = {"Authorization": f"Bearer {jwt_token}", "Content-Type": "application/json"}
+    # 기본값을 시그니처에 두면 서버 시작일로 고정되므로 요청 시점의 오늘 날짜로 계산
+    today = datetime.now(kst).date()
+    start_date = start_date or today
+    end_date = end_date or today
+    logger.info(f"사용자 복약 일정 상세 조회 시작: {start_date} ~ {end_date}, cursor: {cursor is not None}")
 
-    try:
-        async with httpx.AsyncClient() as client:
-            resp = await client.get(url, headers=headers, params=params)
+    if cursor:
+        try:
+            page = RoutineCursor.decode(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    elif page_size is not None:
+        page = RoutineCursor(start_date, end_date, page_size, page_unit)
+    elif ROUTINE_AUTO_PAGE_DAYS > 0 and (end_date - start_date).days + 1 > ROUTINE_AUTO_PAGE_DAYS:
+        # 긴 기간(예: 분기 전체)은 첫 페이지를 빨리 돌려주도록 날짜 단위로 자동 분할
+        page = RoutineCursor(start_date, end_date, ROUTINE_AUTO_PAGE_DAYS)
+    else:
+        page = None
 
-        if resp.status_code >= 400:
-            try:
-                error_detail = resp.json().get("detail", resp.text)
-            except Exception:
-                error_detail = resp.text if resp.text else f"오류 코드 {resp.status_code}"
-            logger.error(f"외부 API 오류 응답 (상태 코드: {resp.status_code}): {error_detail}")
-            raise HTTPException(status_code=resp.status_code, detail=f"복약 일정 조회 실패: {error_detail}")
-
-        response_data = resp.json()
-        if "body" not in response_data:
-            logger.error(f"외부 API 응답에 'body' 필드가 없습니다: {response_data}")
-            raise HTTPException(status_code=500, detail="외부 API 응답 형식 오류: 'body' 필드 누락")
-
-        api_data_body = response_data["body"]  # 변수명 변경 data -> api_data_body
-        if not isinstance(api_data_body, list):
-            logger.error(f"외부 API 응답의 'body' 필드가 리스트가 아닙니다: {api_data_body}")
-            raise HTTPException(status_code=500, detail="외부 API 응답 형식 오류: 'body'가 리스트가 아님")
+    if page is None or page.next_date > page.end_date:
+        # 조회 도구이므로 백엔드 장애 시 마지막 응답(stale)을 표시와 함께 반환
+        api_data_body = await _fetch_routine_days(jwt_token, start_date, end_date, max_stale=ROUTINE_MAX_STALE)
+        return upstream_cache.mark_stale(
+            _routine_list_response(_build_schedule_entries(api_data_body), start_date, end_date)
+        )
+
+    if page.page_unit == "days":
+        page_end = min(page.next_date + timedelta(days=page.page_size - 1), page.end_date)
+        entries = _build_schedule_entries(
+            await _fetch_routine_days(jwt_token, page.next_date, page_end, max_stale=ROUTINE_MAX_STALE)
+        )
+        next_page = page.advance(page_end + timedelta(days=1)) if page_end < page.end_date else None
+    else:
+        entries, page_end, next_page = await _collect_schedule_entries(jwt_token, page, max_stale=ROUTINE_MAX_STALE)
+
+    response = _routine_list_response(entries, page.next_date, page_end)
+    response["has_more"] = next_page is not None
+    response["next_cursor"] = next_page.encode() if next_page is not None else None
+    if next_page is not None:
+        response["message"] += (f"\n(요청 기간 중 {page.next_date.isoformat()} ~ {page_end.isoformat()} 일정입니다. "
+                                f"이후 일정이 필요하면 cursor 값으로 next_cursor를 전달해 이어서 조회하세요.)")
+    return upstream_cache.mark_stale(response)
+
+
+async def _fetch_routine_days(jwt_token: str, start_date: date, end_date: date,
+                              max_stale: Optional[float] = None) -> list:
+    """
+    기간의 날짜별 루틴 데이터 조회 (지난 날짜는 로컬 복약 기록 저장소, 최근 날짜는 업스트림 캐시 사용)
 
+    max_stale 은 조회 도구에서만 지정합니다 (백엔드 장애 시 이 시간 이내의 마지막 응답 사용).
+    """
+    try:
+        api_data_body = await fetch_routine_days(jwt_token, start_date, end_date, max_stale)
     except httpx.RequestError as e:
         logger.error(f"외부 API 호출 중 네트워크 오류 발생: {e}")
         raise HTTPException(status_code=503, detail=f"외부 서비스 호출 중 오류가 발생했습니다: {e}")
@@ -119,9 +211,59 @@ async def get_medicine_routine_list_by_date(
             raise
         raise HTTPException(status_code=500, detail=f"서버 내부 오류가 발생했습니다: {e}")
 
+    return api_data_body
+
+
+async def iter_routine_days(start_date: date, end_date: date, jwt_token: str,
+                            chunk_days: int = ROUTINE_PAGE_FETCH_DAYS,
+                            max_stale: Optional[float] = None) -> AsyncIterator[dict]:
+    """
+    기간을 chunk_days 씩 나누어 차례로 조회하며 날짜별 루틴 데이터를 하나씩 반환
+
+    필요한 만큼 읽은 뒤 중단하면 나머지 기간은 조회하지 않습니다.
+    """
+    window_start = start_date
+    while window_start <= end_date:
+        window_end = min(window_start + timedelta(days=chunk_days - 1), end_date)
+        for day_data in await _fetch_routine_days(jwt_token, window_start, window_end, max_stale):
+            yield day_data
+        window_start = window_end + timedelta(days=1)
+
+
+async def _collect_schedule_entries(jwt_token: str, page: RoutineCursor, max_stale: Optional[float] = None) \
+        -> Tuple[List[Tuple[dict, List[str]]], date, Optional[RoutineCursor]]:
+    """
+    커서 위치부터 page_size 개의 스케줄 항목 수집 (entries 단위 페이지)
+
+    Returns:
+        (항목 목록, 페이지 마지막 날짜, 다음 페이지 커서 또는 None)
+    """
+    entries = []
+    async with aclosing(iter_routine_days(page.next_date, page.end_date, jwt_token, max_stale=max_stale)) as days:
+        async for day_data in days:
+            day_entries = _build_schedule_entries([day_data])
+            if not day_entries:
+                continue
+
+            day = date.fromisoformat(day_entries[0][0]["date"])
+            first = page.offset if day == page.next_date else 0
+            taken = day_entries[first:first + page.page_size - len(entries)]
+            entries.extend(taken)
+
+            if first + len(taken) < len(day_entries):
+                # 날짜 중간에서 페이지가 가득 참: 같은 날짜의 나머지 항목부터 이어서 조회
+                return entries, day, page.advance(day, first + len(taken))
+            if len(entries) >= page.page_size:
+                next_date = day + timedelta(days=1)
+                return entries, day, page.advance(next_date) if next_date <= page.end_date else None
+
+    return entries, page.end_date, None
+
+
+def _build_schedule_entries(api_data_body: list) -> List[Tuple[dict, List[str]]]:
+    """날짜별 루틴 데이터를 복용 시간대 항목 별 (구조화된 상세 정보, AI 메시지용 라인) 목록으로 변환"""
     now_time = datetime.now(kst).time()
-    lines_for_message = []  # AI 메시지용 라인
-    schedule_details_list = []  # 구조화된 상세 정보 리스트
+    entries = []  # (구조화된 상세 정보, AI 메시지용 라인) 목록
 
     soon_delta = timedelta(minutes=30)
     today_for_comparison = datetime.now(kst).date()
@@ -177,10 +319,10 @@ async def get_medicine_routine_list_by_date(
                 "user_schedule_id": schedule.get("user_schedule_id"),
                 "medicines": current_schedule_medicines_details
             }
-            schedule_details_list.append(schedule_info_entry)
             # --- 구조화된 데이터 생성 끝 ---
 
             # --- AI 메시지(`lines_for_message`) 생성 ---
+            lines_for_message = []
             # (1) 전체 스케줄 요약
             if not routine_dtos_data:
                 medicines_summary_str = "등록된 약 정보 없음"
@@ -210,7 +352,13 @@ async def get_medicine_routine_list_by_date(
                     lines_for_message.append(
                         f"잠시 후 {time_obj.strftime('%H시 %M분')}에 {schedule.get('name', '')} 복용 시간이 다가옵니다. 꼭 복용해 주세요!")
             # --- AI 메시지 생성 끝 ---
+            entries.append((schedule_info_entry, lines_for_message))
+
+    return entries
 
+
+def _routine_list_response(entries: List[Tuple[dict, List[str]]], start_date: date, end_date: date) -> dict:
+    lines_for_message = [line for _, lines in entries for line in lines]
     final_message_str = ""
     if not lines_for_message:  # 생성된 AI 메시지 라인이 없을 경우 (즉, 처리할 스케줄이 없었음)
         current_today_date = datetime.now(kst).date()
@@ -225,7 +373,7 @@ async def get_medicine_routine_list_by_date(
     else:
         final_message_str = "\n".join(lines_for_message)
 
-    return {"message": final_message_str, "schedule_details": schedule_details_list}
+    return {"message": final_message_str, "schedule_details": [entry for entry, _ in entries]}
 
 
 @router.patch(
@@ -237,8 +385,18 @@ async def drug_routine_completed_check(
         jwt_token: str = Query(description="Users JWT Token", required=True),
         medicine_name: str = Query(description="check routine medicine name or nickname", required=True),
         schedule_name: str = Query(description="Schedule name for when the user takes medicine", required=True,
-                                   example=["아침", "점심", "저녁", "자기 전"])
+                                   example=["아침", "점심", "저녁", "자기 전"]),
+        idempotency_key: Optional[str] = Query(None, description=IDEMPOTENCY_KEY_DESCRIPTION),
+        idempotency_header: Optional[str] = Header(None, alias=IDEMPOTENCY_KEY_HEADER, include_in_schema=False)
 ):
+    return await idempotency_store.run(
+        "drug_routine_completed_check", jwt_token, idempotency_key or idempotency_header,
+        {"medicine_name": medicine_name, "schedule_name": schedule_name},
+        lambda: _drug_routine_completed_check(jwt_token, medicine_name, schedule_name)
+    )
+
+
+async def _drug_routine_completed_check(jwt_token: str, medicine_name: str, schedule_name: str):
     logger.info(f"복약 체크 도구 호출, medicine_name : {medicine_name}, schedule_name : {schedule_name}")
 
     # 1. 오늘 루틴 데이터 조회
@@ -259,50 +417,14 @@ async def drug_routine_completed_check(
 
     schedules = today_data.get("user_schedule_dtos", [])
 
-    # 2. GPT mini를 활용한 매칭
-    matching_prompt = f"""
-다음은 사용자의 오늘 복약 일정 데이터입니다:
-{json.dumps(schedules, ensure_ascii=False, indent=2)}
-
-사용자가 체크하려는 정보:
-- 약물명: {medicine_name}
-- 시간대: {schedule_name}
-
-다음 작업을 수행해주세요:
-1. schedule_name과 가장 유사한 "name" 필드를 찾기 (예: "아침약" -> "아침")
-2. 해당 시간대에서 medicine_name과 가장 유사한 "nickname" 필드를 찾기
-3. 매칭 결과를 JSON 형태로 반환
-
-응답 형식:
-{{
-    "found": true/false,
-    "schedule_name": "매칭된 스케줄 이름",
-    "routine_id": 매칭된 routine_id,
-    "nickname": "매칭된 약물 이름",
-    "is_taken": true/false,
-    "analysis_reason": "매칭 근거와 분석 과정 설명",
-    "message": "결과 메시지"
-}}
-
-매칭 규칙:
-- 완전히 일치하지 않아도 유사한 것으로 판단
-- "약" 글자는 무시 (아침약 = 아침)
-- 약물명은 nickname에서 주요 성분명이나 상품명으로 매칭
-- 매칭되지 않으면 found: false로 설정
-- analysis_reason에는 왜 이 매칭을 선택했는지 상세한 근거를 포함
-"""
-
-    messages = [
-        {"role": "system", "content": "당신은 약물 이름과 복용 시간을 정확히 매칭하는 전문가입니다. 사용자의 입력을 분석하여 가장 적합한 매칭을 찾아주세요."},
-        {"role": "user", "content": matching_prompt}
-    ]
-
+    # 2. 매칭 백엔드(티어드 LLM structured output)를 활용한 매칭
     try:
-        response = await gpt_mini.ainvoke(messages)
-        matching_result = json.loads(response.content.strip())
-    except (json.JSONDecodeError, Exception) as e:
-        logger.error(f"GPT 응답 파싱 오류: {e}")
-        return {"message": "약물 매칭 중 오류가 발생했습니다."}
+        matching_result = (await matching_backend.match_routine(
+            "drug_routine_completed_check", schedules, medicine_name, schedule_name
+        )).model_dump()
+    except Exception as e:
+        logger.error(f"약물 매칭 오류: {e}")
+        return retryable_failure("약물 매칭 중 오류가 발생했습니다.")
 
     # 3. 매칭 결과 처리
     if not matching_result.get("found", False):
@@ -332,12 +454,15 @@ async def drug_routine_completed_check(
         "is_taken": True
     }
 
-    async with httpx.AsyncClient() as client:
+    async with upstream_client() as client:
         try:
             resp = await client.patch(check_url, headers=headers, params=params)
             if resp.status_code >= 400:
                 logger.error(f"복용 체크 API 오류: {resp.text}")
-                return {"message": "복용 체크 중 오류가 발생했습니다."}
+                return retryable_failure("복용 체크 중 오류가 발생했습니다.")
+            upstream_cache.invalidate(jwt_token, "/routine")
+            if reminder_engine is not None:
+                reminder_engine.mark_taken(user_cache_key(jwt_token), routine_ids=[routine_id])
 
             # 성공 응답
             return {
@@ -350,29 +475,120 @@ async def drug_routine_completed_check(
 
         except Exception as e:
             logger.error(f"복용 체크 요청 오류: {e}")
-            return {"message": "복용 체크 중 네트워크 오류가 발생했습니다."}
+            return retryable_failure("복용 체크 중 네트워크 오류가 발생했습니다.")
 
 
-# 보조 함수: 루틴 데이터 조회
-async def get_routine_list(start_date: date, end_date: date, jwt_token: str):
-    url = f"{medeasy_api_url}/routine"
-    params = {
-        "start_date": start_date.isoformat(),
-        "end_date": end_date.isoformat()
-    }
-    headers = {"Authorization": f"Bearer {jwt_token}", "Content-Type": "application/json"}
+@router.patch(
+    "/check/batch",
+    operation_id="drug_routines_batch_completed_check",
+    description="사용자가 여러 약(또는 여러 시간대의 약)을 한 번에 복용했다고 말할 때 한 번에 복약 체크하는 도구"
+)
+async def drug_routines_batch_completed_check(
+        jwt_token: str = Query(description="Users JWT Token", required=True),
+        items: List[RoutineCheckItem] = Body(
+            description="복용 체크할 (약물명, 시간대) 목록",
+            embed=True,
+            example=[{"medicine_name": "혈압약", "schedule_name": "아침"},
+                     {"medicine_name": "항생제", "schedule_name": "점심"}]
+        ),
+        idempotency_key: Optional[str] = Query(None, description=IDEMPOTENCY_KEY_DESCRIPTION),
+        idempotency_header: Optional[str] = Header(None, alias=IDEMPOTENCY_KEY_HEADER, include_in_schema=False)
+):
+    return await idempotency_store.run(
+        "drug_routines_batch_completed_check", jwt_token, idempotency_key or idempotency_header,
+        {"items": [item.model_dump() for item in items]},
+        lambda: _drug_routines_batch_completed_check(jwt_token, items)
+    )
+
+
+async def _drug_routines_batch_completed_check(jwt_token: str, items: List[RoutineCheckItem]):
+    logger.info(f"일괄 복약 체크 도구 호출, items : {items}")
+
+    if not items:
+        return {"message": "체크할 복약 항목이 없습니다.", "results": []}
+
+    # 1. 오늘 루틴 데이터 조회 (전체 항목에 대해 한 번만 조회)
+    today = date.today()
+    routine_data = await get_routine_list(today, today, jwt_token)
+    if not isinstance(routine_data, list) or not routine_data:
+        return {"message": "오늘 복용 일정이 없습니다.", "results": []}
+
+    schedules = routine_data[0].get("user_schedule_dtos", [])
+
+    # 2. 모든 항목을 한 번의 매칭으로 처리
+    try:
+        batch_result = await matching_backend.match_routines(
+            "drug_routines_batch_completed_check", schedules,
+            [(item.medicine_name, item.schedule_name) for item in items]
+        )
+    except Exception as e:
+        logger.error(f"일괄 약물 매칭 오류: {e}")
+        return retryable_failure("약물 매칭 중 오류가 발생했습니다.", results=[])
+
+    matches = {match.request_index: match for match in batch_result.matches}
+
+    # 3. 항목별 결과 정리 및 체크 대상 routine_id 수집 (중복 제거)
+    results = []
+    routine_ids_to_check = []
+    for index, item in enumerate(items):
+        match = matches.get(index)
+        result = {
+            "medicine_name": item.medicine_name,
+            "schedule_name": item.schedule_name,
+        }
+        if match is None or not match.found or match.routine_id is None:
+            result["status"] = "not_found"
+            result["message"] = f"'{item.medicine_name}' 약물이 '{item.schedule_name}' 시간대에서 찾을 수 없습니다."
+        elif match.is_taken:
+            result.update(status="already_taken", routine_id=match.routine_id,
+                          message=f"'{match.nickname}'는 이미 복용하신 약입니다.")
+        else:
+            result.update(status="pending", routine_id=match.routine_id,
+                          matched_schedule_name=match.schedule_name, matched_medicine_name=match.nickname)
+            if match.routine_id not in routine_ids_to_check:
+                routine_ids_to_check.append(match.routine_id)
+        results.append(result)
 
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(url, headers=headers, params=params)
-        if resp.status_code >= 400:
-            raise HTTPException(status_code=resp.status_code, detail=f"조회 실패: {resp.text}")
+    # 4. 복용 체크 API 동시 호출
+    check_url = f"{medeasy_api_url}/routine/check"
+    headers = {"Authorization": f"Bearer {jwt_token}", "Content-Type": "application/json"}
 
-        # API 응답 구조 확인 및 적절히 처리
-        response_data = resp.json()
-        if "body" in response_data:
-            return response_data["body"]  # body 필드가 있으면 그것을 반환
+    async def check_routine(client: httpx.AsyncClient, routine_id: int) -> bool:
+        try:
+            resp = await client.patch(check_url, headers=headers, params={"routine_id": routine_id, "is_taken": True})
+            if resp.status_code >= 400:
+                logger.error(f"복용 체크 API 오류 (routine_id: {routine_id}): {resp.text}")
+                return False
+            return True
+        except Exception as e:
+            logger.error(f"복용 체크 요청 오류 (routine_id: {routine_id}): {e}")
+            return False
+
+    async with upstream_client() as client:
+        check_results = await asyncio.gather(*(check_routine(client, routine_id) for routine_id in routine_ids_to_check))
+    if any(check_results):
+        upstream_cache.invalidate(jwt_token, "/routine")
+        if reminder_engine is not None:
+            reminder_engine.mark_taken(user_cache_key(jwt_token),
+                                       routine_ids=[r for r, ok in zip(routine_ids_to_check, check_results) if ok])
+    checked = dict(zip(routine_ids_to_check, check_results))
+
+    for result in results:
+        if result["status"] != "pending":
+            continue
+        if checked.get(result["routine_id"]):
+            result["status"] = "checked"
+            result["message"] = f"'{result['matched_medicine_name']}' 복용이 완료되었습니다."
         else:
-            return response_data  # 없으면 전체 데이터 반환
+            result["status"] = "failed"
+            result["message"] = "복용 체크 중 오류가 발생했습니다."
+
+    checked_count = sum(1 for r in results if r["status"] == "checked")
+    message = f"{len(items)}개 항목 중 {checked_count}개 복용 체크가 완료되었습니다."
+    if any(r["status"] == "failed" for r in results):
+        # 재시도하면 이미 체크된 항목은 already_taken 으로 매칭되어 실패한 항목만 다시 체크됨
+        return retryable_failure(message, results=results)
+    return {"message": message, "results": results}
 
 
 @router.patch(
@@ -384,8 +600,18 @@ async def drug_schedule_all_routines_completed_check(
         jwt_token: str = Query(description="Users JWT Token", required=True),
         is_all_drugs_taken: bool = Query(description="사용자가 진짜 약을 다먹었는지 여부", required=True),
         schedule_name: str = Query(description="Schedule name for when the user takes medicine", required=True,
-                                   example=["아침", "점심", "저녁", "자기 전"])
+                                   example=["아침", "점심", "저녁", "자기 전"]),
+        idempotency_key: Optional[str] = Query(None, description=IDEMPOTENCY_KEY_DESCRIPTION),
+        idempotency_header: Optional[str] = Header(None, alias=IDEMPOTENCY_KEY_HEADER, include_in_schema=False)
 ):
+    return await idempotency_store.run(
+        "drug_schedule_all_routines_completed_check", jwt_token, idempotency_key or idempotency_header,
+        {"is_all_drugs_taken": is_all_drugs_taken, "schedule_name": schedule_name},
+        lambda: _drug_schedule_all_routines_completed_check(jwt_token, is_all_drugs_taken, schedule_name)
+    )
+
+
+async def _drug_schedule_all_routines_completed_check(jwt_token: str, is_all_drugs_taken: bool, schedule_name: str):
     logger.info(f"스케줄 전체 복약 체크 도구 호출 - schedule_name: {schedule_name}, is_all_drugs_taken: {is_all_drugs_taken}")
 
     if not is_all_drugs_taken:
@@ -396,41 +622,14 @@ async def drug_schedule_all_routines_completed_check(
         schedules = await get_user_schedule(jwt_token)
     except Exception as e:
         logger.error(f"스케줄 조회 오류: {e}")
-        return {"message": "스케줄 정보를 가져오는 중 오류가 발생했습니다."}
-
-    # 2. GPT mini를 활용한 스마트 스케줄 매칭
-    matching_prompt = f"""
-다음은 사용자의 복약 스케줄 목록입니다:
-{json.dumps(schedules, ensure_ascii=False, indent=2)}
-
-사용자가 입력한 스케줄명: "{schedule_name}"
-
-다음 작업을 수행해주세요:
-1. 입력한 스케줄명과 가장 유사한 스케줄을 찾기
-2. "약" 글자는 무시하고 매칭 (예: "아침약" -> "아침")
-3. 유사성 판단 (완전 일치가 아니어도 의미상 같으면 매칭)
-
-응답 형식:
-{{
-    "found": true/false,
-    "schedule_id": 매칭된_user_schedule_id,
-    "schedule_name": "매칭된 스케줄 이름",
-    "take_time": "복용 시간",
-    "analysis_reason": "매칭 근거 설명"
-}}
-
-매칭되지 않으면 found: false로 설정해주세요.
-"""
-
-    messages = [
-        {"role": "system", "content": "당신은 사용자의 복약 스케줄을 정확히 매칭하는 전문가입니다. 입력된 스케줄명을 분석하여 가장 적합한 스케줄을 찾아주세요."},
-        {"role": "user", "content": matching_prompt}
-    ]
+        return retryable_failure("스케줄 정보를 가져오는 중 오류가 발생했습니다.")
 
+    # 2. 매칭 백엔드(티어드 LLM structured output)를 활용한 스마트 스케줄 매칭
     try:
-        response = await gpt_mini.ainvoke(messages)
-        matching_result = json.loads(response.content.strip())
-    except (json.JSONDecodeError, Exception) as e:
+        matching_result = (await matching_backend.match_schedule(
+            "drug_schedule_all_routines_completed_check", schedules, schedule_name
+        )).model_dump()
+    except Exception as e:
         logger.error(f"GPT 스케줄 매칭 오류: {e}")
         # Fallback: 기존 로직 사용
         clean_schedule_name = schedule_name.replace("약", "") if "약" in schedule_name else schedule_name
@@ -487,12 +686,15 @@ async def drug_schedule_all_routines_completed_check(
     }
     headers = {"Authorization": f"Bearer {jwt_token}", "Content-Type": "application/json"}
 
-    async with httpx.AsyncClient() as client:
+    async with upstream_client() as client:
         try:
             resp = await client.patch(url, headers=headers, params=params)
             if resp.status_code >= 400:
                 logger.error(f"스케줄 전체 체크 API 오류: {resp.text}")
-                return {"message": "복용 체크 중 오류가 발생했습니다. 잠시 후 다시 시도해주세요."}
+                return retryable_failure("복용 체크 중 오류가 발생했습니다. 잠시 후 다시 시도해주세요.")
+            upstream_cache.invalidate(jwt_token, "/routine")
+            if reminder_engine is not None:
+                reminder_engine.mark_taken(user_cache_key(jwt_token), user_schedule_id=schedule_id)
 
             # 성공 응답
             response_data = resp.json()
@@ -507,51 +709,60 @@ async def drug_schedule_all_routines_completed_check(
 
         except Exception as e:
             logger.error(f"스케줄 전체 체크 요청 오류: {e}")
-            return {"message": "복용 체크 중 네트워크 오류가 발생했습니다."}
-
-
-# 보조 함수들
-async def get_user_schedule(jwt_token: str):
-    """사용자 스케줄 조회"""
-    url = f"{medeasy_api_url}/user/schedule"
-    headers = {"Authorization": f"Bearer {jwt_token}", "Content-Type": "application/json"}
+            return retryable_failure("복용 체크 중 네트워크 오류가 발생했습니다.")
 
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(url, headers=headers)
-        if resp.status_code >= 400:
-            raise HTTPException(status_code=resp.status_code, detail=f"스케줄 조회 실패: {resp.text}")
 
-        response_data = resp.json()
-        if "body" in response_data:
-            return response_data["body"]
-        else:
-            return response_data
+@router.get(
+    "/adherence",
+    operation_id="get_medication_adherence_summary",
+    description="기간 동안 약을 얼마나 잘 챙겨 먹었는지(복용률)를 약/시간대/요일별로 요약하고 연속 복용 일수와 늦게 먹는 패턴을 알려주는 도구 "
+                "(예: '이번 달 얼마나 잘 먹었어?', '어떤 약을 자주 빼먹어?')"
+)
+async def get_medication_adherence_summary(
+        jwt_token: str = Query(description="사용자 JWT 토큰", required=True),
+        start_date: Optional[date] = Query(None, description="분석 시작 날짜 (기본값: 이번 달 1일)"),
+        end_date: Optional[date] = Query(None, description="분석 종료 날짜 (기본값: 오늘)"),
+        late_threshold_minutes: int = Query(30, ge=0, le=720, description="예정 시각보다 이 시간(분) 이상 늦으면 지연 복용으로 판단")
+):
+    now = datetime.now(kst).replace(tzinfo=None)
+    end_date = end_date or now.date()
+    start_date = start_date or end_date.replace(day=1)
+    logger.info(f"복약 순응도 분석 도구 호출: {start_date} ~ {end_date}")
+
+    if start_date > end_date:
+        raise HTTPException(status_code=400, detail="분석 시작 날짜가 종료 날짜보다 늦습니다.")
+    if (end_date - start_date).days + 1 > ADHERENCE_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"분석 기간은 최대 {ADHERENCE_MAX_DAYS}일까지 가능합니다.")
+
+    api_data_body = await _fetch_routine_days(jwt_token, start_date, end_date, max_stale=ROUTINE_MAX_STALE)
+    # 원본 루틴 목록 대신 컬럼형 배열로 집계한 요약만 반환
+    summary = summarize_adherence(to_columns(api_data_body, start_date), now, late_threshold_minutes)
+    return upstream_cache.mark_stale({
+        "message": adherence_message(summary, start_date, end_date),
+        "start_date": start_date.isoformat(),
+        "end_date": end_date.isoformat(),
+        **summary
+    })
 
 
+# 보조 함수: 루틴 데이터 조회
 async def get_routine_list(start_date: date, end_date: date, jwt_token: str):
-    """루틴 리스트 조회"""
-    url = f"{medeasy_api_url}/routine"
+    """루틴 리스트 조회 (사용자별 업스트림 캐시 사용)"""
     params = {
         "start_date": start_date.isoformat(),
-        "end_date": end_date.isoformat(),
-        "jwt_token": jwt_token  # JWT 토큰도 파라미터로 전달하는 경우
+        "end_date": end_date.isoformat()
     }
-    headers = {"Authorization": f"Bearer {jwt_token}", "Content-Type": "application/json"}
-
-    async with httpx.AsyncClient() as client:
-        # GET 요청에서는 params를 사용하여 query parameter로 전달
-        resp = await client.get(url, headers=headers, params=params)
-        if resp.status_code >= 400:
-            logger.error(f"루틴 조회 API 오류 - Status: {resp.status_code}, Response: {resp.text}")
-            raise HTTPException(status_code=resp.status_code, detail=f"루틴 조회 실패: {resp.text}")
 
-        response_data = resp.json()
-        logger.info(f"루틴 조회 성공 - Response: {response_data}")
+    try:
+        response_data = await upstream_cache.get_json("/routine", jwt_token, params, ttl=ROUTINE_CACHE_TTL)
+    except HTTPException as e:
+        logger.error(f"루틴 조회 API 오류 - Status: {e.status_code}, Response: {e.detail}")
+        raise HTTPException(status_code=e.status_code, detail=f"루틴 조회 실패: {e.detail}")
 
-        if "body" in response_data:
-            return response_data["body"]
-        else:
-            return response_data
+    if "body" in response_data:
+        return response_data["body"]
+    else:
+        return response_data
 
 
 def get_schedule_status(routine_data, schedule_name):
@@ -1,11 +1,14 @@
 import logging
 import os
 from datetime import date, datetime, time
+from typing import Optional
 
-import httpx
 import pytz
-from fastapi import APIRouter, FastAPI, Query, HTTPException
+from fastapi import APIRouter, FastAPI, Query, HTTPException, Header
 from dotenv import load_dotenv
+from service.call_accounting import upstream_client
+from service.idempotency import IDEMPOTENCY_KEY_DESCRIPTION, IDEMPOTENCY_KEY_HEADER, idempotency_store
+from service.upstream_cache import upstream_cache
 from service.user_schedule_service import get_user_schedule, mapping_user_schedule_ids
 
 load_dotenv()
@@ -28,13 +31,29 @@ router = APIRouter(
 async def modify_schedule_time(
         jwt_token: str = Query(description="Users JWT Token", required=True),
         user_schedule_name: str = Query(description="Schedule name for when the user takes medicine", required=True),
-        take_time: time = Query(default=datetime.now(kst).time(), required=True, description="Time to take"),
+        take_time: Optional[time] = Query(None, description="Time to take (defaults to the current time)"),
+        idempotency_key: Optional[str] = Query(None, description=IDEMPOTENCY_KEY_DESCRIPTION),
+        idempotency_header: Optional[str] = Header(None, alias=IDEMPOTENCY_KEY_HEADER, include_in_schema=False)
 ):
+    # 요청 파라미터 그대로 멱등성 지문을 만들어야 take_time 없이 재시도해도 저장된 결과가 반환됨
+    return await idempotency_store.run(
+        "modify_medicine_routine_schedule_time", jwt_token, idempotency_key or idempotency_header,
+        {"user_schedule_name": user_schedule_name, "take_time": take_time.isoformat() if take_time else None},
+        lambda: _modify_schedule_time(jwt_token, user_schedule_name, take_time)
+    )
+
+
+async def _modify_schedule_time(jwt_token: str, user_schedule_name: str, take_time: Optional[time]):
+    # 기본값을 시그니처에 두면 import 시각으로 고정되고 OpenAPI 문서(MCP 매니페스트 캐시 키)도 매번 바뀌므로 요청 시점에 계산
+    if take_time is None:
+        take_time = datetime.now(kst).time()
+
     # user_schedules 조회
     schedules = await get_user_schedule(jwt_token)
 
     # OpenAI로 입력받은 user_schedule_names와 어울리는 user_schedule_id 추출
-    matched_ids=await mapping_user_schedule_ids(schedules, [user_schedule_name])
+    matched_ids=await mapping_user_schedule_ids(schedules, [user_schedule_name],
+                                             operation_id="modify_medicine_routine_schedule_time")
 
     if not matched_ids:
         return {"message": f"'{user_schedule_name}'에 해당하는 스케줄이 없습니다."}
@@ -48,8 +67,9 @@ async def modify_schedule_time(
         "take_time": take_time.strftime("%H:%M:%S")
     }
 
-    async with httpx.AsyncClient() as client:
+    async with upstream_client() as client:
         resp = await client.patch(user_schedule_url, headers=headers, json=body)
         if resp.status_code >= 400:
             raise HTTPException(status_code=resp.status_code, detail=f"복약 시간 변경 실패: {resp.text}")
+        upstream_cache.invalidate(jwt_token, "/user/schedule", "/routine")
         return resp.json()
\ No newline at end of file
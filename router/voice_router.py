@@ -1,15 +1,22 @@
+import asyncio
 import logging
 import os
+from dataclasses import replace
 from datetime import date, datetime, time
 from typing import Optional
 
 import httpx
 import pytz
-from fastapi import APIRouter, FastAPI, Query, HTTPException
+from fastapi import APIRouter, Body, FastAPI, Query, HTTPException, Header
+from fastapi.responses import Response
 from dotenv import load_dotenv
 
 from auth.jwt_token_helper import get_user_id_from_token
+from service.idempotency import IDEMPOTENCY_KEY_DESCRIPTION, IDEMPOTENCY_KEY_HEADER, idempotency_store
+from service.tts_service import tts_service
 from voice import AVAILABLE_SPEAKERS, voice_setting_repo
+from voice.tts_cache import AUDIO_MEDIA_TYPES, MmapResponse
+from voice.voice_setting import VoiceSettings
 
 load_dotenv()
 logger = logging.getLogger(__name__)
@@ -62,7 +69,9 @@ async def update_voice_setting(
             example=2,
             ge=-5,
             le=5
-        )
+        ),
+        idempotency_key: Optional[str] = Query(None, description=IDEMPOTENCY_KEY_DESCRIPTION),
+        idempotency_header: Optional[str] = Header(None, alias=IDEMPOTENCY_KEY_HEADER, include_in_schema=False)
 ):
     """
     사용자별 커스텀 AI TTS 음성 설정을 부분 업데이트합니다.
@@ -83,6 +92,16 @@ async def update_voice_setting(
     Returns:
         음성 설정 업데이트 결과 및 현재 설정 정보
     """
+    # 상대값(+/-) 변경은 재시도 시 두 번 적용되므로 멱등성 키로 재실행 방지
+    return await idempotency_store.run(
+        "update_user_custom_agent_voice", jwt_token, idempotency_key or idempotency_header,
+        {"speaker": speaker, "speed": speed, "pitch": pitch, "volume": volume},
+        lambda: _update_voice_setting(jwt_token, speaker, speed, pitch, volume)
+    )
+
+
+async def _update_voice_setting(jwt_token: str, speaker: Optional[str], speed: Optional[int],
+                                pitch: Optional[int], volume: Optional[int]):
     try:
         # JWT 토큰에서 사용자 ID 추출
         user_id = get_user_id_from_token(jwt_token)
@@ -93,8 +112,9 @@ async def update_voice_setting(
         if not voice_setting_repo:
             raise HTTPException(status_code=503, detail="음성 설정 서비스를 사용할 수 없습니다")
 
-        # 기존 사용자 설정 조회 (없으면 기본값 생성 및 저장)
-        current_settings = voice_setting_repo.get_or_default(user_id)
+        # 기존 사용자 설정 조회 (없으면 기본값, 아래에서 변경된 설정과 함께 한 번만 저장)
+        # 동기 Redis 호출이므로 스레드에서 실행 (이벤트 루프가 멈추지 않도록)
+        current_settings = await asyncio.to_thread(voice_setting_repo.get, user_id) or VoiceSettings()
 
         logger.info(f"사용자 {user_id} 현재 설정: speaker={current_settings.speaker}, "
                     f"speed={current_settings.speed}, pitch={current_settings.pitch}, volume={current_settings.volume}")
@@ -146,16 +166,14 @@ async def update_voice_setting(
 
         logger.info(f"사용자 {user_id} 음성 설정 계산 결과: {'; '.join(calculation_log)}")
 
-        # 계산된 값으로 업데이트 실행
-        success = voice_setting_repo.update(user_id, **update_fields)
+        # 계산된 값으로 업데이트 실행 (조회한 설정에 바로 반영하여 Redis 재조회 없이 저장)
+        updated_settings = replace(current_settings, **update_fields)
+        success = await asyncio.to_thread(voice_setting_repo.save, user_id, updated_settings)
 
         if not success:
             logger.error(f"사용자 {user_id} 음성 설정 업데이트 실패")
             raise HTTPException(status_code=500, detail="음성 설정 업데이트에 실패했습니다")
 
-        # 업데이트된 전체 설정 조회
-        updated_settings = voice_setting_repo.get_or_default(user_id)
-
         logger.info(f"사용자 {user_id} 음성 설정 업데이트 완료")
 
         return {
@@ -196,6 +214,40 @@ async def update_voice_setting(
         raise HTTPException(status_code=500, detail=f"서버 오류: {str(e)}")
 
 
+@router.post(
+    path="/voice/tts",
+    operation_id="synthesize_user_voice",
+    description="사용자 음성 설정으로 문장을 TTS 합성한 오디오 반환 (같은 문장/설정은 캐시에서 재사용)",
+    summary="사용자 음성으로 TTS 합성"
+)
+async def synthesize_user_voice(
+        jwt_token: str = Query(description="Users JWT Token", required=True),
+        text: str = Body(description="합성할 문장", embed=True, min_length=1, max_length=1000)
+):
+    try:
+        user_id = get_user_id_from_token(jwt_token)
+    except ValueError as e:
+        raise HTTPException(status_code=401, detail=f"유효하지 않은 JWT 토큰: {e}")
+
+    if tts_service is None:
+        raise HTTPException(status_code=503, detail="TTS 서비스를 사용할 수 없습니다")
+
+    # 조회만 하므로 설정이 없어도 기본값을 저장하지 않음
+    settings = await asyncio.to_thread(voice_setting_repo.get, user_id) or VoiceSettings()
+
+    try:
+        key, audio, hit = await tts_service.get_audio(text, settings)
+    except Exception as e:
+        logger.error(f"TTS 합성 실패: {user_id}, {e}")
+        raise HTTPException(status_code=502, detail=f"TTS 합성 실패: {e}")
+
+    media_type = AUDIO_MEDIA_TYPES.get(settings.format, "application/octet-stream")
+    headers = {"ETag": f'"{key}"', "X-TTS-Cache": "HIT" if hit else "MISS"}
+    if hit:
+        return MmapResponse(audio, media_type=media_type, headers=headers)
+    return Response(content=audio, media_type=media_type, headers=headers)
+
+
 def clamp_value(value: int, min_val: int = -5, max_val: int = 5) -> int:
     """
     값을 지정된 범위로 제한
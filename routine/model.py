@@ -16,4 +16,8 @@ class RoutineCreationRequest(BaseModel):
     dose: int           # 복용량
     total_quantity: int # 총 수량
     interval_days: int  # 복용 간격(일)
-    schedule_times: List[str]  # 사용자가 선택한 시간대 (예: "아침", "점심", "저녁")
\ No newline at end of file
+    schedule_times: List[str]  # 사용자가 선택한 시간대 (예: "아침", "점심", "저녁")
+
+class RoutineCheckItem(BaseModel):
+    medicine_name: str  # 복용한 약 이름 또는 별명
+    schedule_name: str  # 복용 시간대 (예: "아침", "점심", "저녁")
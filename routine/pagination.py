@@ -0,0 +1,65 @@
+import base64
+import binascii
+import json
+from dataclasses import dataclass, replace
+from datetime import date
+
+# 페이지 크기 단위: 날짜 수 / 스케줄(시간대) 항목 수
+PAGE_UNITS = ("days", "entries")
+# 페이지 크기 상한 (쿼리 파라미터와 커서 모두 적용, 커서로 한 번에 조회하는 범위가 커지지 않도록)
+ROUTINE_MAX_PAGE_SIZE = 100
+
+
+@dataclass(frozen=True)
+class RoutineCursor:
+    """
+    복약 일정 상세 조회의 다음 페이지 위치
+
+    에이전트에게는 불투명한 문자열로 전달되며, 이 값만 다시 보내면 같은 조건으로 이어서 조회합니다.
+    """
+
+    next_date: date  # 다음 페이지가 시작하는 날짜
+    end_date: date  # 원래 요청한 조회 종료 날짜
+    page_size: int
+    page_unit: str = "days"
+    offset: int = 0  # entries 단위에서 next_date 의 앞쪽 스케줄 중 이미 반환한 개수
+
+    def advance(self, next_date: date, offset: int = 0) -> "RoutineCursor":
+        return replace(self, next_date=next_date, offset=offset)
+
+    def encode(self) -> str:
+        payload = {
+            "n": self.next_date.isoformat(),
+            "e": self.end_date.isoformat(),
+            "s": self.page_size,
+            "u": self.page_unit,
+            "o": self.offset,
+        }
+        raw = json.dumps(payload, separators=(",", ":")).encode()
+        return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+    @classmethod
+    def decode(cls, cursor: str) -> "RoutineCursor":
+        """
+        커서 문자열 해석
+
+        Raises:
+            ValueError: 형식이 잘못되었거나 값이 유효하지 않은 커서
+        """
+        try:
+            raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+            payload = json.loads(raw)
+            decoded = cls(
+                next_date=date.fromisoformat(payload["n"]),
+                end_date=date.fromisoformat(payload["e"]),
+                page_size=int(payload["s"]),
+                page_unit=payload.get("u", "days"),
+                offset=int(payload.get("o", 0)),
+            )
+        except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"잘못된 커서입니다: {e}") from e
+
+        if decoded.page_unit not in PAGE_UNITS or not 1 <= decoded.page_size <= ROUTINE_MAX_PAGE_SIZE \
+                or decoded.offset < 0 or decoded.next_date > decoded.end_date:
+            raise ValueError("잘못된 커서입니다: 범위를 벗어난 값")
+        return decoded
@@ -0,0 +1,255 @@
+import logging
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List
+
+import numpy as np
+
+from reminder.engine import parse_take_time
+
+logger = logging.getLogger(__name__)
+
+WEEKDAY_NAMES = ("월", "화", "수", "목", "금", "토", "일")
+
+
+@dataclass
+class RoutineColumns:
+    """
+    복용 기록(routine_dtos) 한 건을 한 행으로 펼친 컬럼형 배열
+
+    이름 컬럼은 정수 코드로 저장하고 실제 이름은 *_names 목록에 둡니다.
+    """
+
+    day: np.ndarray  # 시작일 기준 일(day) 번호 (int32)
+    weekday: np.ndarray  # 0=월 ~ 6=일 (int8)
+    schedule: np.ndarray  # 시간대 코드 (int32)
+    medicine: np.ndarray  # 약 코드 (int32)
+    minute: np.ndarray  # 예정 복용 시각, 자정 이후 분 (int32)
+    taken: np.ndarray  # 복용 여부 (bool)
+    delay: np.ndarray  # 실제 복용 시각 - 예정 시각(분), 복용 시각 정보가 없으면 NaN (float64)
+    schedule_names: List[str]
+    medicine_names: List[str]
+    start_date: date
+
+    def __len__(self) -> int:
+        return len(self.taken)
+
+
+def to_columns(days: Iterable[Dict[str, Any]], start_date: date) -> RoutineColumns:
+    """
+    /routine 응답(날짜 → user_schedule_dtos → routine_dtos)을 컬럼형 배열로 변환
+
+    중첩 구조를 한 번만 순회하며 형식이 잘못된 항목은 건너뜁니다.
+    """
+    day_col, schedule_col, medicine_col, minute_col, taken_col, delay_col = [], [], [], [], [], []
+    schedule_codes: Dict[str, int] = {}
+    medicine_codes: Dict[str, int] = {}
+    start_ordinal = start_date.toordinal()
+
+    for day_data in days:
+        if not isinstance(day_data, dict):
+            continue
+        try:
+            routine_date = date.fromisoformat(day_data["take_date"])
+        except (KeyError, TypeError, ValueError):
+            logger.warning(f"복약 분석: 날짜 형식이 잘못된 데이터 건너뜀: {day_data.get('take_date')}")
+            continue
+        day_index = routine_date.toordinal() - start_ordinal
+
+        for schedule in day_data.get("user_schedule_dtos") or []:
+            if not isinstance(schedule, dict):
+                continue
+            try:
+                minute = parse_take_time(schedule.get("take_time") or "") // 60
+            except ValueError:
+                continue
+            schedule_code = schedule_codes.setdefault(schedule.get("name") or "알 수 없는 시간대", len(schedule_codes))
+
+            for routine in schedule.get("routine_dtos") or []:
+                if not isinstance(routine, dict):
+                    continue
+                name = routine.get("nickname") or routine.get("medicine_id") or "알 수 없는 약"
+                day_col.append(day_index)
+                schedule_col.append(schedule_code)
+                medicine_col.append(medicine_codes.setdefault(name, len(medicine_codes)))
+                minute_col.append(minute)
+                taken_col.append(bool(routine.get("is_taken", False)))
+                delay_col.append(_taken_delay(routine.get("taken_at"), routine_date, minute))
+
+    day = np.array(day_col, dtype=np.int32)
+    return RoutineColumns(
+        day=day,
+        weekday=((day + start_date.weekday()) % 7).astype(np.int8),
+        schedule=np.array(schedule_col, dtype=np.int32),
+        medicine=np.array(medicine_col, dtype=np.int32),
+        minute=np.array(minute_col, dtype=np.int32),
+        taken=np.array(taken_col, dtype=bool),
+        delay=np.array(delay_col, dtype=np.float64),
+        schedule_names=list(schedule_codes),
+        medicine_names=list(medicine_codes),
+        start_date=start_date,
+    )
+
+
+def _taken_delay(taken_at: Any, routine_date: date, minute: int) -> float:
+    """백엔드가 실제 복용 시각(taken_at)을 주는 경우 예정 시각 대비 지연(분), 없으면 NaN"""
+    if not taken_at:
+        return np.nan
+    try:
+        taken = datetime.fromisoformat(str(taken_at))
+    except ValueError:
+        return np.nan
+    return (taken.date().toordinal() - routine_date.toordinal()) * 1440 + taken.hour * 60 + taken.minute - minute
+
+
+def _rate(taken: np.ndarray, due: np.ndarray) -> np.ndarray:
+    """복용률 (분모가 0이면 NaN)"""
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(due > 0, taken / np.maximum(due, 1), np.nan)
+
+
+def _group(codes: np.ndarray, taken: np.ndarray, size: int):
+    due = np.bincount(codes, minlength=size)
+    taken_count = np.bincount(codes, weights=taken, minlength=size).astype(np.int64)
+    return due, taken_count, _rate(taken_count, due)
+
+
+def _group_rows(names: List[str], due: np.ndarray, taken: np.ndarray, rate: np.ndarray, key: str) -> List[Dict[str, Any]]:
+    rows = [
+        {key: names[index], "due": int(due[index]), "taken": int(taken[index]), "adherence": round(float(rate[index]), 4)}
+        for index in np.flatnonzero(due)
+    ]
+    # 복용률이 낮은 항목부터 (에이전트가 개선점을 바로 언급할 수 있도록)
+    return sorted(rows, key=lambda row: (row["adherence"], -row["due"]))
+
+
+def _streaks(perfect: np.ndarray) -> Dict[str, int]:
+    """모든 예정 약을 복용한 날의 현재/최장 연속 일수"""
+    if not len(perfect):
+        return {"current_days": 0, "longest_days": 0, "perfect_days": 0}
+    padded = np.concatenate(([0], perfect.astype(np.int8), [0]))
+    edges = np.diff(padded)
+    lengths = np.flatnonzero(edges == -1) - np.flatnonzero(edges == 1)
+    return {
+        "current_days": int(lengths[-1]) if perfect[-1] else 0,
+        "longest_days": int(lengths.max()) if len(lengths) else 0,
+        "perfect_days": int(perfect.sum()),
+    }
+
+
+def summarize_adherence(columns: RoutineColumns, now: datetime, late_threshold_minutes: int = 30) -> Dict[str, Any]:
+    """
+    복용 시각이 지난 기록만(오늘 미복용 기록은 유예 시간 이후) 대상으로 약/시간대/요일별 복용률, 연속 복용 일수, 지연 복용 패턴 계산
+
+    Args:
+        columns: to_columns 결과
+        now: 현재 시각 (KST, tz 정보 없음)
+        late_threshold_minutes: 예정 시각보다 이 시간 이상 늦으면 지연/미복용으로 판단
+    """
+    now_day = now.date().toordinal() - columns.start_date.toordinal()
+    now_minute = now.hour * 60 + now.minute
+
+    # 아직 복용 시각이 오지 않았거나, 복용 시각이 지났어도 late_threshold_minutes 유예 중인 미복용 기록은 제외
+    # (복용 시각이 되자마자 오늘 복용률과 연속 복용 일수가 떨어지지 않도록)
+    due_today = (columns.minute + late_threshold_minutes <= now_minute) | (columns.taken & (columns.minute <= now_minute))
+    due_mask = (columns.day < now_day) | ((columns.day == now_day) & due_today)
+    day = columns.day[due_mask]
+    taken = columns.taken[due_mask]
+    total_due, total_taken = int(due_mask.sum()), int(taken.sum())
+
+    by_medicine = _group_rows(columns.medicine_names, *_group(columns.medicine[due_mask], taken,
+                                                              len(columns.medicine_names)), key="medicine_name")
+    by_schedule = _group_rows(columns.schedule_names, *_group(columns.schedule[due_mask], taken,
+                                                              len(columns.schedule_names)), key="schedule_name")
+    weekday_due, weekday_taken, weekday_rate = _group(columns.weekday[due_mask].astype(np.int32), taken, 7)
+    by_weekday = [
+        {"weekday": WEEKDAY_NAMES[index], "due": int(weekday_due[index]), "taken": int(weekday_taken[index]),
+         "adherence": round(float(weekday_rate[index]), 4)}
+        for index in np.flatnonzero(weekday_due)
+    ]
+
+    # 날짜별 예정/복용 수 → 모든 약을 복용한 날(예정 약이 없는 날은 연속 계산에서 제외)
+    if total_due:
+        offset = int(day.min())
+        day_due = np.bincount(day - offset)
+        day_taken = np.bincount(day - offset, weights=taken)
+        has_due = day_due > 0
+        streaks = _streaks((day_taken >= day_due)[has_due])
+        days_with_doses = int(has_due.sum())
+    else:
+        streaks, days_with_doses = _streaks(np.zeros(0, dtype=bool)), 0
+
+    return {
+        "overall": {"due": total_due, "taken": total_taken,
+                    "adherence": round(total_taken / total_due, 4) if total_due else None},
+        "days_with_doses": days_with_doses,
+        "by_medicine": by_medicine,
+        "by_schedule": by_schedule,
+        "by_weekday": by_weekday,
+        "streaks": streaks,
+        "late": _late_pattern(columns, due_mask, now_day, now_minute, late_threshold_minutes),
+    }
+
+
+def _late_pattern(columns: RoutineColumns, due_mask: np.ndarray, now_day: int, now_minute: int,
+                  threshold: int) -> Dict[str, Any]:
+    # 지금 시점에 예정 시각 + threshold가 지났는데 아직 복용하지 않은 오늘 약
+    overdue = (columns.day == now_day) & ~columns.taken & (columns.minute + threshold <= now_minute)
+    late = {
+        "threshold_minutes": threshold,
+        "overdue_now": [columns.medicine_names[code] for code in np.unique(columns.medicine[overdue])],
+        "timed_doses": 0,
+    }
+
+    delay = columns.delay[due_mask & columns.taken]
+    timed = ~np.isnan(delay)
+    if not timed.any():
+        # 백엔드가 실제 복용 시각을 주지 않으면 지연 패턴은 계산할 수 없음
+        return late
+
+    delay = delay[timed]
+    schedule = columns.schedule[due_mask & columns.taken][timed]
+    is_late = delay >= threshold
+    size = len(columns.schedule_names)
+    timed_count = np.bincount(schedule, minlength=size)
+    late_count = np.bincount(schedule, weights=is_late, minlength=size)
+    late_rate = _rate(late_count, timed_count)
+    late.update(
+        timed_doses=int(timed.sum()),
+        late_doses=int(is_late.sum()),
+        late_rate=round(float(is_late.mean()), 4),
+        median_delay_minutes=round(float(np.median(delay)), 1),
+        late_rate_by_schedule={
+            columns.schedule_names[index]: round(float(late_rate[index]), 4) for index in np.flatnonzero(timed_count)
+        },
+    )
+    return late
+
+
+def adherence_message(summary: Dict[str, Any], start_date: date, end_date: date) -> str:
+    """요약 결과를 에이전트가 그대로 읽을 수 있는 한국어 문장으로 정리"""
+    overall = summary["overall"]
+    period = f"{start_date.isoformat()} ~ {end_date.isoformat()}"
+    if not overall["due"]:
+        return f"{period} 기간에 복용 시각이 지난 복약 일정이 없습니다."
+
+    lines = [f"{period} 복용률 {overall['adherence'] * 100:.1f}% ({overall['taken']}/{overall['due']}회)"]
+    if summary["by_medicine"] and summary["by_medicine"][0]["adherence"] < 1:
+        worst = summary["by_medicine"][0]
+        lines.append(f"가장 자주 빠뜨린 약: {worst['medicine_name']} ({worst['adherence'] * 100:.1f}%)")
+    if summary["by_schedule"] and summary["by_schedule"][0]["adherence"] < 1:
+        worst = summary["by_schedule"][0]
+        lines.append(f"가장 자주 빠뜨린 시간대: {worst['schedule_name']} ({worst['adherence'] * 100:.1f}%)")
+    if summary["by_weekday"]:
+        worst = min(summary["by_weekday"], key=lambda row: row["adherence"])
+        if worst["adherence"] < 1:
+            lines.append(f"복용률이 가장 낮은 요일: {worst['weekday']}요일 ({worst['adherence'] * 100:.1f}%)")
+    streaks = summary["streaks"]
+    lines.append(f"모든 약을 챙겨 먹은 연속 일수: 현재 {streaks['current_days']}일, 최장 {streaks['longest_days']}일")
+    late = summary["late"]
+    if late.get("timed_doses"):
+        lines.append(f"{late['threshold_minutes']}분 이상 늦게 복용한 비율: {late['late_rate'] * 100:.1f}% "
+                     f"(지연 중앙값 {late['median_delay_minutes']}분)")
+    if late["overdue_now"]:
+        lines.append(f"지금 복용 시간이 지난 약: {', '.join(late['overdue_now'])}")
+    return "\n".join(lines)
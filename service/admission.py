@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import math
+import os
+import time
+from collections import Counter, deque
+from typing import Any, Deque, Dict, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from llm.dispatcher import PRIORITY_INFO, PRIORITY_NAMES, PRIORITY_WRITE, operation_priority
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+ADMISSION_CONTROL_ENABLED = os.getenv("ADMISSION_CONTROL_ENABLED", "true").lower() == "true"
+LOOP_LAG_SAMPLE_INTERVAL_MS = float(os.getenv("LOOP_LAG_SAMPLE_INTERVAL_MS", "100"))
+# 이벤트 루프 지연이 이 값을 넘으면 조회성 도구 호출 거절, CRITICAL 을 넘으면 쓰기 도구 호출도 거절
+LOOP_LAG_SHED_MS = float(os.getenv("LOOP_LAG_SHED_MS", "250"))
+LOOP_LAG_CRITICAL_MS = float(os.getenv("LOOP_LAG_CRITICAL_MS", "1000"))
+# 처리 중인 도구 호출 수 기준 (위와 같은 단계)
+ADMISSION_MAX_IN_FLIGHT = int(os.getenv("ADMISSION_MAX_IN_FLIGHT", "64"))
+ADMISSION_MAX_IN_FLIGHT_CRITICAL = int(os.getenv("ADMISSION_MAX_IN_FLIGHT_CRITICAL", "128"))
+ADMISSION_RETRY_AFTER_SECONDS = int(os.getenv("ADMISSION_RETRY_AFTER_SECONDS", "2"))
+
+# 지연 평활 계수 (샘플 하나의 튐으로 거절이 켜졌다 꺼졌다 하지 않도록)
+LAG_EWMA_ALPHA = 0.3
+# 통계용 최근 샘플 수 (100ms 간격 기준 약 1분)
+LAG_WINDOW_SAMPLES = 600
+
+
+class LoopLagMonitor:
+    """
+    이벤트 루프 지연 측정
+
+    interval 마다 잠들었다 깨어난 시각이 예정보다 얼마나 늦었는지를 지연으로 기록합니다.
+    루프가 막혀 있는 동안에는 샘플러도 실행되지 못하므로, 예정 시각을 지난 시간도 현재 지연으로 봅니다.
+    """
+
+    def __init__(self, interval_ms: float = LOOP_LAG_SAMPLE_INTERVAL_MS):
+        self.interval = interval_ms / 1000
+        self.ewma_ms = 0.0
+        self.last_ms = 0.0
+        self.max_ms = 0.0
+        self.samples = 0
+        self._window: Deque[float] = deque(maxlen=LAG_WINDOW_SAMPLES)
+        self._expected_wakeup: Optional[float] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self) -> None:
+        if self._task is not None:
+            return
+        self._task = asyncio.create_task(self._sample_loop())
+        logger.info(f"✅ event loop lag monitor started (interval: {self.interval * 1000:.0f}ms)")
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        self._expected_wakeup = None
+
+    async def _sample_loop(self) -> None:
+        while True:
+            self._expected_wakeup = time.perf_counter() + self.interval
+            await asyncio.sleep(self.interval)
+            self.record(max(0.0, (time.perf_counter() - self._expected_wakeup) * 1000))
+
+    def record(self, lag_ms: float) -> None:
+        self.last_ms = lag_ms
+        self.ewma_ms = lag_ms if not self.samples else LAG_EWMA_ALPHA * lag_ms + (1 - LAG_EWMA_ALPHA) * self.ewma_ms
+        self.max_ms = max(self.max_ms, lag_ms)
+        self.samples += 1
+        self._window.append(lag_ms)
+
+    def current_ms(self) -> float:
+        """거절 판단에 쓰는 현재 지연 (평활값과 샘플러가 깨어나지 못한 시간 중 큰 값)"""
+        overdue = 0.0
+        if self._expected_wakeup is not None:
+            overdue = (time.perf_counter() - self._expected_wakeup) * 1000
+        return max(self.ewma_ms, overdue)
+
+    def stats(self) -> Dict[str, Any]:
+        window = sorted(self._window)
+
+        def percentile(p: float) -> float:
+            return round(window[min(len(window) - 1, int(len(window) * p))], 1) if window else 0.0
+
+        return {
+            "running": self._task is not None,
+            "interval_ms": round(self.interval * 1000, 1),
+            "samples": self.samples,
+            "current_ms": round(self.current_ms(), 1),
+            "last_ms": round(self.last_ms, 1),
+            "ewma_ms": round(self.ewma_ms, 1),
+            "p50_ms": percentile(0.5),
+            "p99_ms": percentile(0.99),
+            "max_ms": round(self.max_ms, 1),
+        }
+
+
+class AdmissionController:
+    """
+    이벤트 루프 지연과 처리 중인 도구 호출 수로 새 도구 호출의 수락 여부 결정
+
+    - 지연 또는 처리 중 호출 수가 1단계 기준을 넘으면 조회성(info) 도구 호출 거절
+    - 2단계(critical) 기준을 넘으면 일정 등록/수정 등 쓰기 도구 호출도 거절
+    - 복약 체크는 사용자가 방금 약을 먹었다는 기록이므로 거절하지 않음
+    거절된 호출은 503 과 Retry-After 로 응답하며, 헬스 체크와 내부 엔드포인트는 판단 대상이 아닙니다.
+    """
+
+    def __init__(self, monitor: LoopLagMonitor, lag_shed_ms: float = LOOP_LAG_SHED_MS,
+                 lag_critical_ms: float = LOOP_LAG_CRITICAL_MS, max_in_flight: int = ADMISSION_MAX_IN_FLIGHT,
+                 max_in_flight_critical: int = ADMISSION_MAX_IN_FLIGHT_CRITICAL,
+                 retry_after_seconds: int = ADMISSION_RETRY_AFTER_SECONDS):
+        self.monitor = monitor
+        self.lag_shed_ms = lag_shed_ms
+        self.lag_critical_ms = lag_critical_ms
+        self.max_in_flight = max_in_flight
+        self.max_in_flight_critical = max_in_flight_critical
+        self.retry_after_seconds = retry_after_seconds
+        self.in_flight = 0
+        self.max_in_flight_seen = 0
+        self._admitted: Counter = Counter()
+        self._shed: Counter = Counter()
+        self.shedding = False
+
+    def _shed_priority(self, lag_ms: float) -> Optional[int]:
+        """현재 부하에서 거절하기 시작하는 우선순위 클래스 (이 값 이상은 거절), 거절하지 않으면 None"""
+        if lag_ms >= self.lag_critical_ms or self.in_flight >= self.max_in_flight_critical:
+            return PRIORITY_WRITE
+        if lag_ms >= self.lag_shed_ms or self.in_flight >= self.max_in_flight:
+            return PRIORITY_INFO
+        return None
+
+    def admit(self, operation_id: str) -> Tuple[bool, int]:
+        """
+        도구 호출 수락 여부 판단
+
+        Returns:
+            (수락 여부, 거절 시 Retry-After 초)
+        """
+        priority = operation_priority(operation_id)
+        lag_ms = self.monitor.current_ms()
+        shed_from = self._shed_priority(lag_ms)
+        self._log_transition(shed_from is not None, lag_ms)
+
+        if shed_from is not None and priority >= shed_from:
+            self._shed[PRIORITY_NAMES[priority]] += 1
+            # 지연이 클수록 더 늦게 재시도하도록 (기준 대비 배수만큼, 최대 4배)
+            backoff = min(4, max(1, math.ceil(lag_ms / self.lag_shed_ms))) if self.lag_shed_ms > 0 else 1
+            return False, self.retry_after_seconds * backoff
+
+        self._admitted[PRIORITY_NAMES[priority]] += 1
+        self.in_flight += 1
+        self.max_in_flight_seen = max(self.max_in_flight_seen, self.in_flight)
+        return True, 0
+
+    def release(self) -> None:
+        self.in_flight -= 1
+
+    def _log_transition(self, shedding: bool, lag_ms: float) -> None:
+        if shedding == self.shedding:
+            return
+        self.shedding = shedding
+        if shedding:
+            logger.warning(f"🚦 과부하로 도구 호출 거절 시작 (루프 지연 {lag_ms:.0f}ms, 처리 중 {self.in_flight}건)")
+        else:
+            logger.info(f"🚦 부하 회복, 도구 호출 거절 해제 (루프 지연 {lag_ms:.0f}ms, 처리 중 {self.in_flight}건)")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "loop_lag": self.monitor.stats(),
+            "shedding": self.shedding,
+            "in_flight": self.in_flight,
+            "max_in_flight": self.max_in_flight_seen,
+            "admitted": dict(self._admitted),
+            "shed": dict(self._shed),
+            "thresholds": {
+                "lag_shed_ms": self.lag_shed_ms,
+                "lag_critical_ms": self.lag_critical_ms,
+                "max_in_flight": self.max_in_flight,
+                "max_in_flight_critical": self.max_in_flight_critical,
+            },
+        }
+
+
+loop_lag_monitor = LoopLagMonitor()
+admission_controller = AdmissionController(loop_lag_monitor) if ADMISSION_CONTROL_ENABLED else None
@@ -0,0 +1,290 @@
+import asyncio
+import gc
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from types import CodeType, FrameType
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# 디버그 모드 전용 (asyncio 디버그 모드는 모든 콜백 실행 시간을 재므로 운영에서는 끔)
+BLOCKING_DETECTOR_ENABLED = os.getenv("BLOCKING_DETECTOR_ENABLED", "false").lower() == "true"
+BLOCKING_DETECTOR_THRESHOLD_MS = float(os.getenv("BLOCKING_DETECTOR_THRESHOLD_MS", "100"))
+
+# 호출 위치 판단 시 저장소 코드로 보는 경로 (가상환경이 저장소 안에 있어도 라이브러리는 제외)
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 보고서에 남기는 스택 프레임 수
+STACK_DEPTH = 8
+
+# asyncio(디버그 모드)가 느린 콜백을 기록할 때 쓰는 메시지 형식
+_SLOW_CALLBACK_MESSAGE = "Executing %s took %.3f seconds"
+# 애플리케이션 호출로 집계하지 않는 멈춤
+# - 디버그 모드 자체의 부하 (태스크/핸들 생성 위치 스택 기록, 소스 줄 읽기)
+# - 첫 요청에서 라이브러리가 지연 import 하는 모듈 로드 (한 번만 발생)
+# - 멈춘 시간의 절반 이상이 가비지 컬렉션인 경우 (스택은 GC가 시작된 임의의 위치를 가리킴)
+_DEBUG_OVERHEAD_FILES = (os.path.join("asyncio", "format_helpers.py"), "linecache.py", "traceback.py")
+_IMPORT_FILES = ("<frozen importlib",)
+
+
+def _is_repo_frame(frame: FrameType) -> bool:
+    filename = frame.f_code.co_filename
+    return filename.startswith(REPO_ROOT) and "site-packages" not in filename
+
+
+def _describe(frame: FrameType, with_line: bool = True) -> str:
+    path = os.path.relpath(frame.f_code.co_filename, REPO_ROOT) if _is_repo_frame(frame) else frame.f_code.co_filename
+    location = f"{path}:{frame.f_lineno}" if with_line else path
+    return f"{location} {frame.f_code.co_name}"
+
+
+@dataclass
+class _Sample:
+    """이벤트 루프가 멈춘 동안 루프 스레드에서 채취한 스택 하나"""
+    operation_id: Optional[str]
+    call_site: str  # 가장 안쪽의 저장소 코드 프레임 (줄 번호 제외, 기준 목록 비교용)
+    call_line: str  # 같은 프레임 (줄 번호 포함)
+    blocked_in: str  # 가장 안쪽 프레임 (실제로 멈춘 라이브러리 함수)
+    stack: List[str]
+    ignored: Optional[str] = None  # 집계하지 않는 이유 (debug_overhead / imports)
+
+
+@dataclass
+class _Offender:
+    operation_id: Optional[str]
+    call_site: str
+    stalls: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    call_lines: Counter = field(default_factory=Counter)
+    blocked_in: Counter = field(default_factory=Counter)
+    last_stack: List[str] = field(default_factory=list)
+    last_seen: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "key": offender_key(self.operation_id, self.call_site),
+            "operation_id": self.operation_id,
+            "call_site": self.call_site,
+            "stalls": self.stalls,
+            "total_ms": round(self.total_ms, 1),
+            "max_ms": round(self.max_ms, 1),
+            "call_lines": dict(self.call_lines.most_common(3)),
+            "blocked_in": dict(self.blocked_in.most_common(3)),
+            "last_stack": self.last_stack,
+            "last_seen": self.last_seen,
+        }
+
+
+def offender_key(operation_id: Optional[str], call_site: str) -> str:
+    """기준 목록(benchmark/blocking_baseline.json)에 쓰는 식별자, 줄 번호가 바뀌어도 유지됨"""
+    return f"{operation_id or '-'} {call_site}"
+
+
+class BlockingCallDetector:
+    """
+    async 핸들러 안의 동기 작업으로 이벤트 루프가 멈춘 구간을 찾아 호출 위치와 operation_id 별로 집계
+
+    - asyncio 디버그 모드의 느린 콜백 기록(slow_callback_duration)으로 멈춘 시간을 정확히 측정
+    - 감시 스레드가 루프의 하트비트가 threshold 이상 끊기면 루프 스레드의 스택을 채취하여
+      가장 안쪽의 저장소 코드 프레임(호출 위치)과 스택에 있는 엔드포인트 함수(operation_id)를 찾음
+    느린 콜백 기록이 오면 그동안 채취한 스택 중 가장 많이 나온 호출 위치로 귀속시킵니다.
+    """
+
+    def __init__(self, threshold_ms: float = BLOCKING_DETECTOR_THRESHOLD_MS):
+        self.threshold = threshold_ms / 1000
+        self._interval = self.threshold / 4
+        self._endpoints: Dict[CodeType, str] = {}
+        self._offenders: Dict[Tuple[Optional[str], str], _Offender] = {}
+        self._samples: List[_Sample] = []  # 현재 멈춘 구간에서 채취한 스택
+        self._stalled_at: Optional[float] = None  # 현재 멈춘 구간 직전의 하트비트
+        self._lock = threading.Lock()
+        self._heartbeat = time.perf_counter()
+        self._loop_thread_id: Optional[int] = None
+        self._heartbeat_task: Optional[asyncio.Task] = None
+        self._watchdog: Optional[threading.Thread] = None
+        self._stopped = threading.Event()
+        self._log_handler = _SlowCallbackHandler(self)
+        self._counters = {"stalls": 0, "samples": 0, "unattributed": 0, "debug_overhead": 0, "imports": 0, "gc": 0}
+        self._gc_started: Optional[float] = None
+        self._gc_pauses: Deque[Tuple[float, float]] = deque(maxlen=64)  # 루프 스레드의 최근 GC (시작, 끝)
+        self._last_unattributed: Optional[str] = None
+
+    async def start(self, app) -> None:
+        if self._heartbeat_task is not None:
+            return
+        # 스택에서 엔드포인트 함수 프레임을 찾아 operation_id 로 변환
+        self._endpoints = {
+            route.endpoint.__code__: route.operation_id
+            for route in app.routes
+            if getattr(route, "operation_id", None) and hasattr(getattr(route, "endpoint", None), "__code__")
+        }
+        loop = asyncio.get_running_loop()
+        loop.set_debug(True)
+        loop.slow_callback_duration = self.threshold
+        logging.getLogger("asyncio").addHandler(self._log_handler)
+        gc.callbacks.append(self._on_gc)
+
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.perf_counter()
+        self._stopped.clear()
+        self._heartbeat_task = asyncio.create_task(self._beat())
+        self._watchdog = threading.Thread(target=self._watch, name="blocking-detector", daemon=True)
+        self._watchdog.start()
+        logger.warning(f"⚠️ blocking call detector enabled (threshold: {self.threshold * 1000:.0f}ms, asyncio debug mode)")
+
+    async def stop(self) -> None:
+        if self._heartbeat_task is None:
+            return
+        self._stopped.set()
+        self._heartbeat_task.cancel()
+        await asyncio.gather(self._heartbeat_task, return_exceptions=True)
+        self._heartbeat_task = None
+        self._watchdog.join(timeout=1)
+        logging.getLogger("asyncio").removeHandler(self._log_handler)
+        gc.callbacks.remove(self._on_gc)
+        asyncio.get_running_loop().set_debug(False)
+
+    async def _beat(self) -> None:
+        while True:
+            self._heartbeat = time.perf_counter()
+            await asyncio.sleep(self._interval)
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(self._interval):
+            heartbeat = self._heartbeat
+            if time.perf_counter() - heartbeat < self.threshold:
+                continue
+            sample = self._sample()
+            with self._lock:
+                if heartbeat != self._stalled_at:
+                    # 새로 멈춘 구간 (이전 구간이 threshold 미만으로 끝나 기록되지 않은 스택은 버림)
+                    self._samples, self._stalled_at = [], heartbeat
+                if sample is not None:
+                    self._samples.append(sample)
+                    self._counters["samples"] += 1
+
+    def _on_gc(self, phase: str, info: Dict[str, Any]) -> None:
+        if threading.get_ident() != self._loop_thread_id:
+            return
+        if phase == "start":
+            self._gc_started = time.perf_counter()
+        elif self._gc_started is not None:
+            self._gc_pauses.append((self._gc_started, time.perf_counter()))
+            self._gc_started = None
+
+    def _gc_ms(self, since: float) -> float:
+        return sum(end - max(start, since) for start, end in self._gc_pauses if end > since) * 1000
+
+    def _sample(self) -> Optional[_Sample]:
+        frame = sys._current_frames().get(self._loop_thread_id)
+        if frame is None:
+            return None
+
+        innermost = frame
+        blocked_in = _describe(frame)
+        call_frame = None
+        operation_id = None
+        ignored = None
+        stack = []
+        while frame is not None:
+            if frame.f_code.co_filename.endswith(_DEBUG_OVERHEAD_FILES):
+                ignored = "debug_overhead"
+            elif frame.f_code.co_filename.startswith(_IMPORT_FILES):
+                ignored = ignored or "imports"
+            if _is_repo_frame(frame):
+                call_frame = call_frame or frame
+                if len(stack) < STACK_DEPTH:
+                    stack.append(_describe(frame))
+            operation_id = operation_id or self._endpoints.get(frame.f_code)
+            frame = frame.f_back
+
+        if call_frame is None:
+            return _Sample(operation_id, _describe(innermost, with_line=False), blocked_in, blocked_in, stack,
+                           ignored)
+        return _Sample(operation_id, _describe(call_frame, with_line=False), _describe(call_frame), blocked_in, stack,
+                       ignored)
+
+    def on_slow_callback(self, handle: str, elapsed: float) -> None:
+        """느린 콜백 한 번을 그 동안 채취한 스택으로 귀속 (루프 스레드에서 호출됨)"""
+        elapsed_ms = elapsed * 1000
+        if self._gc_ms(time.perf_counter() - elapsed) >= elapsed_ms / 2:
+            with self._lock:
+                self._samples = []
+                self._counters["stalls"] += 1
+                self._counters["gc"] += 1
+            return
+
+        with self._lock:
+            # 하트비트 태스크는 아직 실행되지 못했으므로 이번 구간의 스택이면 채취 당시 하트비트와 같음
+            samples = self._samples if self._stalled_at == self._heartbeat else []
+            self._samples = []
+            self._counters["stalls"] += 1
+
+        if not samples:
+            # threshold 를 살짝 넘겨 스택을 채취하지 못한 경우 (호출 위치를 알 수 없으므로 횟수만 기록)
+            self._counters["unattributed"] += 1
+            self._last_unattributed = handle[:300]
+            return
+
+        # 멈춘 동안 가장 오래 머문 호출 위치
+        key, _ = Counter((sample.operation_id, sample.call_site) for sample in samples).most_common(1)[0]
+        sample = next(sample for sample in reversed(samples) if (sample.operation_id, sample.call_site) == key)
+        if sample.ignored:
+            self._counters[sample.ignored] += 1
+            return
+
+        offender = self._offenders.setdefault((sample.operation_id, sample.call_site),
+                                              _Offender(sample.operation_id, sample.call_site))
+        offender.stalls += 1
+        offender.total_ms += elapsed_ms
+        offender.max_ms = max(offender.max_ms, elapsed_ms)
+        offender.call_lines[sample.call_line] += 1
+        offender.blocked_in[sample.blocked_in] += 1
+        offender.last_stack = sample.stack
+        offender.last_seen = datetime.now(timezone.utc).isoformat()
+        logger.warning(f"🐢 이벤트 루프 {elapsed_ms:.0f}ms 멈춤 [{sample.operation_id or '-'}] "
+                       f"{sample.call_line} (blocked in {sample.blocked_in})")
+
+    def offenders(self) -> List[Dict[str, Any]]:
+        return [offender.to_dict()
+                for offender in sorted(self._offenders.values(), key=lambda o: o.total_ms, reverse=True)]
+
+    def reset(self) -> None:
+        self._offenders.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "threshold_ms": round(self.threshold * 1000, 1),
+            **self._counters,
+            "last_unattributed": self._last_unattributed,
+            "offenders": self.offenders(),
+        }
+
+
+class _SlowCallbackHandler(logging.Handler):
+    """asyncio 로거의 느린 콜백 경고를 감지기로 전달"""
+
+    def __init__(self, detector: BlockingCallDetector):
+        super().__init__(level=logging.WARNING)
+        self.detector = detector
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if record.msg != _SLOW_CALLBACK_MESSAGE or not isinstance(record.args, tuple) or len(record.args) != 2:
+            return
+        handle, elapsed = record.args
+        try:
+            self.detector.on_slow_callback(str(handle), float(elapsed))
+        except Exception:
+            self.handleError(record)
+
+
+blocking_detector = BlockingCallDetector() if BLOCKING_DETECTOR_ENABLED else None
@@ -0,0 +1,196 @@
+import asyncio
+import logging
+import os
+import time
+from dataclasses import asdict
+from datetime import date, datetime
+from typing import Any, Awaitable, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+from auth.jwt_token_helper import get_user_id_from_token
+from reminder.engine import parse_take_time
+from service.upstream_cache import CURRENT_MEDICATIONS_MAX_STALE, ROUTINE_CACHE_TTL, ROUTINE_MAX_STALE, upstream_cache
+from voice import AVAILABLE_SPEAKERS, voice_setting_repo
+from voice.voice_setting import VoiceSettings
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# 소스별 최대 대기 시간(초), 느린 소스 하나가 나머지 결과를 붙잡지 않도록 각각 적용
+BRIEFING_ROUTINE_TIMEOUT = float(os.getenv("BRIEFING_ROUTINE_TIMEOUT", "3"))
+BRIEFING_MEDICATIONS_TIMEOUT = float(os.getenv("BRIEFING_MEDICATIONS_TIMEOUT", "3"))
+BRIEFING_VOICE_TIMEOUT = float(os.getenv("BRIEFING_VOICE_TIMEOUT", "1"))
+
+# 현재 복용 약 응답에서 약 이름으로 쓰는 필드 (우선순위 순)
+MEDICATION_NAME_FIELDS = ("nickname", "item_name", "medicine_name", "name")
+
+SOURCE_LABELS = {"routine": "오늘 복약 일정", "medications": "현재 복용 중인 약", "voice": "음성 설정"}
+
+
+async def _routine_today(jwt_token: str, today: date) -> Dict[str, Any]:
+    params = {"start_date": today.isoformat(), "end_date": today.isoformat()}
+    data = await upstream_cache.get_json("/routine", jwt_token, params, ttl=ROUTINE_CACHE_TTL,
+                                         max_stale=ROUTINE_MAX_STALE)
+    if not isinstance(data.get("body"), list):
+        raise HTTPException(status_code=500, detail="외부 API 응답 형식 오류: 'body'가 리스트가 아님")
+    # stale 여부는 조회한 태스크의 컨텍스트에 기록되므로 여기서 표시
+    return upstream_cache.mark_stale(data)
+
+
+async def _current_medications(jwt_token: str) -> Dict[str, Any]:
+    data = await upstream_cache.get_json("/user/medicines/current", jwt_token, ttl=0,
+                                         max_stale=CURRENT_MEDICATIONS_MAX_STALE)
+    return upstream_cache.mark_stale(data)
+
+
+async def _voice_settings(jwt_token: str) -> VoiceSettings:
+    if voice_setting_repo is None:
+        raise RuntimeError("음성 설정 저장소를 사용할 수 없습니다")
+    user_id = get_user_id_from_token(jwt_token)
+    # 동기 Redis 호출이므로 스레드에서 실행 (시간 초과 시 이벤트 루프가 함께 멈추지 않도록)
+    return await asyncio.to_thread(voice_setting_repo.get, user_id) or VoiceSettings()
+
+
+async def _with_timeout(name: str, awaitable: Awaitable[Any], timeout: float) -> Tuple[Any, Dict[str, Any]]:
+    """소스 하나를 시간 제한과 함께 실행하고 (결과 또는 None, 소스 상태) 반환"""
+    started = time.perf_counter()
+    try:
+        result = await asyncio.wait_for(awaitable, timeout)
+        status = {"status": "ok"}
+    except asyncio.TimeoutError:
+        logger.warning(f"브리핑 소스 시간 초과: {name} ({timeout}s)")
+        result, status = None, {"status": "timeout"}
+    except HTTPException as e:
+        logger.warning(f"브리핑 소스 조회 실패: {name}, {e.status_code} {e.detail}")
+        result, status = None, {"status": "error", "error": str(e.detail)}
+    except Exception as e:
+        logger.warning(f"브리핑 소스 조회 실패: {name}, {e}")
+        result, status = None, {"status": "error", "error": str(e)}
+
+    status["elapsed_ms"] = round((time.perf_counter() - started) * 1000, 1)
+    if isinstance(result, dict) and result.get("stale"):
+        status["stale_age_seconds"] = result.get("stale_age_seconds")
+    return result, status
+
+
+def summarize_today(days: List[Dict[str, Any]], now: datetime) -> Dict[str, Any]:
+    """오늘 루틴 데이터를 시간대별 완료/놓침/예정으로 요약"""
+    now_seconds = now.hour * 3600 + now.minute * 60 + now.second
+    taken, missed, upcoming = [], [], []
+
+    for day_data in days:
+        if not isinstance(day_data, dict) or day_data.get("take_date") != now.date().isoformat():
+            continue
+        for schedule in day_data.get("user_schedule_dtos") or []:
+            if not isinstance(schedule, dict) or not schedule.get("take_time"):
+                continue
+            try:
+                seconds = parse_take_time(schedule["take_time"])
+            except ValueError:
+                logger.warning(f"브리핑: 복용 시간 형식 오류로 건너뜀: {schedule.get('take_time')}")
+                continue
+
+            routines = [r for r in schedule.get("routine_dtos") or [] if isinstance(r, dict)]
+            if not routines:
+                continue
+            remaining = [r.get("nickname", "알 수 없는 약") for r in routines if not r.get("is_taken", False)]
+            slot = {
+                "schedule_name": schedule.get("name", "알 수 없는 시간대"),
+                "user_schedule_id": schedule.get("user_schedule_id"),
+                "time": schedule["take_time"][:5],
+                "medicines": remaining or [r.get("nickname", "알 수 없는 약") for r in routines],
+            }
+            if not remaining:
+                taken.append(slot)
+            elif seconds <= now_seconds:
+                missed.append(slot)
+            else:
+                upcoming.append(slot)
+
+    upcoming.sort(key=lambda slot: slot["time"])
+    return {
+        "total_slots": len(taken) + len(missed) + len(upcoming),
+        "taken_slots": len(taken),
+        "missed": sorted(missed, key=lambda slot: slot["time"]),
+        "upcoming": upcoming,
+        "next": upcoming[0] if upcoming else None,
+    }
+
+
+def _medication_names(data: Dict[str, Any]) -> List[str]:
+    body = data.get("body", data)
+    if not isinstance(body, list):
+        return []
+    names = []
+    for medication in body:
+        if not isinstance(medication, dict):
+            continue
+        name = next((medication[field] for field in MEDICATION_NAME_FIELDS if medication.get(field)), None)
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def _slot_text(slot: Dict[str, Any]) -> str:
+    return f"{slot['schedule_name']}({slot['time']}) {', '.join(slot['medicines'])}"
+
+
+def _briefing_message(today: Optional[Dict[str, Any]], medications: Optional[List[str]],
+                      voice: Optional[Dict[str, Any]], sources: Dict[str, Dict[str, Any]]) -> str:
+    lines = []
+    if today is not None:
+        if not today["total_slots"]:
+            lines.append("오늘 등록된 복약 일정이 없습니다.")
+        else:
+            lines.append(f"오늘 복약 일정 {today['total_slots']}개 중 {today['taken_slots']}개를 복용하셨습니다.")
+            if today["missed"]:
+                lines.append("아직 복용하지 않은 약: " + "; ".join(_slot_text(slot) for slot in today["missed"]))
+            if today["next"] is not None:
+                lines.append("다음 복용: " + _slot_text(today["next"]))
+    if medications is not None:
+        lines.append(f"현재 복용 중인 약 {len(medications)}종: {', '.join(medications)}" if medications
+                     else "현재 복용 중인 약이 없습니다.")
+    if voice is not None:
+        lines.append(f"음성 설정: {voice['speaker_info']}, 속도 {voice['speed']}, 높낮이 {voice['pitch']}, "
+                     f"음량 {voice['volume']}")
+
+    unavailable = [SOURCE_LABELS[name] for name, status in sources.items() if status["status"] != "ok"]
+    if unavailable:
+        lines.append(f"({', '.join(unavailable)} 정보를 지금 불러오지 못했습니다. 필요하면 해당 도구로 다시 조회해주세요.)")
+    stale_ages = [status["stale_age_seconds"] for status in sources.values() if status.get("stale_age_seconds") is not None]
+    if stale_ages:
+        age = max(stale_ages)
+        elapsed = f"{age}초" if age < 60 else f"약 {round(age / 60)}분"
+        lines.append(f"(백엔드 연결 문제로 일부는 {elapsed} 전에 조회한 정보입니다. 최신 정보와 다를 수 있습니다.)")
+    return "\n".join(lines)
+
+
+async def build_daily_briefing(jwt_token: str, now: datetime) -> Dict[str, Any]:
+    """
+    오늘 루틴, 현재 복용 약, 음성 설정을 동시에 조회하여 한 번에 요약
+
+    각 소스는 자체 시간 제한이 있으며, 실패하거나 시간을 넘긴 소스는 sources 에 상태만 남기고 나머지로 요약합니다.
+    """
+    (routine, routine_status), (medications, medications_status), (voice, voice_status) = await asyncio.gather(
+        _with_timeout("routine", _routine_today(jwt_token, now.date()), BRIEFING_ROUTINE_TIMEOUT),
+        _with_timeout("medications", _current_medications(jwt_token), BRIEFING_MEDICATIONS_TIMEOUT),
+        _with_timeout("voice", _voice_settings(jwt_token), BRIEFING_VOICE_TIMEOUT),
+    )
+    sources = {"routine": routine_status, "medications": medications_status, "voice": voice_status}
+
+    today = summarize_today(routine["body"], now) if routine is not None else None
+    medication_names = _medication_names(medications) if medications is not None else None
+    voice_summary = None
+    if voice is not None:
+        voice_summary = {**asdict(voice), "speaker_info": AVAILABLE_SPEAKERS.get(voice.speaker, voice.speaker)}
+
+    return {
+        "message": _briefing_message(today, medication_names, voice_summary, sources),
+        "date": now.date().isoformat(),
+        "today": today,
+        "current_medications": medication_names,
+        "voice_settings": voice_summary,
+        "sources": sources,
+    }
@@ -0,0 +1,242 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import os
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+import pytz
+from dotenv import load_dotenv
+
+from auth.jwt_token_helper import decode_token
+from service.upstream_cache import (ROUTINE_CACHE_TTL, SCHEDULE_CACHE_TTL, UpstreamCache, upstream_cache,
+                                    user_cache_key)
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+kst = pytz.timezone('Asia/Seoul')
+
+CACHE_WARMING_ENABLED = os.getenv("CACHE_WARMING_ENABLED", "true").lower() == "true"
+CACHE_WARMING_LEAD_SECONDS = int(os.getenv("CACHE_WARMING_LEAD_SECONDS", "180"))
+CACHE_WARMING_RATE = float(os.getenv("CACHE_WARMING_RATE", "5"))  # 초당 최대 워밍 사용자 수
+CACHE_WARMING_CONCURRENCY = int(os.getenv("CACHE_WARMING_CONCURRENCY", "2"))
+
+
+class RateLimiter:
+    """토큰 버킷 방식의 전역 속도 제한"""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+@dataclass
+class UserWarmState:
+    """워밍 대상 사용자 정보 (토큰은 메모리에만 보관)"""
+    jwt_token: str
+    expires_at: float
+    take_times: Tuple[str, ...]
+    version: int = 0
+
+
+def next_warm_at(take_time: str, lead_seconds: int, now: Optional[datetime] = None) -> float:
+    """다음 복용 시간(KST) lead_seconds 전의 epoch 시각"""
+    now = now or datetime.now(kst)
+    time_obj = datetime.strptime(take_time, "%H:%M:%S").time()
+    slot = kst.localize(datetime.combine(now.date(), time_obj))
+    warm_at = slot - timedelta(seconds=lead_seconds)
+    if warm_at <= now:
+        warm_at += timedelta(days=1)
+    return warm_at.timestamp()
+
+
+class CacheWarmer:
+    """
+    사용자별 복용 시간(take_time) 직전에 오늘 루틴/스케줄 캐시를 미리 갱신하는 백그라운드 스케줄러
+
+    /user/schedule 응답에서 사용자의 take_time을 학습하고, 다음 워밍 시각을 최소 힙으로 관리합니다.
+    워밍은 전역 속도 제한과 동시성 제한을 거치므로 실시간 트래픽과 경쟁하지 않습니다.
+    """
+
+    def __init__(self, cache: UpstreamCache, lead_seconds: int = CACHE_WARMING_LEAD_SECONDS,
+                 rate_per_second: float = CACHE_WARMING_RATE, concurrency: int = CACHE_WARMING_CONCURRENCY):
+        self.cache = cache
+        self.lead_seconds = lead_seconds
+        self.concurrency = concurrency
+        self._rate_limiter = RateLimiter(rate_per_second)
+        self._users: Dict[str, UserWarmState] = {}
+        self._heap: List[Tuple[float, int, str, int, str]] = []
+        self._sequence = itertools.count()
+        self._queue: "asyncio.Queue[Tuple[str, int, str]]" = asyncio.Queue()
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+        self._counters = {"warmed": 0, "failed": 0, "skipped": 0, "expired_users": 0, "refreshed": 0,
+                          "refresh_failed": 0}
+
+    def observe(self, jwt_token: str, schedules: List[Dict[str, Any]]) -> None:
+        """/user/schedule 응답으로 사용자의 복용 시간 학습"""
+        try:
+            payload = decode_token(jwt_token)
+        except Exception:
+            # 서명을 검증할 수 없는 토큰은 보관하지 않음
+            return
+
+        expires_at = payload.get("exp")
+        if not expires_at:
+            return
+
+        take_times = tuple(sorted({s["take_time"] for s in schedules if isinstance(s, dict) and s.get("take_time")}))
+        user_key = user_cache_key(jwt_token)
+        state = self._users.get(user_key)
+
+        if state is not None and state.take_times == take_times:
+            # 복용 시간이 그대로면 최신 토큰만 갱신
+            state.jwt_token = jwt_token
+            state.expires_at = float(expires_at)
+            return
+
+        version = state.version + 1 if state else 0
+        self._users[user_key] = UserWarmState(jwt_token, float(expires_at), take_times, version)
+        for take_time in take_times:
+            try:
+                self._push(next_warm_at(take_time, self.lead_seconds), user_key, version, take_time)
+            except ValueError:
+                logger.warning(f"복용 시간 형식 오류로 워밍 제외: {take_time}")
+        self._wakeup.set()
+
+    def _push(self, due: float, user_key: str, version: int, take_time: str) -> None:
+        heapq.heappush(self._heap, (due, next(self._sequence), user_key, version, take_time))
+
+    async def _dispatch_loop(self) -> None:
+        """워밍 시각이 된 항목을 꺼내 워커 큐로 전달"""
+        while True:
+            now = time.time()
+            while self._heap and self._heap[0][0] <= now:
+                due, _, user_key, version, take_time = heapq.heappop(self._heap)
+                state = self._users.get(user_key)
+                if state is None or state.version != version:
+                    continue  # 복용 시간이 바뀌어 무효화된 항목
+
+                # 다음날 같은 시각 예약 후 워밍 요청
+                self._push(next_warm_at(take_time, self.lead_seconds), user_key, version, take_time)
+                if now - due > self.lead_seconds:
+                    self._counters["skipped"] += 1  # 이미 복용 시간이 지난 항목
+                    continue
+                self._queue.put_nowait((user_key, version, take_time))
+
+            timeout = min(self._heap[0][0] - now, 60) if self._heap else 60
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=max(timeout, 0))
+            except asyncio.TimeoutError:
+                pass
+
+    async def _worker(self) -> None:
+        while True:
+            user_key, version, take_time = await self._queue.get()
+            try:
+                await self._rate_limiter.acquire()
+                await self._warm(user_key, version, take_time)
+            finally:
+                self._queue.task_done()
+
+    async def _warm(self, user_key: str, version: int, take_time: str) -> None:
+        state = self._users.get(user_key)
+        if state is None or state.version != version:
+            return
+
+        if state.expires_at <= time.time():
+            # 토큰이 만료된 사용자는 다음 요청 때 다시 학습
+            self._users.pop(user_key, None)
+            self._counters["expired_users"] += 1
+            return
+
+        now = datetime.now(kst)
+        slot_at = next_warm_at(take_time, 0, now)
+        until_slot = slot_at - now.timestamp()
+        if until_slot > self.lead_seconds:
+            # 대기 중 복용 시간이 지나 다음날 시각이 계산된 경우 (오늘 시각 기준으로 더 이상 워밍할 필요 없음)
+            self._counters["skipped"] += 1
+            return
+
+        # 복용 시각 직후 조회("오늘 약 뭐야")까지 캐시에서 응답하도록 복용 시각 이후 lead_seconds 동안 유지
+        # (복용 체크 도구가 /routine 캐시를 무효화하므로 is_taken 변경은 바로 반영됨)
+        slot_date = datetime.fromtimestamp(slot_at, kst).date().isoformat()
+        try:
+            await asyncio.gather(
+                self.cache.get_json("/routine", state.jwt_token, {"start_date": slot_date, "end_date": slot_date},
+                                    ttl=until_slot + self.lead_seconds, force_refresh=True),
+                self.cache.get_json("/user/schedule", state.jwt_token,
+                                    ttl=self.lead_seconds + SCHEDULE_CACHE_TTL, force_refresh=True),
+            )
+            self._counters["warmed"] += 1
+            logger.debug(f"캐시 워밍 완료: {user_key} ({take_time})")
+        except Exception as e:
+            self._counters["failed"] += 1
+            logger.warning(f"캐시 워밍 실패: {user_key} ({take_time}): {e}")
+
+    async def refresh_routine(self, user_key: str, take_date: str) -> bool:
+        """
+        보관 중인 토큰으로 사용자의 하루 루틴을 다시 조회 (복약 알림 엔진의 미복용 판단용, 워밍과 같은 속도 제한 적용)
+
+        조회 결과는 업스트림 캐시 리스너로 알림 엔진에 반영됩니다.
+
+        Returns:
+            다시 조회했는지 여부 (토큰이 없거나 만료되었거나 조회에 실패하면 False)
+        """
+        state = self._users.get(user_key)
+        if state is None or state.expires_at <= time.time():
+            return False
+
+        await self._rate_limiter.acquire()
+        try:
+            await self.cache.get_json("/routine", state.jwt_token, {"start_date": take_date, "end_date": take_date},
+                                      ttl=ROUTINE_CACHE_TTL, force_refresh=True)
+        except Exception as e:
+            self._counters["refresh_failed"] += 1
+            logger.warning(f"루틴 재조회 실패: {user_key} ({take_date}): {e}")
+            return False
+        self._counters["refreshed"] += 1
+        return True
+
+    async def start(self) -> None:
+        if self._tasks:
+            return
+        self._tasks = [asyncio.create_task(self._dispatch_loop())]
+        self._tasks += [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        logger.info(f"✅ cache warmer started (lead: {self.lead_seconds}s, workers: {self.concurrency})")
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._counters,
+            "users": len(self._users),
+            "scheduled": len(self._heap),
+            "queued": self._queue.qsize(),
+        }
+
+
+cache_warmer = CacheWarmer(upstream_cache) if CACHE_WARMING_ENABLED else None
@@ -0,0 +1,219 @@
+import logging
+import os
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Optional
+
+import httpx
+from dotenv import load_dotenv
+
+load_dotenv()
+logger = logging.getLogger("api.calls")
+
+CALL_ACCOUNTING_ENABLED = os.getenv("CALL_ACCOUNTING_ENABLED", "true").lower() == "true"
+
+# 업스트림 요청 쿼리 문자열에 실리면 안 되는 파라미터 (접근 로그 등에 토큰이 남음)
+SENSITIVE_QUERY_PARAMS = ("jwt_token",)
+
+
+@dataclass
+class CallCounts:
+    """도구 호출 한 번 동안 발생한 외부 호출 수"""
+    upstream: int = 0  # MEDEASY API HTTP 요청
+    llm: int = 0  # LLM 모델 호출 (티어 승격/스키마 복구 재요청 포함)
+    redis: int = 0  # Redis 명령 (파이프라인은 명령 수만큼)
+    upstream_requests: Counter = field(default_factory=Counter)  # "GET /routine" → 횟수
+    sensitive_query: int = 0  # 쿼리 문자열에서 제거한 민감 파라미터 수
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "upstream": self.upstream,
+            "llm": self.llm,
+            "redis": self.redis,
+            "upstream_requests": dict(self.upstream_requests),
+            "sensitive_query": self.sensitive_query,
+        }
+
+
+@dataclass(frozen=True)
+class CallBudget:
+    """operation_id 별 도구 호출 1회당 허용하는 최대 호출 수 (캐시가 비어 있는 최악의 경우 기준)"""
+    upstream: int
+    llm: int = 0
+    redis: int = 0
+
+    def violations(self, counts: CallCounts) -> List[str]:
+        exceeded = [f"{kind} {getattr(counts, kind)} > {getattr(self, kind)}"
+                    for kind in ("upstream", "llm", "redis") if getattr(counts, kind) > getattr(self, kind)]
+        if counts.sensitive_query:
+            exceeded.append(f"쿼리 문자열에 민감 파라미터 {counts.sensitive_query}건")
+        return exceeded
+
+
+# 멱등성 키를 보낸 쓰기 도구는 Redis 명령 2개(잠금 SET NX, 결과 SET)가 추가됨
+OPERATION_CALL_BUDGETS: Dict[str, CallBudget] = {
+    # 복약 기록 저장소에 없는 지난 날짜 /routine + 최근 날짜 /routine
+    "get_medicine_routine_list_by_date_detailed": CallBudget(upstream=2),
+    "get_medication_adherence_summary": CallBudget(upstream=2),
+    "get_current_medications_information": CallBudget(upstream=1),
+    "search_medicine": CallBudget(upstream=1),
+    # /routine(오늘) + /user/medicines/current + 음성 설정 GET
+    "get_daily_briefing": CallBudget(upstream=2, redis=1),
+    "get_medicine_by_medicine_id": CallBudget(upstream=1),
+    # /user/schedule → /routine → PATCH
+    "drug_routine_completed_check": CallBudget(upstream=3, llm=1, redis=2),
+    "drug_schedule_all_routines_completed_check": CallBudget(upstream=3, llm=1, redis=2),
+    # /user/schedule → /routine → 약 개수만큼 PATCH (도구 설명상 한 번에 여러 약)
+    "drug_routines_batch_completed_check": CallBudget(upstream=12, llm=1, redis=2),
+    # 약 10개 기준: 약마다 /medicine/search(카탈로그/검색 캐시 미스 시) + /user/schedule + 약마다 POST
+    "create_medicine_routines_batch": CallBudget(upstream=21, llm=1),
+    "modify_medicine_routine_schedule_time": CallBudget(upstream=2, llm=1, redis=2),
+    "delete_medication_routine": CallBudget(upstream=0),
+    # 설정 GET + SETEX
+    "update_user_custom_agent_voice": CallBudget(upstream=0, redis=4),
+    "register_routine_by_prescription": CallBudget(upstream=0),
+    "register_routine_by_pills_photo": CallBudget(upstream=0),
+    "router_routine_register_node": CallBudget(upstream=0),
+}
+
+_current: ContextVar[Optional[CallCounts]] = ContextVar("call_counts", default=None)
+
+
+@contextmanager
+def track_calls() -> Iterator[CallCounts]:
+    """
+    블록 안(같은 컨텍스트에서 만든 태스크 포함)에서 발생한 외부 호출 수 집계
+
+    요청 단위 집계는 CallAccountingMiddleware 가 사용하며, 스크립트에서 예산을 확인할 때도 쓸 수 있습니다.
+        with track_calls() as counts:
+            await drug_routine_completed_check(...)
+        assert not OPERATION_CALL_BUDGETS["drug_routine_completed_check"].violations(counts)
+    """
+    counts = CallCounts()
+    token = _current.set(counts)
+    try:
+        yield counts
+    finally:
+        _current.reset(token)
+
+
+def record_upstream(method: str, path: str) -> None:
+    counts = _current.get()
+    if counts is not None:
+        counts.upstream += 1
+        counts.upstream_requests[f"{method} {path}"] += 1
+
+
+def record_llm(calls: int = 1) -> None:
+    counts = _current.get()
+    if counts is not None:
+        counts.llm += calls
+
+
+def record_redis(commands: int = 1) -> None:
+    counts = _current.get()
+    if counts is not None:
+        counts.redis += commands
+
+
+async def _on_upstream_request(request: httpx.Request) -> None:
+    leaked = [name for name in SENSITIVE_QUERY_PARAMS if name in request.url.params]
+    if leaked:
+        # 토큰은 Authorization 헤더로만 전달 (쿼리 문자열은 백엔드/프록시 접근 로그에 남음)
+        for name in leaked:
+            request.url = request.url.copy_remove_param(name)
+        logger.error(f"업스트림 요청 쿼리 문자열에서 민감 파라미터 제거: {leaked} ({request.method} {request.url.path})")
+        counts = _current.get()
+        if counts is not None:
+            counts.sensitive_query += len(leaked)
+    record_upstream(request.method, request.url.path)
+
+
+@lru_cache(maxsize=1)
+def upstream_ssl_context():
+    """
+    업스트림 클라이언트가 공유하는 SSL 컨텍스트
+
+    클라이언트마다 CA 번들을 다시 읽으면 이벤트 루프가 수십 ms 멈추므로 한 번 만든 컨텍스트를 공유합니다.
+    """
+    return httpx.create_ssl_context()
+
+
+def upstream_client(**kwargs) -> httpx.AsyncClient:
+    """MEDEASY API 호출용 httpx 클라이언트 (요청 수 집계, 쿼리 문자열의 토큰 제거)"""
+    kwargs.setdefault("verify", upstream_ssl_context())
+    event_hooks = kwargs.pop("event_hooks", {})
+    event_hooks = {**event_hooks, "request": [*event_hooks.get("request", []), _on_upstream_request]}
+    return httpx.AsyncClient(event_hooks=event_hooks, **kwargs)
+
+
+@dataclass
+class _OperationStats:
+    invocations: int = 0
+    totals: Counter = field(default_factory=Counter)
+    max: Counter = field(default_factory=Counter)
+    budget_violations: int = 0
+    last_violation: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        kinds = ("upstream", "llm", "redis")
+        return {
+            "invocations": self.invocations,
+            "avg": {kind: round(self.totals[kind] / self.invocations, 3) if self.invocations else 0.0
+                    for kind in kinds},
+            "max": {kind: self.max[kind] for kind in kinds},
+            "budget_violations": self.budget_violations,
+            "last_violation": self.last_violation,
+        }
+
+
+class CallAccounting:
+    """operation_id 별 도구 호출당 외부 호출 수 통계와 예산 초과 기록"""
+
+    def __init__(self, budgets: Dict[str, CallBudget] = OPERATION_CALL_BUDGETS):
+        self.budgets = budgets
+        self._operations: Dict[str, _OperationStats] = {}
+
+    def record(self, operation_id: str, counts: CallCounts) -> List[str]:
+        """도구 호출 한 번의 집계 결과 기록 (예산 초과 항목 반환)"""
+        stats = self._operations.setdefault(operation_id, _OperationStats())
+        stats.invocations += 1
+        for kind in ("upstream", "llm", "redis"):
+            value = getattr(counts, kind)
+            stats.totals[kind] += value
+            stats.max[kind] = max(stats.max[kind], value)
+
+        budget = self.budgets.get(operation_id)
+        violations = budget.violations(counts) if budget is not None else []
+        requests = ", ".join(f"{request}×{count}" if count > 1 else request
+                             for request, count in counts.upstream_requests.items())
+        summary = f"[{operation_id}] upstream={counts.upstream} ({requests or '-'}) llm={counts.llm} redis={counts.redis}"
+        if violations:
+            stats.budget_violations += 1
+            stats.last_violation = {**counts.to_dict(), "violations": violations}
+            logger.warning(f"📈 호출 예산 초과 {summary}: {', '.join(violations)}")
+        else:
+            logger.info(f"📊 {summary}")
+        return violations
+
+    def violations(self) -> Dict[str, int]:
+        return {operation_id: stats.budget_violations
+                for operation_id, stats in self._operations.items() if stats.budget_violations}
+
+    def reset(self) -> None:
+        self._operations.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            operation_id: {
+                **stats.to_dict(),
+                "budget": vars(self.budgets[operation_id]) if operation_id in self.budgets else None,
+            }
+            for operation_id, stats in sorted(self._operations.items())
+        }
+
+
+call_accounting = CallAccounting()
@@ -0,0 +1,155 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from fastapi import HTTPException
+from dotenv import load_dotenv
+
+from service.call_accounting import record_redis
+from service.upstream_cache import user_cache_key
+from voice import voice_setting_repo
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_TTL = int(os.getenv("IDEMPOTENCY_TTL", "300"))  # 결과 보관 시간(초)
+IDEMPOTENCY_LOCK_TTL = int(os.getenv("IDEMPOTENCY_LOCK_TTL", "60"))  # 실행 중 표시 유지 시간(초)
+IDEMPOTENCY_WAIT_SECONDS = float(os.getenv("IDEMPOTENCY_WAIT_SECONDS", "10"))  # 동시 재시도가 결과를 기다리는 최대 시간
+
+IDEMPOTENCY_KEY_HEADER = "Idempotency-Key"
+IDEMPOTENCY_KEY_DESCRIPTION = "재시도 시 같은 값을 보내면 다시 실행하지 않고 이전 결과를 그대로 반환 (선택)"
+
+_PENDING = "pending"
+
+
+def retryable_failure(message: str, **fields: Any) -> Dict[str, Any]:
+    """
+    일시적인 실패(업스트림 오류, 네트워크 오류, 매칭 실패 등)를 알리는 도구 응답
+
+    이 응답은 멱등성 결과로 저장하지 않으므로 같은 키로 재시도하면 다시 실행됩니다.
+    """
+    return {"message": message, **fields, "retryable": True}
+
+
+class IdempotencyStore:
+    """
+    멱등성 키 별 도구 실행 결과를 Redis에 짧게 보관하여 에이전트 재시도를 흡수
+
+    같은 (사용자, operation_id, 키)로 다시 호출되면 LLM 매칭이나 업스트림 PATCH 없이 저장된 응답을 반환합니다.
+    같은 키로 다른 파라미터를 보내면 422, 첫 실행이 끝나지 않았으면 결과를 기다렸다가 반환합니다.
+    Redis를 사용할 수 없으면 멱등성 없이 그대로 실행합니다.
+    """
+
+    def __init__(self, redis_client, ttl: int = IDEMPOTENCY_TTL, lock_ttl: int = IDEMPOTENCY_LOCK_TTL,
+                 wait_seconds: float = IDEMPOTENCY_WAIT_SECONDS):
+        self.redis = redis_client
+        self.ttl = ttl
+        self.lock_ttl = lock_ttl
+        self.wait_seconds = wait_seconds
+        self._counters = {"executed": 0, "replayed": 0, "released": 0, "conflicts": 0, "unavailable": 0}
+
+    @staticmethod
+    def _fingerprint(params: Dict[str, Any]) -> str:
+        return hashlib.sha256(json.dumps(params, sort_keys=True, ensure_ascii=False, default=str).encode()).hexdigest()
+
+    def _redis_key(self, operation_id: str, jwt_token: str, idempotency_key: str) -> str:
+        return f"idempotency:{operation_id}:{user_cache_key(jwt_token)}:{idempotency_key}"
+
+    async def _load(self, key: str) -> Optional[Dict[str, Any]]:
+        record_redis()
+        stored = await asyncio.to_thread(self.redis.get, key)
+        return json.loads(stored) if stored else None
+
+    async def run(self, operation_id: str, jwt_token: str, idempotency_key: Optional[str],
+                  params: Dict[str, Any], handler: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        멱등성 키가 있으면 저장된 결과를 반환하거나 handler 실행 후 결과 저장
+
+        HTTPException 으로 실패했거나 retryable_failure() 를 반환한 실행은 저장하지 않으므로 같은 키로 다시 시도할 수 있습니다.
+        """
+        if not idempotency_key:
+            return await handler()
+
+        key = self._redis_key(operation_id, jwt_token, idempotency_key)
+        fingerprint = self._fingerprint(params)
+        try:
+            record_redis()
+            # 동기 Redis 클라이언트이므로 모든 명령은 스레드에서 실행 (이벤트 루프가 멈추지 않도록)
+            acquired = await asyncio.to_thread(
+                self.redis.set, key, json.dumps({"status": _PENDING, "fingerprint": fingerprint}),
+                nx=True, ex=self.lock_ttl
+            )
+        except Exception as e:
+            self._counters["unavailable"] += 1
+            logger.warning(f"멱등성 저장소 사용 불가, 그대로 실행 ({operation_id}): {e}")
+            return await handler()
+
+        if not acquired:
+            return await self._replay(key, fingerprint, operation_id)
+
+        try:
+            result = await handler()
+        except BaseException:
+            # 실패한 실행은 기록하지 않음 (같은 키로 재시도 가능)
+            await self._safe_delete(key)
+            raise
+
+        self._counters["executed"] += 1
+        if isinstance(result, dict) and result.get("retryable"):
+            # 일시적인 실패 응답은 저장하지 않고 키 해제 (재시도 시 다시 실행)
+            self._counters["released"] += 1
+            await self._safe_delete(key)
+            return result
+
+        try:
+            record_redis()
+            await asyncio.to_thread(
+                self.redis.set, key, json.dumps({"status": "done", "fingerprint": fingerprint, "result": result},
+                                                ensure_ascii=False, default=str), ex=self.ttl
+            )
+        except Exception as e:
+            logger.warning(f"멱등성 결과 저장 실패 ({operation_id}): {e}")
+        return result
+
+    async def _replay(self, key: str, fingerprint: str, operation_id: str) -> Any:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.wait_seconds
+        while True:
+            try:
+                stored = await self._load(key)
+            except Exception as e:
+                self._counters["unavailable"] += 1
+                raise HTTPException(status_code=503, detail=f"멱등성 저장소 조회 실패: {e}")
+
+            if stored is not None and stored.get("fingerprint") != fingerprint:
+                self._counters["conflicts"] += 1
+                raise HTTPException(status_code=422, detail="같은 멱등성 키로 다른 요청 파라미터가 전달되었습니다")
+
+            if stored is not None and stored.get("status") != _PENDING:
+                self._counters["replayed"] += 1
+                logger.info(f"멱등성 키 재사용, 저장된 결과 반환 ({operation_id})")
+                return stored.get("result")
+
+            if stored is None or loop.time() >= deadline:
+                # 첫 실행이 실패했거나 너무 오래 걸리는 경우
+                self._counters["conflicts"] += 1
+                raise HTTPException(status_code=409, detail="같은 멱등성 키의 이전 요청이 완료되지 않았습니다. 잠시 후 다시 시도해주세요")
+
+            await asyncio.sleep(0.1)
+
+    async def _safe_delete(self, key: str) -> None:
+        try:
+            record_redis()
+            await asyncio.to_thread(self.redis.delete, key)
+        except Exception as e:
+            logger.warning(f"멱등성 키 해제 실패: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return dict(self._counters)
+
+
+# 음성 설정과 같은 Redis 사용
+idempotency_store = IdempotencyStore(voice_setting_repo.redis)
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+import os
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
+
+from medicine.catalog_index import MedicineCatalogIndex, load_catalog_records
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# 의약품 카탈로그 스냅샷 경로 (.json / .csv, .gz 가능), 미설정 시 오프라인 검색 비활성화
+MEDICINE_CATALOG_PATH = os.getenv("MEDICINE_CATALOG_PATH")
+MEDICINE_CATALOG_REFRESH_SECONDS = int(os.getenv("MEDICINE_CATALOG_REFRESH_SECONDS", "600"))  # 스냅샷 변경 확인 주기
+
+
+class MedicineCatalog:
+    """
+    의약품 카탈로그 스냅샷을 인메모리 인덱스로 올려 /medicine/search 호출을 대신하는 검색기
+
+    주기적으로 스냅샷 파일의 수정 시각/크기를 확인해 바뀌었으면 새 인덱스를 스레드에서 만든 뒤 교체합니다.
+    인덱스가 아직 없거나 검색 결과가 없으면 None을 반환하므로 호출자는 백엔드로 폴백합니다.
+    """
+
+    def __init__(self, path: str, refresh_seconds: int = MEDICINE_CATALOG_REFRESH_SECONDS):
+        self.path = path
+        self.refresh_seconds = refresh_seconds
+        self.index: Optional[MedicineCatalogIndex] = None
+        self._signature: Optional[Tuple[int, int]] = None  # (mtime_ns, size)
+        self._loaded_at: Optional[float] = None
+        self._build_ms: Optional[float] = None
+        self._memory_bytes = 0
+        self._task: Optional[asyncio.Task] = None
+        self._counters = {"hits": 0, "misses": 0, "reloads": 0, "reload_failures": 0}
+
+    def search(self, query: str, limit: int = 1) -> Optional[List[Dict[str, Any]]]:
+        """인덱스 검색 (인덱스가 없거나 결과가 없으면 None)"""
+        index = self.index
+        if index is None:
+            return None
+        results = index.search(query, limit)
+        self._counters["hits" if results else "misses"] += 1
+        return results or None
+
+    def _build(self) -> Optional[Tuple[MedicineCatalogIndex, Tuple[int, int], float, int]]:
+        stat = os.stat(self.path)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        if signature == self._signature:
+            return None
+
+        started = time.perf_counter()
+        index = MedicineCatalogIndex(load_catalog_records(self.path))
+        build_ms = (time.perf_counter() - started) * 1000
+        return index, signature, build_ms, index.memory_bytes()
+
+    async def refresh(self) -> bool:
+        """스냅샷이 바뀌었으면 인덱스를 다시 만들어 교체 (교체했으면 True)"""
+        try:
+            built = await asyncio.to_thread(self._build)
+        except Exception as e:
+            # 기존 인덱스는 그대로 유지
+            self._counters["reload_failures"] += 1
+            logger.error(f"의약품 카탈로그 로드 실패 ({self.path}): {e}")
+            return False
+
+        if built is None:
+            return False
+        self.index, self._signature, self._build_ms, self._memory_bytes = built
+        self._loaded_at = time.time()
+        self._counters["reloads"] += 1
+        logger.info(f"의약품 카탈로그 인덱스 교체: {len(self.index)}건, {self._build_ms:.0f}ms, "
+                    f"{self._memory_bytes / 1024 / 1024:.1f}MB")
+        return True
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await self.refresh()
+            await asyncio.sleep(self.refresh_seconds)
+
+    async def start(self) -> None:
+        # 첫 로드도 백그라운드에서 진행 (로드 전 검색은 백엔드로 폴백)
+        if self._task is None:
+            self._task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._counters,
+            "path": self.path,
+            "records": len(self.index) if self.index is not None else 0,
+            "memory_bytes": self._memory_bytes,
+            "build_ms": round(self._build_ms, 1) if self._build_ms is not None else None,
+            "loaded_at": self._loaded_at,
+        }
+
+
+medicine_catalog = MedicineCatalog(MEDICINE_CATALOG_PATH) if MEDICINE_CATALOG_PATH else None
@@ -1,16 +1,35 @@
-import httpx
 import os
 from fastapi import HTTPException
 from dotenv import load_dotenv
 
+from cache import TTLCache
+from service.call_accounting import upstream_client
+from service.medicine_catalog import medicine_catalog
+
 load_dotenv()
 
+# 의약품 검색 결과 캐시 (약 이름 → medicine_id, 사용자와 무관한 데이터)
+MEDICINE_SEARCH_CACHE_TTL = int(os.getenv("MEDICINE_SEARCH_CACHE_TTL", "3600"))
+medicine_search_cache = TTLCache(max_size=4096, default_ttl=MEDICINE_SEARCH_CACHE_TTL)
+
+
 async def search_medicine_id_by_name(jwt_token: str, medicine_name: str):
+    # 오프라인 카탈로그 인덱스에 있으면 백엔드 호출 없이 반환
+    if medicine_catalog is not None:
+        catalog_results = medicine_catalog.search(medicine_name, 1)
+        if catalog_results:
+            return catalog_results[0]["id"]
+
+    cache_key = medicine_name.strip()
+    cached_id = medicine_search_cache.get(cache_key)
+    if cached_id is not None:
+        return cached_id
+
     api_url = f"{os.getenv("MEDEASY_API_URL")}/medicine/search"
     headers = {"Authorization": f"Bearer {jwt_token}"}
     params = {"name": medicine_name}
 
-    async with httpx.AsyncClient() as client:
+    async with upstream_client() as client:
         try:
             response = await client.get(api_url, headers=headers, params=params)
             response.raise_for_status()
@@ -20,6 +39,8 @@ async def search_medicine_id_by_name(jwt_token: str, medicine_name: str):
                 return None
 
             # 첫 번째 검색 결과 사용 (가장 관련성 높은 결과로 가정)
-            return medicines[0]["id"]
+            medicine_id = medicines[0]["id"]
+            medicine_search_cache.set(cache_key, medicine_id)
+            return medicine_id
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"약 검색 중 오류: {str(e)}")
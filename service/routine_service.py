@@ -0,0 +1,101 @@
+import asyncio
+import logging
+import os
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+import pytz
+from dotenv import load_dotenv
+from fastapi import HTTPException
+
+from cache.routine_history import RoutineHistoryStore
+from config.storage_config import data_path
+from service.upstream_cache import ROUTINE_CACHE_TTL, upstream_cache, user_cache_key
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+kst = pytz.timezone('Asia/Seoul')
+
+# 지난 날짜 복약 기록 로컬 저장소 (SQLite)
+ROUTINE_HISTORY_ENABLED = os.getenv("ROUTINE_HISTORY_ENABLED", "true").lower() == "true"
+# 상대 경로는 DATA_DIR 기준
+ROUTINE_HISTORY_PATH = data_path(os.getenv("ROUTINE_HISTORY_PATH", "routine_history.sqlite3"))
+ROUTINE_HISTORY_MAX_MB = int(os.getenv("ROUTINE_HISTORY_MAX_MB", "256"))
+ROUTINE_HISTORY_IDLE_DAYS = int(os.getenv("ROUTINE_HISTORY_IDLE_DAYS", "90"))  # 이 기간 조회되지 않은 행은 삭제
+# 오늘로부터 이 일수보다 이전 날짜는 더 이상 바뀌지 않는다고 보고 로컬 저장소에서 제공
+# (늦게 한 복약 체크가 반영되도록 최근 며칠은 항상 백엔드에서 조회)
+ROUTINE_HISTORY_FINAL_DAYS = int(os.getenv("ROUTINE_HISTORY_FINAL_DAYS", "2"))
+
+
+async def _get_routine_body(jwt_token: str, start_date: date, end_date: date, ttl: float,
+                            max_stale: Optional[float]) -> List[Dict[str, Any]]:
+    params = {"start_date": start_date.isoformat(), "end_date": end_date.isoformat()}
+    try:
+        response_data = await upstream_cache.get_json("/routine", jwt_token, params, ttl=ttl, max_stale=max_stale)
+    except HTTPException as e:
+        raise HTTPException(status_code=e.status_code, detail=f"복약 일정 조회 실패: {e.detail}")
+
+    if "body" not in response_data:
+        logger.error(f"외부 API 응답에 'body' 필드가 없습니다: {response_data}")
+        raise HTTPException(status_code=500, detail="외부 API 응답 형식 오류: 'body' 필드 누락")
+    body = response_data["body"]
+    if not isinstance(body, list):
+        logger.error(f"외부 API 응답의 'body' 필드가 리스트가 아닙니다: {body}")
+        raise HTTPException(status_code=500, detail="외부 API 응답 형식 오류: 'body'가 리스트가 아님")
+    return body
+
+
+async def _history_days(jwt_token: str, start_date: date, end_date: date,
+                        max_stale: Optional[float]) -> List[Dict[str, Any]]:
+    user_key = user_cache_key(jwt_token)
+    stored = await asyncio.to_thread(routine_history.get_days, user_key, start_date, end_date)
+
+    missing = [day for day in (start_date + timedelta(days=offset)
+                               for offset in range((end_date - start_date).days + 1)) if day not in stored]
+    if missing:
+        # 빠진 날짜가 걸친 구간을 한 번에 조회 (저장소에 보관하므로 메모리 캐시에는 두지 않음)
+        fetched = await _get_routine_body(jwt_token, missing[0], missing[-1], 0, max_stale)
+        if upstream_cache.stale_age() is None:
+            await asyncio.to_thread(routine_history.put_days, user_key, missing[0], missing[-1], fetched)
+        for day_data in fetched:
+            try:
+                stored[date.fromisoformat(day_data["take_date"])] = day_data
+            except (KeyError, TypeError, ValueError):
+                continue
+        logger.info(f"복약 기록 저장소: {(missing[-1] - missing[0]).days + 1}일 백엔드 조회 "
+                    f"({start_date} ~ {end_date})")
+
+    return [stored[day] for day in sorted(stored) if stored[day] is not None and start_date <= day <= end_date]
+
+
+async def fetch_routine_days(jwt_token: str, start_date: date, end_date: date,
+                             max_stale: Optional[float] = None) -> List[Dict[str, Any]]:
+    """
+    기간의 날짜별 루틴 데이터 조회 (응답 형식 검증)
+
+    확정된 지난 날짜(오늘 - ROUTINE_HISTORY_FINAL_DAYS 이전)는 로컬 저장소에서 읽고 저장되지 않은 날짜만 백엔드에서 조회하며,
+    최근 날짜는 업스트림 캐시를 거쳐 백엔드에서 조회합니다.
+    max_stale 은 조회 도구에서만 지정합니다 (백엔드 장애 시 이 시간 이내의 마지막 응답 사용, 이 응답은 저장하지 않음).
+
+    Raises:
+        HTTPException: 업스트림 오류 응답 또는 응답 형식 오류
+        httpx.RequestError: 네트워크 오류
+    """
+    cutoff = datetime.now(kst).date() - timedelta(days=ROUTINE_HISTORY_FINAL_DAYS + 1)
+    if routine_history is None or not routine_history.is_open or start_date > cutoff:
+        return await _get_routine_body(jwt_token, start_date, end_date, ROUTINE_CACHE_TTL, max_stale)
+
+    # stale 응답 여부가 호출한 컨텍스트에 남도록 순서대로 조회 (지난 날짜는 대부분 로컬에서 바로 반환됨)
+    history_end = min(end_date, cutoff)
+    days = await _history_days(jwt_token, start_date, history_end, max_stale)
+    if end_date > history_end:
+        days += await _get_routine_body(jwt_token, history_end + timedelta(days=1), end_date,
+                                        ROUTINE_CACHE_TTL, max_stale)
+    return days
+
+
+# 파일은 앱 lifespan 에서 열고 닫음 (import 시 디스크에 쓰지 않도록)
+routine_history = RoutineHistoryStore(
+    ROUTINE_HISTORY_PATH, ROUTINE_HISTORY_MAX_MB * 1024 * 1024, ROUTINE_HISTORY_IDLE_DAYS
+) if ROUTINE_HISTORY_ENABLED else None
@@ -0,0 +1,87 @@
+import asyncio
+import logging
+import mmap
+import os
+from typing import Dict, Optional, Tuple, Union
+
+from dotenv import load_dotenv
+
+from config.storage_config import data_path
+from voice.synthesizer import ClovaSpeechSynthesizer, SpeechSynthesizer, StubSpeechSynthesizer
+from voice.tts_cache import TTSAudioCache, tts_cache_key
+from voice.voice_setting import VoiceSettings
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+# clova: CLOVA Voice API / stub: 네트워크 없이 동작하는 무음 WAV 합성기 (로컬/벤치마크/테스트용)
+TTS_SYNTHESIZER = os.getenv("TTS_SYNTHESIZER", "clova")
+TTS_CACHE_DIR = data_path(os.getenv("TTS_CACHE_DIR", "tts"))  # 상대 경로는 DATA_DIR 기준
+TTS_CACHE_MAX_MB = int(os.getenv("TTS_CACHE_MAX_MB", "512"))
+TTS_STUB_LATENCY_MS = float(os.getenv("TTS_STUB_LATENCY_MS", "0"))
+
+
+class TTSService:
+    """
+    TTS 합성 결과를 내용 기반 디스크 캐시로 재사용하는 서비스
+
+    같은 (문장, 음성 설정)은 한 번만 합성하며, 동시에 들어온 같은 요청은 하나의 합성으로 합칩니다.
+    """
+
+    def __init__(self, synthesizer: SpeechSynthesizer, cache: TTSAudioCache):
+        self.synthesizer = synthesizer
+        self.cache = cache
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def get_audio(self, text: str, settings: VoiceSettings) -> Tuple[str, Union[mmap.mmap, bytes], bool]:
+        """
+        오디오 조회 (캐시 히트면 mmap, 미스면 합성한 바이트)
+
+        Returns:
+            (캐시 키, 오디오, 캐시 히트 여부)
+        """
+        text = " ".join(text.split())
+        key = tts_cache_key(text, settings, self.synthesizer.name)
+
+        # 파일 열기/mmap 은 디스크 I/O 이므로 스레드에서 실행
+        mapped = await asyncio.to_thread(self.cache.open, key, settings.format)
+        if mapped is not None:
+            return key, mapped, True
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return key, await asyncio.shield(inflight), False
+
+        task = asyncio.ensure_future(self._synthesize(key, text, settings))
+        self._inflight[key] = task
+        try:
+            return key, await asyncio.shield(task), False
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _synthesize(self, key: str, text: str, settings: VoiceSettings) -> bytes:
+        data = await self.synthesizer.synthesize(text, settings)
+        try:
+            await asyncio.to_thread(self.cache.put, key, settings.format, data)
+        except OSError as e:
+            # 캐시 저장 실패는 응답에 영향을 주지 않음
+            logger.error(f"TTS 캐시 저장 실패: {key}, {e}")
+        return data
+
+
+def create_synthesizer(synthesizer_type: str) -> Optional[SpeechSynthesizer]:
+    if synthesizer_type == "stub":
+        return StubSpeechSynthesizer(latency=TTS_STUB_LATENCY_MS / 1000)
+    if synthesizer_type == "clova":
+        client_id = os.getenv("CLOVA_CLIENT_ID")
+        client_secret = os.getenv("CLOVA_CLIENT_SECRET")
+        if not client_id or not client_secret:
+            logger.warning("CLOVA_CLIENT_ID/CLOVA_CLIENT_SECRET 미설정으로 TTS 비활성화")
+            return None
+        return ClovaSpeechSynthesizer(client_id, client_secret)
+    raise ValueError(f"지원하지 않는 TTS 합성기입니다: {synthesizer_type}")
+
+
+_synthesizer = create_synthesizer(TTS_SYNTHESIZER)
+tts_service = TTSService(_synthesizer, TTSAudioCache(TTS_CACHE_DIR, TTS_CACHE_MAX_MB * 1024 * 1024)) \
+    if _synthesizer is not None else None
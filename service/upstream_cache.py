@@ -0,0 +1,316 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import httpx
+from fastapi import HTTPException
+from dotenv import load_dotenv
+
+from auth.jwt_token_helper import get_user_id_from_token
+from cache import TTLCache
+from service.call_accounting import upstream_client
+
+load_dotenv()
+logger = logging.getLogger(__name__)
+
+medeasy_api_url = os.getenv("MEDEASY_API_URL")
+
+ROUTINE_CACHE_TTL = int(os.getenv("ROUTINE_CACHE_TTL", "60"))
+SCHEDULE_CACHE_TTL = int(os.getenv("SCHEDULE_CACHE_TTL", "300"))
+UPSTREAM_CACHE_MAX_SIZE = int(os.getenv("UPSTREAM_CACHE_MAX_SIZE", "10000"))
+# 캐시가 만료/무효화된 뒤에도 조건부 GET 재검증을 위해 응답 검증자(ETag 등)를 보관하는 시간
+UPSTREAM_VALIDATOR_TTL = int(os.getenv("UPSTREAM_VALIDATOR_TTL", "3600"))
+
+# 백엔드 장애 시 조회 도구가 마지막으로 성공한 응답을 대신 반환할 수 있는 최대 경과 시간(초, 0이면 사용 안 함)
+# 마지막 응답은 검증자와 함께 보관되므로 UPSTREAM_VALIDATOR_TTL 보다 길게 설정해도 그 이상은 보관되지 않음
+ROUTINE_MAX_STALE = int(os.getenv("ROUTINE_MAX_STALE_SECONDS", "1800"))
+CURRENT_MEDICATIONS_MAX_STALE = int(os.getenv("CURRENT_MEDICATIONS_MAX_STALE_SECONDS", "3600"))
+MEDICINE_SEARCH_MAX_STALE = int(os.getenv("MEDICINE_SEARCH_MAX_STALE_SECONDS", "3600"))
+# 장애를 감지한 뒤 이 시간 동안은 stale 응답이 있는 조회를 백엔드를 기다리지 않고 바로 반환 (갱신은 백그라운드)
+UPSTREAM_OUTAGE_SECONDS = float(os.getenv("UPSTREAM_OUTAGE_SECONDS", "15"))
+
+# 현재 요청에서 stale 응답을 반환한 경우 가장 오래된 응답의 경과 시간(초)
+_stale_age: ContextVar[Optional[float]] = ContextVar("upstream_stale_age", default=None)
+
+
+def user_cache_key(jwt_token: str) -> str:
+    """
+    캐시 키로 사용할 사용자 식별자
+
+    서명 검증된 토큰이면 userId, 검증할 수 없으면 토큰 해시를 사용합니다.
+    (검증되지 않은 userId로는 다른 사용자의 캐시에 접근할 수 없도록)
+    """
+    try:
+        return f"user:{get_user_id_from_token(jwt_token)}"
+    except Exception:
+        return f"token:{hashlib.sha256(jwt_token.encode()).hexdigest()[:32]}"
+
+
+@dataclass
+class ResponseValidators:
+    """조건부 GET 재검증용 응답 검증자와 마지막 응답 본문"""
+    etag: Optional[str]
+    last_modified: Optional[str]
+    body_hash: Optional[str]  # 백엔드가 검증자를 주지 않을 때 변경 여부 판단용
+    size: int
+    data: Any
+    fetched_at: float  # 백엔드에서 마지막으로 확인한 시각 (time.time())
+    superseded: bool = False  # 쓰기 작업으로 무효화됨 (장애 시에도 stale 응답으로 쓰지 않음)
+
+    def age(self) -> float:
+        return time.time() - self.fetched_at
+
+
+def _is_outage(error: Exception) -> bool:
+    """백엔드 장애로 볼 오류 (네트워크 오류, 5xx). 4xx(인증 실패 등)는 stale 응답으로 가리지 않음"""
+    return isinstance(error, httpx.RequestError) or (isinstance(error, HTTPException) and error.status_code >= 500)
+
+
+class UpstreamCache:
+    """
+    MEDEASY API GET 응답을 사용자별로 캐싱
+
+    동일 키에 대한 동시 요청은 하나의 업스트림 호출로 합쳐집니다(single-flight).
+    캐시가 만료되거나 무효화된 항목은 보관해 둔 ETag/Last-Modified로 조건부 GET을 보내
+    304 응답이면 본문 전송 없이 기존 데이터를 재사용합니다. 백엔드가 검증자를 주지 않으면
+    본문 해시로 변경 여부를 판단해 변경이 없을 때 JSON 파싱을 생략합니다.
+    반환되는 데이터는 캐시와 공유되므로 호출자가 수정하면 안 됩니다.
+
+    조회 도구는 max_stale 을 지정해 백엔드 장애(네트워크 오류, 5xx) 시 마지막으로 성공한 응답을 대신 받을 수 있습니다
+    (stale-while-revalidate). 장애 감지 후 UPSTREAM_OUTAGE_SECONDS 동안은 백엔드를 기다리지 않고 stale 응답을
+    바로 반환하며 갱신은 백그라운드에서 시도합니다. 쓰기 경로는 max_stale 을 지정하지 않으므로 항상 백엔드를 호출합니다.
+    """
+
+    def __init__(self, max_size: int = UPSTREAM_CACHE_MAX_SIZE, default_ttl: float = ROUTINE_CACHE_TTL,
+                 validator_ttl: float = UPSTREAM_VALIDATOR_TTL):
+        self._cache = TTLCache(max_size=max_size, default_ttl=default_ttl)
+        self._validators = TTLCache(max_size=max_size, default_ttl=validator_ttl)
+        self._inflight: Dict[Tuple, asyncio.Future] = {}
+        self._listeners: Dict[str, List[Callable[[str, Any], None]]] = {}
+        self._revalidation = {"fetches": 0, "not_modified": 0, "unchanged_bodies": 0,
+                              "bytes_received": 0, "bytes_decoded": 0, "bytes_saved": 0}
+        self._outage_until = 0.0  # time.monotonic() 기준
+        self._background: set = set()
+        self._stale = {"served": 0, "unavailable": 0, "background_refreshes": 0, "background_failures": 0}
+
+    def add_listener(self, path: str, listener: Callable[[str, Any], None]) -> None:
+        """업스트림에서 새로 조회한 응답을 전달받을 리스너 등록 (listener(jwt_token, data))"""
+        self._listeners.setdefault(path, []).append(listener)
+
+    def _notify(self, path: str, jwt_token: str, data: Any) -> None:
+        for listener in self._listeners.get(path, []):
+            try:
+                listener(jwt_token, data)
+            except Exception as e:
+                logger.error(f"업스트림 응답 리스너 오류 ({path}): {e}")
+
+    @staticmethod
+    def _key(jwt_token: str, path: str, params: Optional[Dict[str, Any]]) -> Tuple:
+        return user_cache_key(jwt_token), path, tuple(sorted((params or {}).items()))
+
+    async def _fetch(self, key: Tuple, path: str, jwt_token: str, params: Optional[Dict[str, Any]]) -> Any:
+        headers = {"Authorization": f"Bearer {jwt_token}", "Content-Type": "application/json"}
+        validators: Optional[ResponseValidators] = self._validators.get(key)
+        if validators is not None:
+            if validators.etag:
+                headers["If-None-Match"] = validators.etag
+            if validators.last_modified:
+                headers["If-Modified-Since"] = validators.last_modified
+
+        async with upstream_client() as client:
+            resp = await client.get(f"{medeasy_api_url}{path}", headers=headers, params=params)
+        self._revalidation["fetches"] += 1
+
+        if resp.status_code == 304 and validators is not None:
+            # 변경 없음: 본문 전송 없이 기존 데이터 재사용
+            self._revalidation["not_modified"] += 1
+            self._revalidation["bytes_saved"] += validators.size
+            validators.fetched_at = time.time()
+            validators.superseded = False
+            self._validators.set(key, validators)
+            return validators.data
+
+        if resp.status_code >= 400:
+            try:
+                error_detail = resp.json().get("detail", resp.text)
+            except Exception:
+                error_detail = resp.text if resp.text else f"오류 코드 {resp.status_code}"
+            logger.error(f"외부 API 오류 응답 ({path}, 상태 코드: {resp.status_code}): {error_detail}")
+            raise HTTPException(status_code=resp.status_code, detail=f"{path} 조회 실패: {error_detail}")
+
+        body = resp.content
+        # httpx 기본 Accept-Encoding(gzip, deflate, zstd)으로 받은 실제 전송 바이트와 해제 후 크기
+        self._revalidation["bytes_received"] += resp.num_bytes_downloaded
+        self._revalidation["bytes_decoded"] += len(body)
+        etag = resp.headers.get("etag")
+        last_modified = resp.headers.get("last-modified")
+        body_hash = None if etag or last_modified else hashlib.sha256(body).hexdigest()
+
+        if body_hash is not None and validators is not None and validators.body_hash == body_hash:
+            # 검증자가 없는 백엔드: 본문이 같으면 파싱을 생략하고 기존 데이터 재사용
+            self._revalidation["unchanged_bodies"] += 1
+            data = validators.data
+        else:
+            data = json.loads(body)
+
+        self._validators.set(key, ResponseValidators(etag, last_modified, body_hash, len(body), data, time.time()))
+        return data
+
+    async def get_json(self, path: str, jwt_token: str, params: Optional[Dict[str, Any]] = None,
+                       ttl: Optional[float] = None, force_refresh: bool = False,
+                       max_stale: Optional[float] = None) -> Any:
+        """
+        캐시된 응답 반환, 없으면 업스트림 조회 후 저장
+
+        Args:
+            path: MEDEASY API 경로 (예: "/routine")
+            jwt_token: 사용자 JWT 토큰
+            params: 쿼리 파라미터
+            ttl: 캐시 유지 시간(초), None이면 기본값, 0이면 캐시하지 않고 재검증/stale 응답용 마지막 응답만 보관
+            force_refresh: True면 캐시를 무시하고 업스트림에서 다시 조회 (프리워밍용, 조건부 GET 사용)
+            max_stale: 백엔드 장애 시 이 시간(초) 이내에 성공한 마지막 응답을 대신 반환 (조회 도구 전용).
+                반환했는지는 mark_stale() 로 응답에 표시합니다.
+
+        Raises:
+            HTTPException: 업스트림 오류 응답
+            httpx.RequestError: 네트워크 오류
+        """
+        key = self._key(jwt_token, path, params)
+        if not force_refresh:
+            cached = self._cache.get(key)
+            if cached is not None:
+                return cached
+
+        if max_stale and time.monotonic() < self._outage_until:
+            stale = self._stale_copy(key, max_stale)
+            if stale is not None:
+                # 장애 중: 타임아웃을 기다리지 않고 마지막 응답 반환, 갱신은 백그라운드에서
+                self._refresh_in_background(key, path, jwt_token, params, ttl)
+                return self._serve_stale(stale)
+
+        try:
+            return await self._load(key, path, jwt_token, params, ttl)
+        except Exception as e:
+            if not _is_outage(e):
+                raise
+            self._outage_until = time.monotonic() + UPSTREAM_OUTAGE_SECONDS
+            stale = self._stale_copy(key, max_stale) if max_stale else None
+            if stale is None:
+                if max_stale:
+                    self._stale["unavailable"] += 1
+                raise
+            logger.warning(f"백엔드 장애로 {path} 마지막 응답 반환 ({stale.age():.0f}초 전): {e}")
+            return self._serve_stale(stale)
+
+    async def _load(self, key: Tuple, path: str, jwt_token: str, params: Optional[Dict[str, Any]],
+                    ttl: Optional[float]) -> Any:
+        """업스트림 조회 (동일 키 동시 요청은 하나로 합침) 후 캐시 저장"""
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            return await asyncio.shield(inflight)
+
+        task = asyncio.ensure_future(self._fetch(key, path, jwt_token, params))
+        self._inflight[key] = task
+        try:
+            data = await asyncio.shield(task)
+        finally:
+            self._inflight.pop(key, None)
+
+        self._outage_until = 0.0
+        if ttl != 0:
+            self._cache.set(key, data, ttl)
+        self._notify(path, jwt_token, data)
+        return data
+
+    def _stale_copy(self, key: Tuple, max_stale: float) -> Optional[ResponseValidators]:
+        validators: Optional[ResponseValidators] = self._validators.get(key)
+        if validators is None or validators.superseded or validators.age() > max_stale:
+            return None
+        return validators
+
+    def _serve_stale(self, stale: ResponseValidators) -> Any:
+        self._stale["served"] += 1
+        age = stale.age()
+        current = _stale_age.get()
+        _stale_age.set(age if current is None else max(current, age))
+        return stale.data
+
+    def _refresh_in_background(self, key: Tuple, path: str, jwt_token: str, params: Optional[Dict[str, Any]],
+                               ttl: Optional[float]) -> None:
+        if key in self._inflight:
+            return
+
+        async def refresh():
+            try:
+                await self._load(key, path, jwt_token, params, ttl)
+            except Exception as e:
+                self._stale["background_failures"] += 1
+                if _is_outage(e):
+                    self._outage_until = time.monotonic() + UPSTREAM_OUTAGE_SECONDS
+                logger.debug(f"백그라운드 갱신 실패 ({path}): {e}")
+
+        self._stale["background_refreshes"] += 1
+        task = asyncio.create_task(refresh())
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+
+    @staticmethod
+    def stale_age() -> Optional[float]:
+        """현재 요청에서 사용한 stale 응답의 경과 시간(초), 사용하지 않았으면 None"""
+        return _stale_age.get()
+
+    @staticmethod
+    def mark_stale(response: Any) -> Any:
+        """
+        현재 요청에서 stale 응답을 사용했다면 응답에 stale 여부와 경과 시간을 표시한 사본 반환
+
+        캐시와 공유되는 데이터일 수 있으므로 원본을 수정하지 않습니다. dict 가 아닌 응답은 그대로 반환합니다.
+        """
+        age = _stale_age.get()
+        if age is None or not isinstance(response, dict):
+            return response
+        _stale_age.set(None)
+        marked = {**response, "stale": True, "stale_age_seconds": int(age)}
+        elapsed = f"{int(age)}초" if age < 60 else f"약 {round(age / 60)}분"
+        note = f"(백엔드 연결 문제로 {elapsed} 전에 조회한 정보입니다. 최신 정보와 다를 수 있습니다.)"
+        if isinstance(marked.get("message"), str):
+            marked["message"] = f"{marked['message']}\n{note}"
+        else:
+            marked["stale_notice"] = note
+        return marked
+
+    def invalidate(self, jwt_token: str, *paths: str) -> int:
+        """
+        사용자의 캐시 무효화 (쓰기 작업 후 호출, paths가 없으면 사용자 캐시 전체)
+
+        검증자는 남겨 두므로 다음 조회는 조건부 GET으로 재검증합니다.
+        """
+        user_key = user_cache_key(jwt_token)
+
+        def matches(key: Tuple) -> bool:
+            return key[0] == user_key and (not paths or key[1] in paths)
+
+        removed = self._cache.delete_matching(matches)
+        # 쓰기 이전 데이터는 장애 중에도 stale 응답으로 반환하지 않음
+        for _, validators in self._validators.items_matching(matches):
+            validators.superseded = True
+        logger.debug(f"캐시 무효화: {user_key} {paths or '(전체)'} → {removed}건")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._cache.stats(),
+            "inflight": len(self._inflight),
+            "validators": len(self._validators),
+            "revalidation": dict(self._revalidation),
+            "stale": {**self._stale, "outage": time.monotonic() < self._outage_until},
+        }
+
+
+upstream_cache = UpstreamCache()
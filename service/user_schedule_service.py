@@ -1,15 +1,14 @@
-import json
 from logging import exception
 from typing import List, Dict, Any
 
-import httpx
 import os
 from fastapi import HTTPException
 from dotenv import load_dotenv
 import logging
 
-from langchain_core.messages import SystemMessage, HumanMessage
-from langchain_openai import ChatOpenAI
+from llm import matching_backend
+from service.cache_warmer import cache_warmer
+from service.upstream_cache import SCHEDULE_CACHE_TTL, upstream_cache
 
 logger=logging.getLogger(__name__)
 load_dotenv()
@@ -18,46 +17,32 @@ medeasy_api_url = os.getenv("MEDEASY_API_URL")
 if not medeasy_api_url:
     logger.error("medeasy api url not set")
 
-llm = ChatOpenAI(model_name="gpt-4o-mini", temperature=0)
-
 """
 사용자 스케줄 리스트 목록 반환 
 """
 async def get_user_schedule(jwt_token: str) -> List[Dict[str, Any]]:
-    schedule_url = f"{medeasy_api_url}/user/schedule"
-    headers = {"Authorization": f"Bearer {jwt_token}"}
-
-    async with httpx.AsyncClient() as client:
-        resp = await client.get(schedule_url, headers=headers)
-        if resp.status_code != 200:
-            raise HTTPException(status_code=502, detail=f"스케줄 조회 실패: {resp.text}")
-        schedules = resp.json().get("body", [])
-        logger.info(f"schedules: {schedules}")
-
-        return schedules
-
-async def mapping_user_schedule_ids(schedules: List[Dict[str, Any]], user_schedule_names: List[str]):
-    prompt = f"""
-        Available schedules:
-        {json.dumps(schedules, ensure_ascii=False, indent=2)}
-
-        Requested names: {user_schedule_names}
-
-        Return a JSON array of integers: the user_schedule_id values whose 'name' best match the requested names.
-        """
-    messages = [
-        SystemMessage(
-            content="Match user-requested schedule names to available schedules. Return ONLY the JSON array, without any markdown code fences."),
-        HumanMessage(content=prompt)
-    ]
-    # agenerate 는 메시지 리스트를 리스트로 감싸서 전달
-    chat_result = await llm.agenerate([messages])
-    logger.info(f"chat_result: {chat_result}")
-    matched_text = chat_result.generations[0][0].message.content
     try:
-        matched_ids = json.loads(matched_text)
+        response_data = await upstream_cache.get_json("/user/schedule", jwt_token, ttl=SCHEDULE_CACHE_TTL)
+    except HTTPException as e:
+        raise HTTPException(status_code=502, detail=f"스케줄 조회 실패: {e.detail}")
+
+    schedules = response_data.get("body", [])
+    logger.info(f"schedules: {schedules}")
+
+    # 복용 시간 직전 캐시 프리워밍을 위해 사용자 take_time 학습
+    if cache_warmer is not None:
+        cache_warmer.observe(jwt_token, schedules)
+
+    return schedules
+
+async def mapping_user_schedule_ids(schedules: List[Dict[str, Any]], user_schedule_names: List[str],
+                                    operation_id: str = "mapping_user_schedule_ids"):
+    try:
+        matching_result = await matching_backend.match_schedule_ids(operation_id, schedules, user_schedule_names)
+        logger.info(f"matching_result: {matching_result}")
+        matched_ids = matching_result.user_schedule_ids
     except Exception:
         # 파싱 실패시 빈 리스트 처리
         matched_ids = []
 
-    return matched_ids
\ No newline at end of file
+    return matched_ids
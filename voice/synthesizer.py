@@ -0,0 +1,95 @@
+import asyncio
+import hashlib
+import io
+import logging
+import wave
+from abc import ABC, abstractmethod
+
+import httpx
+
+from voice.voice_setting import VoiceSettings
+
+logger = logging.getLogger(__name__)
+
+
+class SpeechSynthesizer(ABC):
+    """TTS 합성기 인터페이스 (벤더 교체/테스트 스텁용)"""
+
+    # 캐시 키 네임스페이스 (합성기가 바뀌면 다른 오디오로 취급)
+    name: str = "base"
+
+    @abstractmethod
+    async def synthesize(self, text: str, settings: VoiceSettings) -> bytes:
+        """text를 settings로 합성한 오디오 바이트 반환 (실패 시 예외 발생)"""
+
+    async def close(self) -> None:
+        pass
+
+
+class ClovaSpeechSynthesizer(SpeechSynthesizer):
+    """네이버 클라우드 CLOVA Voice(Premium) TTS"""
+
+    name = "clova"
+    api_url = "https://naveropenapi.apigw.ntruss.com/tts-premium/v1/tts"
+
+    def __init__(self, client_id: str, client_secret: str, timeout: float = 10.0):
+        self.client_id = client_id
+        self.client_secret = client_secret
+        self._timeout = timeout
+        self._client = None
+
+    async def synthesize(self, text: str, settings: VoiceSettings) -> bytes:
+        if self._client is None:
+            self._client = httpx.AsyncClient(timeout=self._timeout)
+
+        headers = {
+            "X-NCP-APIGW-API-KEY-ID": self.client_id,
+            "X-NCP-APIGW-API-KEY": self.client_secret,
+        }
+        data = {
+            "speaker": settings.speaker,
+            "speed": settings.speed,
+            "pitch": settings.pitch,
+            "volume": settings.volume,
+            "format": settings.format,
+            "text": text,
+        }
+        resp = await self._client.post(self.api_url, headers=headers, data=data)
+        if resp.status_code >= 400:
+            logger.error(f"TTS 합성 API 오류 (상태 코드: {resp.status_code}): {resp.text}")
+            resp.raise_for_status()
+        return resp.content
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+class StubSpeechSynthesizer(SpeechSynthesizer):
+    """
+    네트워크 없이 동작하는 결정적 스텁 합성기 (로컬/벤치마크/테스트용)
+
+    글자 수에 비례한 길이의 무음 WAV를 만들고, 같은 입력에는 항상 같은 바이트를 반환합니다.
+    latency(초)를 지정하면 실제 벤더의 합성 지연을 흉내냅니다.
+    """
+
+    name = "stub"
+
+    def __init__(self, latency: float = 0.0, sample_rate: int = 8000):
+        self.latency = latency
+        self.sample_rate = sample_rate
+
+    async def synthesize(self, text: str, settings: VoiceSettings) -> bytes:
+        if self.latency > 0:
+            await asyncio.sleep(self.latency)
+
+        seed = hashlib.sha256(f"{text}|{settings}".encode()).digest()
+        frames = int(self.sample_rate * 0.05 * max(len(text), 1))
+        buffer = io.BytesIO()
+        with wave.open(buffer, "wb") as wav:
+            wav.setnchannels(1)
+            wav.setsampwidth(1)
+            wav.setframerate(self.sample_rate)
+            wav.writeframes(seed[:8] + b"\x80" * frames)  # 앞부분에 입력 해시를 넣어 입력별로 구분
+        return buffer.getvalue()
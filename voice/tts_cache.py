@@ -0,0 +1,173 @@
+import hashlib
+import json
+import logging
+import mmap
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+from voice.voice_setting import VoiceSettings
+
+logger = logging.getLogger(__name__)
+
+AUDIO_MEDIA_TYPES = {"mp3": "audio/mpeg", "wav": "audio/wav"}
+
+
+def tts_cache_key(text: str, settings: VoiceSettings, namespace: str = "") -> str:
+    """(text, speaker, speed, pitch, volume, format) 내용 기반 캐시 키"""
+    payload = json.dumps(
+        [namespace, text, settings.speaker, settings.speed, settings.pitch, settings.volume, settings.format],
+        ensure_ascii=False, separators=(",", ":"),
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class TTSAudioCache:
+    """
+    합성된 TTS 오디오를 로컬 디스크에 저장하는 내용 주소(content-addressed) 캐시
+
+    전체 크기가 max_bytes를 넘으면 가장 오래 사용하지 않은 파일부터 삭제합니다(LRU).
+    LRU 순서는 메모리에 유지하며, 재시작 시에는 파일 수정 시각 순으로 복원합니다.
+    생성 시에는 디스크에 접근하지 않으며 load() 이후 사용할 수 있습니다 (앱 lifespan 에서 호출, 그 전에는 모두 미스).
+    디스크 I/O가 있는 메서드는 이벤트 루프 밖(스레드)에서 호출해야 합니다.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, int]" = OrderedDict()  # 파일명 → 크기 (오래된 순)
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "evictions": 0}
+        self._loaded = False
+
+    def load(self) -> None:
+        """캐시 디렉터리 생성 및 기존 파일 인덱스 복원"""
+        if self._loaded:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._load_index()
+        self._loaded = True
+
+    def _load_index(self) -> None:
+        files = []
+        for name in os.listdir(self.directory):
+            path = os.path.join(self.directory, name)
+            if name.startswith(".") or not os.path.isfile(path):
+                continue
+            stat = os.stat(path)
+            files.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+            self._total_bytes += size
+        self._evict()
+
+    def open(self, key: str, audio_format: str) -> Optional[mmap.mmap]:
+        """
+        캐시된 오디오를 읽기 전용 mmap으로 반환 (없으면 None)
+
+        매핑을 연 뒤에는 파일이 LRU로 삭제되어도 매핑된 내용은 그대로 읽을 수 있습니다.
+        """
+        name = f"{key}.{audio_format}"
+        with self._lock:
+            if not self._loaded or name not in self._entries:
+                self._counters["misses"] += 1
+                return None
+            self._entries.move_to_end(name)
+
+        try:
+            with open(os.path.join(self.directory, name), "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (FileNotFoundError, ValueError):
+            # 외부에서 삭제되었거나 빈 파일이면 인덱스에서 제거하고 미스로 처리
+            with self._lock:
+                self._total_bytes -= self._entries.pop(name, 0)
+                self._counters["misses"] += 1
+            return None
+
+        with self._lock:
+            self._counters["hits"] += 1
+        return mapped
+
+    def put(self, key: str, audio_format: str, data: bytes) -> str:
+        """오디오 저장 (임시 파일에 쓴 뒤 원자적으로 교체) 후 용량 초과분 삭제"""
+        if not self._loaded:
+            raise OSError("TTS 캐시 디렉터리가 아직 준비되지 않았습니다")
+        name = f"{key}.{audio_format}"
+        path = os.path.join(self.directory, name)
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, prefix=".tmp-")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            self._total_bytes += len(data) - self._entries.pop(name, 0)
+            self._entries[name] = len(data)
+            self._evict()
+        return path
+
+    def _evict(self) -> None:
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            name, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            self._counters["evictions"] += 1
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+    def stats(self) -> Dict[str, Any]:
+        total = self._counters["hits"] + self._counters["misses"]
+        return {
+            **self._counters,
+            "hit_rate": round(self._counters["hits"] / total, 4) if total else 0.0,
+            "files": len(self._entries),
+            "bytes": self._total_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+
+class MmapResponse(Response):
+    """
+    mmap으로 매핑된 파일을 청크 단위 memoryview로 전송하는 응답
+
+    파일 내용을 파이썬 힙으로 읽어 들이지 않고 페이지 캐시를 그대로 사용합니다.
+    전송이 끝나면 매핑을 닫습니다.
+    """
+
+    chunk_size = 256 * 1024
+
+    def __init__(self, mapped: mmap.mmap, media_type: str, headers: Optional[Dict[str, str]] = None):
+        super().__init__(content=None, media_type=media_type, headers=headers)
+        self.mapped = mapped
+        self.headers["content-length"] = str(len(mapped))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await send({"type": "http.response.start", "status": self.status_code, "headers": self.raw_headers})
+            size = len(self.mapped)
+            if scope.get("method") == "HEAD":
+                await send({"type": "http.response.body", "body": b"", "more_body": False})
+                return
+            # 매핑을 닫으려면 매핑에서 만든 memoryview 가 모두 해제되어 있어야 하므로 청크마다 전송 후 바로 해제
+            with memoryview(self.mapped) as view:
+                for start in range(0, size, self.chunk_size):
+                    end = min(start + self.chunk_size, size)
+                    with view[start:end] as chunk:
+                        await send({"type": "http.response.body", "body": chunk, "more_body": end < size})
+        finally:
+            try:
+                self.mapped.close()
+            except BufferError:
+                # 서버가 전송한 청크에서 memoryview 를 만들어 아직 참조 중인 경우, 참조가 사라질 때 GC가 해제
+                logger.warning("TTS 오디오 매핑을 바로 닫지 못했습니다 (청크 참조가 남아 있음)")
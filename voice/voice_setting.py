@@ -1,10 +1,12 @@
 import json
-from dataclasses import dataclass, asdict
-from typing import Optional
+from dataclasses import dataclass, asdict, fields
+from typing import Dict, Iterable, Optional
 
 import redis
 import logging
 
+from service.call_accounting import record_redis
+
 logger = logging.getLogger(__name__)
 
 @dataclass
@@ -48,6 +50,7 @@ class VoiceSettingRepository:
             settings_json = json.dumps(asdict(settings))
 
             # 30일 만료 설정
+            record_redis()
             self.redis.setex(key, 2592000, settings_json)
             logger.info(f"음성 설정 저장 완료: {user_id}")
             return True
@@ -60,6 +63,7 @@ class VoiceSettingRepository:
         """음성 설정 조회"""
         try:
             key = self._get_key(user_id)
+            record_redis()
             settings_json = self.redis.get(key)
 
             if not settings_json:
@@ -72,6 +76,45 @@ class VoiceSettingRepository:
             logger.error(f"음성 설정 조회 실패: {user_id}, {e}")
             return None
 
+    def get_many(self, user_ids: Iterable[str], chunk_size: int = 500) -> Dict[str, Optional[VoiceSettings]]:
+        """
+        여러 사용자의 음성 설정을 한 번에 조회 (파이프라인 MGET, 왕복 1회)
+
+        키가 많으면 chunk_size 단위 MGET 여러 개로 나누되 같은 파이프라인으로 한 번에 전송합니다.
+        설정이 없거나 손상된 사용자는 None으로 반환하며, 기본값을 저장하지 않습니다.
+
+        Raises:
+            redis.RedisError: Redis 조회 실패
+        """
+        user_ids = list(dict.fromkeys(user_ids))
+        if not user_ids:
+            return {}
+
+        pipe = self.redis.pipeline(transaction=False)
+        for start in range(0, len(user_ids), chunk_size):
+            pipe.mget([self._get_key(user_id) for user_id in user_ids[start:start + chunk_size]])
+
+        try:
+            record_redis(len(pipe))
+            values = [value for chunk in pipe.execute() for value in chunk]
+        except Exception as e:
+            logger.error(f"음성 설정 일괄 조회 실패: {len(user_ids)}명, {e}")
+            raise
+
+        known_fields = {f.name for f in fields(VoiceSettings)}
+        result = {}
+        for user_id, settings_json in zip(user_ids, values):
+            if not settings_json:
+                result[user_id] = None
+                continue
+            try:
+                settings_dict = json.loads(settings_json)
+                result[user_id] = VoiceSettings(**{k: v for k, v in settings_dict.items() if k in known_fields})
+            except (ValueError, TypeError) as e:
+                logger.warning(f"음성 설정 형식 오류로 기본값 사용: {user_id}, {e}")
+                result[user_id] = None
+        return result
+
     def get_or_default(self, user_id: str) -> VoiceSettings:
         """음성 설정 조회 (없으면 기본값)"""
         settings = self.get(user_id)
@@ -104,6 +147,7 @@ class VoiceSettingRepository:
         """음성 설정 삭제"""
         try:
             key = self._get_key(user_id)
+            record_redis()
             result = self.redis.delete(key)
 
             if result > 0:
@@ -121,6 +165,7 @@ class VoiceSettingRepository:
         """음성 설정 존재 여부 확인"""
         try:
             key = self._get_key(user_id)
+            record_redis()
             return self.redis.exists(key) > 0
         except Exception as e:
             logger.error(f"음성 설정 존재 확인 실패: {user_id}, {e}")